@@ -7,6 +7,7 @@ from app.providers import *
 __all__ = [
     "AzureProvider",
     "ZillizProvider",
+    "LocalProvider",
     "settings",
     # The exported names from endpoints
     "wichita_router",
@@ -18,4 +19,5 @@ __all__ = [
     "chatbot_router",
     "ingest_router",
     "data_delete_router",
+    "admin_router",
 ]
@@ -2,10 +2,17 @@ from .retrieval_chain_zilliz import initialize_retrieval_chain as initialize_ret
 from .retrieval_chain_azure import initialize_retrieval_chain as initialize_retrieval_chain_azure
 from .translation_chain_openai_api import initialize_translation_chain as initialize_translation_chain_openai_api
 from .translation_chain_azure import initialize_translation_chain as initialize_translation_chain_azure
-from .vector_store_azure import initialize_vector_store_azure
-from .vector_store_zilliz import initialize_vector_store_zilliz
+from .vector_store_azure import initialize_vector_store_azure, add_embedded_documents_azure
+from .vector_store_zilliz import initialize_vector_store_zilliz, add_embedded_documents_zilliz
+from .vector_store_local import initialize_vector_store_local, add_embedded_documents_local, LocalVectorStore, HashEmbeddings
+from .retrieval_chain_local import initialize_retrieval_chain as initialize_retrieval_chain_local
+from .retrieval_chain_local import initialize_translation_chain as initialize_translation_chain_local
+from .retrieval_chain_local import StubChatModel
 from .ingest_chain import initialize_ingest_chain, IngestionChainWrapper
+from .translation_batch import TranslationChainWrapper
 from .delete_documents_azure import delete_document, delete_all_documents
+from .delete_documents_zilliz import delete_document as delete_document_zilliz
+from .delete_documents_zilliz import delete_all_documents as delete_all_documents_zilliz
 from .transcribe_openai_api import transcribe as transcribe_openai_api
 from .transcribe_azure import transcribe as transcribe_azure
 
@@ -14,12 +21,24 @@ __all__ = [
     "initialize_retrieval_chain_azure",
     "initialize_vector_store_azure",
     "initialize_vector_store_zilliz",
+    "initialize_vector_store_local",
+    "add_embedded_documents_azure",
+    "add_embedded_documents_zilliz",
+    "add_embedded_documents_local",
+    "initialize_retrieval_chain_local",
+    "initialize_translation_chain_local",
+    "LocalVectorStore",
+    "HashEmbeddings",
+    "StubChatModel",
     "initialize_translation_chain_openai_api",
     "initialize_translation_chain_azure",
     "initialize_ingest_chain",
     "IngestionChainWrapper",
+    "TranslationChainWrapper",
     "transcribe_openai_api",
     "transcribe_azure",
     "delete_document",
     "delete_all_documents",
+    "delete_document_zilliz",
+    "delete_all_documents_zilliz",
 ]
\ No newline at end of file
@@ -0,0 +1,42 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, List
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# IDs per delete call; Azure AI Search takes at most 1000 actions per indexing request
+DELETE_BATCH_SIZE = 1000
+
+async def delete_in_batches(
+    delete_batch: Callable[[List[Any]], Awaitable[int]],
+    ids: List[Any],
+    progress: Callable[..., None],
+    deleted: int = 0,
+) -> int:
+    """
+    Deletes `ids` DELETE_BATCH_SIZE at a time with `delete_batch`, which returns how many of
+    its batch it deleted. Up to DELETE_CONCURRENCY batches are in flight at once. Reports
+    the running documents_deleted total (starting from `deleted`) as each batch finishes,
+    and returns it. If a batch fails, the batches not yet started are cancelled.
+    """
+    semaphore = asyncio.Semaphore(max(1, settings.DELETE_CONCURRENCY))
+
+    async def run(batch: List[Any]) -> None:
+        nonlocal deleted
+        async with semaphore:
+            count = await delete_batch(batch)
+        deleted += count
+        progress(documents_deleted=deleted)
+
+    tasks = [
+        asyncio.ensure_future(run(ids[start : start + DELETE_BATCH_SIZE]))
+        for start in range(0, len(ids), DELETE_BATCH_SIZE)
+    ]
+    try:
+        await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        raise
+    return deleted
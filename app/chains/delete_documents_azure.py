@@ -1,13 +1,29 @@
-from azure.search.documents.aio import SearchClient
-from azure.core.credentials import AzureKeyCredential
+import asyncio
+import logging
+from typing import Callable, List
 from app.config import settings
+from app.chains.bulk_delete import delete_in_batches
 
-async def delete_document(document_id: str) -> dict:
-    search_client = SearchClient(
+logger = logging.getLogger(__name__)
+
+# Most document IDs a single search listing can page through ($skip + $top)
+LIST_LIMIT = 100_000
+# Consecutive full listings of already-deleted documents to wait through before giving up
+MAX_IDLE_ROUNDS = 30
+
+def _create_search_client():
+    # The Azure Search SDK is only needed by the delete endpoints, so it is imported on first use
+    from azure.search.documents.aio import SearchClient
+    from azure.core.credentials import AzureKeyCredential
+
+    return SearchClient(
         endpoint=settings.AZURE_AI_SEARCH_ENDPOINT,
         index_name=settings.AZURE_INDEX_NAME,
         credential=AzureKeyCredential(settings.AZURE_AI_SEARCH_API_KEY)
     )
+
+async def delete_document(document_id: str) -> dict:
+    search_client = _create_search_client()
     async with search_client:
         batch = [{"@search.action": "delete", "id": document_id}]
         result = await search_client.upload_documents(documents=batch)
@@ -23,37 +39,56 @@ async def delete_document(document_id: str) -> dict:
         return {"deleted": serialized_result}
     
     
-async def delete_all_documents() -> dict:
-    search_client = SearchClient(
-        endpoint=settings.AZURE_AI_SEARCH_ENDPOINT,
-        index_name=settings.AZURE_INDEX_NAME,
-        credential=AzureKeyCredential(settings.AZURE_AI_SEARCH_API_KEY)
-    )
-    document_ids = []
-    
+async def delete_all_documents(progress: Callable[..., None] = lambda **progress: None) -> dict:
+    """
+    Deletes every document in the index. Document IDs are listed page by page, following
+    the service's continuation, and deleted in concurrent batches (see delete_in_batches).
+    A listing reaches at most LIST_LIMIT documents ($skip stops at 100,000), so larger
+    indexes take several rounds; rounds repeat until one finds nothing left to delete.
+    Fails after MAX_IDLE_ROUNDS rounds in a row that find nothing new, e.g. when at least
+    LIST_LIMIT documents cannot be deleted. Reports stage, rounds, documents_found and documents_deleted through `progress`.
+    """
+    search_client = _create_search_client()
+    seen_ids = set()
+    failed = []
+    deleted, rounds, idle_rounds = 0, 0, 0
+
+    async def delete_batch(batch_ids: List[str]) -> int:
+        result = await search_client.delete_documents(documents=[{"id": doc_id} for doc_id in batch_ids])
+        for r in result:
+            if not r.succeeded:
+                failed.append({"key": r.key, "errorMessage": r.error_message, "statusCode": r.status_code})
+        return sum(1 for r in result if r.succeeded)
+
     async with search_client:
-        results = await search_client.search("*", select=["id"], top=1000)
-        async for doc in results:
-            document_ids.append(doc["id"])
-    
-        if not document_ids:
-            return {"message": "No documents found."}
-    
-        batch_size = 100
-        deletion_results = []
-        for i in range(0, len(document_ids), batch_size):
-            batch_ids = document_ids[i : i + batch_size]
-            deletion_batch = [{"@search.action": "delete", "id": doc_id} for doc_id in batch_ids]
-            result = await search_client.upload_documents(documents=deletion_batch)
-            serialized = [
-                {
-                    "key": r.key,
-                    "succeeded": r.succeeded,
-                    "errorMessage": r.error_message,
-                    "statusCode": r.status_code
-                }
-                for r in result
-            ]
-            deletion_results.append(serialized)
-    
-    return {"deleted_batches": deletion_results, "total_deleted": len(document_ids)}
+        while True:
+            rounds += 1
+            progress(stage="listing", rounds=rounds)
+            # Pages hold up to 1000 IDs; the SDK requests the next page as iteration reaches it
+            results = await search_client.search("*", select=["id"], top=LIST_LIMIT)
+            document_ids, listed = [], 0
+            async for doc in results:
+                listed += 1
+                # Deletions take a moment to reach search results, so skip IDs already deleted
+                if doc["id"] not in seen_ids:
+                    document_ids.append(doc["id"])
+            if not document_ids:
+                if listed < LIST_LIMIT:
+                    break
+                idle_rounds += 1
+                if idle_rounds >= MAX_IDLE_ROUNDS:
+                    raise RuntimeError(
+                        f"{idle_rounds} listings in a row found only documents already deleted or failed; "
+                        f"{deleted} deleted, {len(failed)} failed"
+                    )
+                # A full listing of deleted documents can hide the rest until the deletions land
+                await asyncio.sleep(1)
+                continue
+            idle_rounds = 0
+            seen_ids.update(document_ids)
+            progress(stage="deleting", documents_found=len(seen_ids))
+            deleted = await delete_in_batches(delete_batch, document_ids, progress, deleted)
+
+    if failed:
+        logger.warning("%d of %d documents could not be deleted", len(failed), len(seen_ids))
+    return {"total_deleted": deleted, "failed": failed, "rounds": rounds}
@@ -0,0 +1,31 @@
+import asyncio
+import logging
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+# Documents get auto-assigned, non-negative INT64 primary keys (auto_id=True in vector_store_zilliz)
+
+async def delete_document(vector_store, document_id: str) -> dict:
+    """Deletes one document from the Zilliz collection by primary key."""
+    try:
+        pk = int(document_id)
+    except ValueError:
+        raise ValueError(f"Invalid Zilliz document ID: {document_id!r}")
+    result = await asyncio.to_thread(vector_store.delete, [pk])
+    return {"deleted": [{"key": document_id, "succeeded": result.delete_count > 0}]}
+
+async def delete_all_documents(vector_store, progress: Callable[..., None] = lambda **progress: None) -> dict:
+    """
+    Deletes every document in the Zilliz collection with one filter-based delete, which the
+    server applies to the whole collection, so no IDs are listed or sent.
+    Reports stage and documents_deleted through `progress`.
+    """
+    if vector_store.col is None:
+        return {"total_deleted": 0}
+    progress(stage="deleting")
+    expr = f"{vector_store._primary_field} >= 0"
+    result = await asyncio.to_thread(vector_store.delete, expr=expr)
+    progress(documents_deleted=result.delete_count)
+    logger.info("Deleted %d documents from collection %s", result.delete_count, vector_store.collection_name)
+    return {"total_deleted": result.delete_count}
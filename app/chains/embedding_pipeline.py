@@ -0,0 +1,88 @@
+import asyncio
+import logging
+from collections import deque
+from typing import Any, AsyncIterator, Callable, List, Tuple
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from app.config import settings
+from app.utils.rate_limiter import TokenRateLimiter, rate_limit_delay
+from app.utils.tokens import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+# Stores documents with the vectors already computed for them and returns their IDs:
+# (vector_store, docs, vectors) -> ids. Each vector store module provides one.
+AddEmbeddedFn = Callable[[Any, List[Document], List[List[float]]], List[Any]]
+
+class EmbeddingPipeline:
+    """
+    The embedding stage of ingestion. embed_batches() packs chunks into batches of at most
+    INGEST_EMBED_BATCH_TOKENS estimated tokens and INGEST_BATCH_SIZE chunks, and embeds up
+    to INGEST_EMBED_CONCURRENCY batches at once while the caller stores the batches already
+    embedded. Every request first takes its tokens from a tokens-per-minute limiter
+    (INGEST_EMBED_TPM), shared by all of the tenant's ingestion jobs, for the chunks missing
+    from the embedding cache, and a batch that gets a 429 is retried with backoff, up to
+    INGEST_EMBED_MAX_RETRIES times, on its own. `embeddings` should not retry by itself
+    (max_retries=0 for the OpenAI clients), or each retry here multiplies the SDK's.
+    """
+    def __init__(self, embeddings: Embeddings, add_embedded: AddEmbeddedFn):
+        self.embeddings = embeddings
+        self.add_embedded = add_embedded
+        self.limiter = TokenRateLimiter(settings.INGEST_EMBED_TPM)
+
+    def split_batches(self, docs: List[Document]) -> List[List[Document]]:
+        max_tokens = max(1, settings.INGEST_EMBED_BATCH_TOKENS)
+        max_items = max(1, settings.INGEST_BATCH_SIZE)
+        batches, batch, batch_tokens = [], [], 0
+        for doc in docs:
+            tokens = estimate_tokens(doc.page_content)
+            if batch and (batch_tokens + tokens > max_tokens or len(batch) >= max_items):
+                batches.append(batch)
+                batch, batch_tokens = [], 0
+            batch.append(doc)
+            batch_tokens += tokens
+        if batch:
+            batches.append(batch)
+        return batches
+
+    async def uncached(self, texts: List[str]) -> List[str]:
+        """The texts whose vectors are not in the embedding cache (all of them without a cache)."""
+        store = getattr(self.embeddings, "document_embedding_store", None)
+        if store is None:
+            return texts
+        cached = await store.amget(texts)
+        return [text for text, vector in zip(texts, cached) if vector is None]
+
+    async def embed(self, texts: List[str]) -> List[List[float]]:
+        attempt = 0
+        while True:
+            # Cached vectors cost no API tokens, so only the misses are charged
+            tokens = sum(estimate_tokens(text) for text in await self.uncached(texts))
+            if tokens:
+                await self.limiter.acquire(tokens)
+            try:
+                return await self.embeddings.aembed_documents(texts)
+            except Exception as e:
+                delay = rate_limit_delay(e, attempt)
+                if delay is None or attempt >= settings.INGEST_EMBED_MAX_RETRIES:
+                    raise
+                attempt += 1
+                logger.warning("Embedding batch of %d chunks rate limited; retry %d in %.1fs", len(texts), attempt, delay)
+                await asyncio.sleep(delay)
+
+    async def embed_batches(self, docs: List[Document]) -> AsyncIterator[Tuple[List[Document], List[List[float]]]]:
+        """Yields (batch, vectors) in document order, embedding the next batches meanwhile."""
+        window = max(1, settings.INGEST_EMBED_CONCURRENCY)
+        pending = deque()
+        try:
+            for batch in self.split_batches(docs):
+                pending.append((batch, asyncio.ensure_future(self.embed([doc.page_content for doc in batch]))))
+                if len(pending) >= window:
+                    batch, task = pending.popleft()
+                    yield batch, await task
+            while pending:
+                batch, task = pending.popleft()
+                yield batch, await task
+        finally:
+            for _, task in pending:
+                task.cancel()
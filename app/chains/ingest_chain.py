@@ -1,131 +1,345 @@
 import asyncio
 import datetime
 import logging
-from langchain.docstore.document import Document
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-import chardet
-from PyPDF2 import PdfReader
-from docx import Document as DocxDocument
-import io
-from bs4 import BeautifulSoup
-import requests
+import os
+import weakref
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+import httpx
 from app.config import settings
+from app.utils.metrics import track_stage
+from app.utils.job_queue import Job, JobQueue
+from app.utils.process_pool import run_in_process
+from app.utils.chunk_registry import ChunkRegistry, chunk_hash, content_hash
+from app.chains.bulk_delete import delete_in_batches
+from app.chains.embedding_pipeline import AddEmbeddedFn, EmbeddingPipeline
+from app.chains.site_crawler import CrawlRequest, SiteCrawler
+from collections import deque
 from functools import partial
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple, TypeVar
+
+# Called with progress fields (stage, sections_done, sections_total, chunks_stored, chunks_skipped, chunks_total)
+# as ingestion advances
+ProgressFn = Callable[..., None]
 
 logger = logging.getLogger(__name__)
 
-def extract_text_from_url(url: str) -> str:
+T = TypeVar("T")
+
+# Failed pages listed in a crawl's result; the count covers them all
+MAX_REPORTED_FAILURES = 100
+
+def _no_progress(**progress) -> None:
+    pass
+
+# The parsers and the text splitter are imported where they are used, so they
+# only load once something of that type is ingested.
+# The synchronous functions below are CPU-bound and run in the process pool
+# (run_in_process), so they must stay module-level and take plain data.
+
+def extract_text_from_html(html: str) -> str:
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, 'html.parser')
+    return soup.get_text(separator="\n")
+
+async def extract_text_from_url(url: str, http_client: httpx.AsyncClient) -> str:
     try:
-        response = requests.get(url)
+        response = await http_client.get(url)
         response.raise_for_status()
     except Exception as e:
         logger.error("Error fetching URL '%s': %s", url, e)
         raise Exception(f"Error fetching URL '{url}': {e}")
     
-    html = response.text
-    soup = BeautifulSoup(html, 'html.parser')
-    text = soup.get_text(separator="\n")
+    # HTML parsing is CPU-bound, so keep it off the event loop
+    text = await run_in_process(extract_text_from_html, response.text)
     
     return text
 
-def extract_text_from_pdf(file_contents: bytes) -> str:
-    reader = PdfReader(io.BytesIO(file_contents))
-    text = ""
-    for page in reader.pages:
-        text += page.extract_text() or ""
+def count_pdf_pages(path: str) -> int:
+    from PyPDF2 import PdfReader
 
-    return text
+    return len(PdfReader(path).pages)
+
+def extract_text_from_pdf(path: str, start: int = 0, end: Optional[int] = None) -> str:
+    """Text of pages [start, end) of the PDF at `path` (all pages by default)."""
+    from PyPDF2 import PdfReader
+
+    reader = PdfReader(path)
+    return "\n".join(page.extract_text() or "" for page in reader.pages[start:end])
 
-async def initialize_ingest_chain_document(file_contents: bytes, filename: str, vector_store) -> dict:
+def extract_text_from_docx(path: str) -> str:
+    from docx import Document as DocxDocument
+
+    docx_file = DocxDocument(path)
+    # Join all paragraphs together
+    return "\n".join([p.text for p in docx_file.paragraphs])
+
+def detect_encoding(path: str, sample_bytes: int) -> str:
+    """Detects the text file's encoding from its first `sample_bytes` bytes."""
+    import chardet
+    with open(path, "rb") as f:
+        sample = f.read(sample_bytes)
+    encoding = chardet.detect(sample).get("encoding")
+    # Without an encoding, or with an ASCII-only sample, fall back to UTF-8,
+    # which also decodes ASCII and whatever non-ASCII text follows the sample
+    if not encoding or encoding.lower() == "ascii":
+        encoding = "utf-8"
+    return encoding
+
+def read_text_section(f, section_chars: int) -> str:
+    """
+    Next ~`section_chars` characters of the open text file, extended to the end of the line,
+    but by at most `section_chars` more, so a file without newlines is still read in sections.
+    """
+    section = f.read(section_chars)
+    if section and not section.endswith("\n"):
+        section += f.readline(section_chars)
+    return section
+
+def split_text(text: str, metadata: dict, chunk_size: int, chunk_overlap: int) -> List[Document]:
+    return split_documents([Document(page_content=text, metadata=metadata)], chunk_size, chunk_overlap)
+
+def split_documents(docs: List[Document], chunk_size: int, chunk_overlap: int) -> List[Document]:
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+    splitter = RecursiveCharacterTextSplitter(
+      separators=["\n\n", "\n", " ", ""],
+      chunk_size=chunk_size,
+      chunk_overlap=chunk_overlap
+    )
+    return splitter.split_documents(docs)
+
+def extract_pdf_chunks(path: str, start: int, end: int, metadata: dict, chunk_size: int, chunk_overlap: int) -> List[Document]:
+    return split_text(extract_text_from_pdf(path, start, end), metadata, chunk_size, chunk_overlap)
+
+def extract_docx_chunks(path: str, metadata: dict, chunk_size: int, chunk_overlap: int) -> List[Document]:
+    return split_text(extract_text_from_docx(path), metadata, chunk_size, chunk_overlap)
+
+async def run_in_order(calls: Iterable[Callable[[], Awaitable[T]]], window: int) -> AsyncIterator[T]:
+    """
+    Starts up to `window` of the calls at once and yields their results in call order,
+    so work runs in parallel while only `window` results are held at a time.
+    """
+    pending = deque()
+    try:
+        for call in calls:
+            pending.append(asyncio.ensure_future(call()))
+            if len(pending) >= window:
+                yield await pending.popleft()
+        while pending:
+            yield await pending.popleft()
+    finally:
+        for task in pending:
+            task.cancel()
+
+async def iter_document_chunks(path: str, filename: str, metadata: dict, progress: ProgressFn = _no_progress) -> AsyncIterator[List[Document]]:
+    """
+    Extracts and splits the file at `path` one section at a time, yielding each
+    section's chunks, so only a few sections are in memory however large the file is:
+      - PDF: INGEST_PDF_PAGES_PER_TASK pages per section, extracted in parallel in the process pool
+      - DOCX: the whole document (python-docx loads it at once)
+      - text: ~INGEST_TEXT_SECTION_CHARS characters per section, decoded with the encoding
+        detected from the first INGEST_ENCODING_SAMPLE_BYTES bytes
+    """
+    chunk_args = (metadata, settings.CHUNK_SIZE, settings.CHUNK_OVERLAP)
+    if filename.lower().endswith(".pdf"):
+        page_count = await run_in_process(count_pdf_pages, path)
+        step = max(1, settings.INGEST_PDF_PAGES_PER_TASK)
+        progress(sections_total=-(-page_count // step))
+        sections = (
+            partial(run_in_process, extract_pdf_chunks, path, start, min(start + step, page_count), *chunk_args)
+            for start in range(0, page_count, step)
+        )
+        async for chunks in run_in_order(sections, max(1, settings.INGEST_PROCESS_POOL_SIZE)):
+            yield chunks
+    elif filename.lower().endswith(".docx"):
+        progress(sections_total=1)
+        yield await run_in_process(extract_docx_chunks, path, *chunk_args)
+    else:
+        encoding = await run_in_process(detect_encoding, path, settings.INGEST_ENCODING_SAMPLE_BYTES)
+        logger.info("Detected encoding for '%s': %s", filename, encoding)
+        # Undecodable bytes after the sample are replaced rather than failing half-way through
+        with open(path, encoding=encoding, errors="replace") as f:
+            while True:
+                section = await asyncio.to_thread(read_text_section, f, settings.INGEST_TEXT_SECTION_CHARS)
+                if not section:
+                    break
+                yield await run_in_process(split_text, section, *chunk_args)
+
+def remove_file(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+class IncrementalIngest:
+    """
+    One ingestion run of `source`, measured against the chunks `registry` already holds
+    for it. store() embeds (through `pipeline`) and stores only chunks whose content hash
+    is new, recording each batch in the registry as soon as it is stored; once the whole source has been
+    seen, finish() deletes the chunks the new version no longer contains and records the
+    source's new version.
+    """
+    def __init__(self, vector_store, registry: ChunkRegistry, pipeline: EmbeddingPipeline, source: str, progress: ProgressFn = _no_progress):
+        self.vector_store = vector_store
+        self.registry = registry
+        self.pipeline = pipeline
+        self.source = source
+        self.progress = progress
+        self.known: Dict[str, Any] = {}
+        # Hashes of the chunks seen in this run, in order (a dict keeps insertion order)
+        self.seen: Dict[str, None] = {}
+        self.written = 0
+        self.skipped = 0
+
+    async def load(self) -> None:
+        self.known = await asyncio.to_thread(self.registry.get, self.source)
+
+    def select(self, chunks: List[Document]) -> List[Tuple[str, Document]]:
+        """The chunks to store, with their hashes: those neither stored before nor already seen in this run."""
+        new = []
+        for chunk in chunks:
+            digest = chunk_hash(self.source, chunk.page_content)
+            if digest in self.seen or digest in self.known:
+                self.skipped += 1
+            else:
+                new.append((digest, chunk))
+            self.seen[digest] = None
+        return new
+
+    async def store(self, chunks: List[Document]) -> None:
+        """
+        Embeds the new chunks in concurrent batches and stores each batch as soon as it is
+        embedded, while later batches are still being embedded, reporting the running
+        chunks_stored and chunks_skipped totals.
+        """
+        new = self.select(chunks)
+        self.progress(chunks_skipped=self.skipped)
+        digests = [digest for digest, _ in new]
+        # Batches come back in document order, so the next len(batch) hashes are the batch's
+        position = 0
+        async for batch, vectors in self.pipeline.embed_batches([chunk for _, chunk in new]):
+            # Vector store writes are blocking, so they run in a background thread
+            ids = await asyncio.to_thread(self.pipeline.add_embedded, self.vector_store, batch, vectors)
+            await asyncio.to_thread(self.registry.add, self.source, list(zip(digests[position : position + len(batch)], ids)))
+            position += len(batch)
+            self.written += len(batch)
+            self.progress(chunks_stored=self.written)
+
+    async def remove_stale(self) -> int:
+        """Deletes the source's previously stored chunks that this run did not see. Returns how many."""
+        stale = [digest for digest in self.known if digest not in self.seen]
+        batch_size = max(1, settings.INGEST_BATCH_SIZE)
+        for start in range(0, len(stale), batch_size):
+            batch = stale[start : start + batch_size]
+            await asyncio.to_thread(self.vector_store.delete, [self.known[digest] for digest in batch])
+            await asyncio.to_thread(self.registry.remove, self.source, batch)
+        if stale:
+            logger.info("Removed %d stale chunks of '%s'", len(stale), self.source)
+        return len(stale)
+
+    async def finish(self, kind: str) -> dict:
+        """
+        Removes stale chunks and records the source as ingested at this version.
+        Returns the numbers of chunks written, skipped and deleted.
+        """
+        self.progress(stage="cleanup")
+        deleted = await self.remove_stale()
+        await asyncio.to_thread(self.registry.record_source, self.source, kind, content_hash(self.seen))
+        return {"chunks": self.written + self.skipped, "written": self.written, "skipped": self.skipped, "deleted": deleted}
+
+async def initialize_ingest_chain_document(path: str, filename: str, vector_store, registry: ChunkRegistry, pipeline: EmbeddingPipeline, progress: ProgressFn = _no_progress) -> dict:
     """
     Ingestion chain that processes an uploaded document by:
-      1. Decoding the file contents (assumed UTF-8)
-      2. Creating a Document with metadata
-      3. Splitting the document into chunks
-      4. Adding the chunks to the index via the provided vector store
+      1. Extracting its text section by section (see iter_document_chunks)
+      2. Splitting each section into chunks with the document's metadata
+      3. Adding each section's new chunks to the index via the provided vector store
+         before the next section is extracted; chunks already stored for this filename
+         are skipped
+      4. Deleting the chunks an earlier version of the file had and this one doesn't
 
     Parameters:
-      - file_contents: Binary content of the uploaded file.
-      - filename: Name of the file.
+      - path: The uploaded file, spooled to disk.
+      - filename: Name of the file, which identifies it across re-uploads.
       - vector_store: An initialized vector store instance.
+      - registry: The tenant's chunk registry.
+      - pipeline: The tenant's embedding pipeline.
+      - progress: Called with progress fields as each section is extracted and each batch is stored.
 
     Returns:
-      A dictionary indicating success.
+      A dictionary indicating success, with the numbers of chunks written, skipped and deleted.
     """
+    metadata = {
+        "filename": filename,
+        "file_path": filename,
+        "timestamp": int(datetime.datetime.now().timestamp())
+    }
+    ingest = IncrementalIngest(vector_store, registry, pipeline, filename, progress)
+    await ingest.load()
+    progress(stage="extracting", sections_done=0, chunks_stored=0, chunks_skipped=0)
+    sections_done = 0
+    sections = iter_document_chunks(path, filename, metadata, progress)
     try:
-        if filename.lower().endswith(".pdf"):
-            # Handle PDF separately
-            text = extract_text_from_pdf(file_contents)
-            if not text.strip():
-                raise ValueError("Extracted text from PDF is empty.")
-        elif filename.lower().endswith(".docx"):
-            # Wrap the bytes in a BytesIO object
-            docx_file = DocxDocument(io.BytesIO(file_contents))
-            # Join all paragraphs together
-            text = "\n".join([p.text for p in docx_file.paragraphs])
-            if not text.strip():
-                raise ValueError("Extracted text from DOCX is empty.")
-        else:
-            # Detect encoding for text files
-            detection = chardet.detect(file_contents)
-            encoding = detection.get("encoding")
-            if not encoding:
-                encoding = "utf-8"  # Default fallback encoding
-            print("Detected encoding:", encoding)
-            text = file_contents.decode(encoding)
+        while True:
+            try:
+                chunks = await sections.__anext__()
+            except StopAsyncIteration:
+                break
+            except Exception as e:
+                # Only extraction errors end up here; storage errors propagate as they are
+                logger.error("File decoding error: %s", e)
+                raise Exception(f"Could not extract text from '{filename}': {e}")
+            progress(stage="storing")
+            await ingest.store(chunks)
+            sections_done += 1
+            progress(stage="extracting", sections_done=sections_done)
+    finally:
+        await sections.aclose()
 
-    except Exception as e:
-        logger.error("File decoding error: %s", e)
-        raise Exception("File must be UTF-8 encoded text")
-    
-    # Create a Document object for the file
-    doc = Document(
-        page_content=text,
-        metadata={
-            "filename": filename,
-            "file_path": filename,
-            "timestamp": int(datetime.datetime.now().timestamp())
-        }
-    )
-    
-    # Split the document into manageable chunks
-    splitter = RecursiveCharacterTextSplitter(
-      separators=["\n\n", "\n", " ", ""],
-      chunk_size=settings.CHUNK_SIZE,
-      chunk_overlap=settings.CHUNK_OVERLAP
-    )
-    docs = splitter.split_documents([doc])
-    print(f"Number of chunks: {len(docs)}")
-    for i, d in enumerate(docs):
-        print(f"Chunk {i} length: {len(d.page_content)}")
-
-    # Ingest the chunks into the vector store.
-    # This call runs in a background thread since vector_store.add_documents is blocking.
-    await asyncio.to_thread(vector_store.add_documents, docs)
-    
-    logger.info("File '%s' ingested successfully.", filename)
-    return {"status": "success", "message": f"File '{filename}' ingested successfully."}
+    if not ingest.seen:
+        raise ValueError(f"No text could be extracted from '{filename}'.")
+    result = await ingest.finish("document")
+    progress(stage="done", chunks_total=result["chunks"])
+    logger.info("File '%s' ingested successfully (%d chunks written, %d skipped, %d deleted).", filename, result["written"], result["skipped"], result["deleted"])
+    return {"status": "success", "message": f"File '{filename}' ingested successfully.", **result}
 
-async def initialize_ingest_chain_url(url: str, vector_store) -> dict:
+async def initialize_ingest_chain_url(url: str, vector_store, registry: ChunkRegistry, pipeline: EmbeddingPipeline, http_client: httpx.AsyncClient, progress: ProgressFn = _no_progress) -> dict:
     """
     Ingestion chain for processing a URL.
     This function fetches the URL, extracts text content, splits it, and adds the chunks to the vector store.
+    As with documents, chunks already stored for the URL are skipped and stale ones deleted.
     
     Parameters:
       - url: The URL to ingest.
       - vector_store: An initialized vector store instance.
+      - registry: The tenant's chunk registry.
+      - pipeline: The tenant's embedding pipeline.
+      - http_client: The provider's pooled async HTTP client.
+      - progress: Called with progress fields as each step starts and each batch is stored.
       
     Returns:
-      A dictionary indicating the ingestion status.
+      A dictionary indicating the ingestion status, with the numbers of chunks written, skipped and deleted.
     """
+    progress(stage="extracting")
     try:
-        text = extract_text_from_url(url)
+        text = await extract_text_from_url(url, http_client)
         if not text.strip():
             raise ValueError("Extracted text from URL is empty.")
     except Exception as e:
         logger.error("URL ingestion error for '%s': %s", url, e)
         raise Exception(f"URL ingestion error: {e}")
     
+    result = await store_page(url, text, vector_store, registry, pipeline, progress)
+    progress(stage="done")
+    
+    logger.info("URL '%s' ingested successfully (%d chunks written, %d skipped, %d deleted).", url, result["written"], result["skipped"], result["deleted"])
+    return {"status": "success", "message": f"URL '{url}' ingested successfully.", **result}
+
+async def store_page(url: str, text: str, vector_store, registry: ChunkRegistry, pipeline: EmbeddingPipeline, progress: ProgressFn = _no_progress) -> dict:
+    """
+    Splits the text of the web page at `url` and stores its new chunks under the URL,
+    deleting those of an earlier version (see IncrementalIngest). Returns the chunk counts.
+    """
     doc = Document(
         page_content=text,
         metadata={
@@ -134,34 +348,245 @@ async def initialize_ingest_chain_url(url: str, vector_store) -> dict:
         }
     )
     
-    splitter = RecursiveCharacterTextSplitter(
-        separators=["\n\n", "\n", " ", ""],
-        chunk_size=settings.CHUNK_SIZE,
-        chunk_overlap=settings.CHUNK_OVERLAP
-    )
-    docs = splitter.split_documents([doc])
+    progress(stage="splitting")
+    docs = await run_in_process(split_documents, [doc], settings.CHUNK_SIZE, settings.CHUNK_OVERLAP)
     logger.info("Number of chunks from URL '%s': %d", url, len(docs))
     
-    await asyncio.to_thread(vector_store.add_documents, docs)
-    
-    logger.info("URL '%s' ingested successfully.", url)
-    return {"status": "success", "message": f"URL '{url}' ingested successfully."}
+    ingest = IncrementalIngest(vector_store, registry, pipeline, url, progress)
+    await ingest.load()
+    progress(stage="storing", chunks_total=len(docs), chunks_stored=0)
+    await ingest.store(docs)
+    return await ingest.finish("url")
+
+async def initialize_ingest_chain_crawl(
+    request: CrawlRequest,
+    vector_store,
+    registry: ChunkRegistry,
+    pipeline: EmbeddingPipeline,
+    http_client: httpx.AsyncClient,
+    lock_source: Callable[[str], asyncio.Lock],
+    progress: ProgressFn = _no_progress,
+) -> dict:
+    """
+    Ingestion chain for a site crawl (see SiteCrawler). Pages are stored as the crawl finds
+    them, each under its own URL exactly as ingest_url would, up to INGEST_EMBED_CONCURRENCY
+    pages at a time, while the crawler keeps fetching. A page that fails is recorded and
+    skipped.
+
+    Parameters:
+      - request: Seeds, sitemaps, scope and limits of the crawl.
+      - vector_store, registry, pipeline, http_client: As for initialize_ingest_chain_url.
+      - lock_source: Returns the lock that keeps ingestions of one URL from overlapping.
+      - progress: Called with pages_queued, pages_fetched, pages_ingested, pages_failed,
+        chunks_stored and chunks_skipped as the crawl advances.
+
+    Returns:
+      A dictionary with the numbers of pages ingested and failed and of chunks written,
+      skipped and deleted, and the first failures.
+    """
+    crawler = SiteCrawler(request, http_client, progress)
+    totals = {"chunks": 0, "written": 0, "skipped": 0, "deleted": 0}
+    pages_ingested = 0
+    slots = asyncio.Semaphore(max(1, settings.INGEST_EMBED_CONCURRENCY))
+
+    async def ingest_page(url: str, text: str) -> None:
+        nonlocal pages_ingested
+        try:
+            async with lock_source(url):
+                result = await store_page(url, text, vector_store, registry, pipeline)
+        except Exception as e:
+            logger.warning("Storing crawled page '%s' failed: %s", url, e)
+            crawler.failed.append({"url": url, "error": str(e)})
+            progress(pages_failed=len(crawler.failed))
+            return
+        finally:
+            slots.release()
+        for key in totals:
+            totals[key] += result[key]
+        pages_ingested += 1
+        progress(pages_ingested=pages_ingested, chunks_stored=totals["written"], chunks_skipped=totals["skipped"])
+
+    tasks = set()
+    try:
+        async for url, text in crawler.pages():
+            # Wait for a free slot before taking the next page, so the crawl can't run far ahead of storage
+            await slots.acquire()
+            task = asyncio.ensure_future(ingest_page(url, text))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        progress(stage="storing")
+        if tasks:
+            await asyncio.gather(*tasks)
+    finally:
+        for task in tasks:
+            task.cancel()
+
+    if not pages_ingested:
+        errors = "; ".join(f"{failure['url']}: {failure['error']}" for failure in crawler.failed[:3])
+        raise Exception(f"No pages could be ingested from the crawl. {errors}".strip())
+    progress(stage="done")
+    logger.info("Crawl ingested %d pages (%d failed, %d chunks written)", pages_ingested, len(crawler.failed), totals["written"])
+    return {
+        "status": "success",
+        "message": f"Crawl ingested {pages_ingested} pages.",
+        "pages": pages_ingested,
+        "pages_failed": len(crawler.failed),
+        **totals,
+        "failures": crawler.failed[:MAX_REPORTED_FAILURES],
+    }
 
 # --- Ingestion Chain Wrapper Implementation ---
 
 class IngestionChainWrapper:
     """
     Wrapper that holds ingestion functions for both documents and URLs.
-    The functions are pre-bound with the vector_store dependency.
+    The functions are pre-bound with the vector_store and http_client dependencies.
+    Listeners registered with add_listener are called after every ingestion that changed the index.
+    submit_document/submit_url run the same ingestion as a background job on `jobs`,
+    at most INGEST_MAX_CONCURRENT_JOBS at a time. Ingestions of the same source never
+    overlap, since each one compares against the chunks the previous one stored.
     """
-    def __init__(self, vector_store):
+    def __init__(self, vector_store, http_client: httpx.AsyncClient, registry: ChunkRegistry, pipeline: EmbeddingPipeline):
         self.vector_store = vector_store
+        self.http_client = http_client
+        self.registry = registry
+        self.pipeline = pipeline
+        self._listeners = []
+        self._source_locks = weakref.WeakValueDictionary()
         # Pre-bind vector_store to each ingestion function using partial
-        self.ingest_document = partial(initialize_ingest_chain_document, vector_store=vector_store)
-        self.ingest_url = partial(initialize_ingest_chain_url, vector_store=vector_store)
+        self._ingest_document = partial(initialize_ingest_chain_document, vector_store=vector_store, registry=registry, pipeline=pipeline)
+        self._ingest_url = partial(initialize_ingest_chain_url, vector_store=vector_store, registry=registry, pipeline=pipeline, http_client=http_client)
+        self._ingest_crawl = partial(
+            initialize_ingest_chain_crawl,
+            vector_store=vector_store, registry=registry, pipeline=pipeline, http_client=http_client, lock_source=self._source_lock,
+        )
+        self.jobs = JobQueue(
+            max_workers=settings.INGEST_MAX_CONCURRENT_JOBS,
+            max_queue_size=settings.INGEST_QUEUE_SIZE,
+            max_finished_jobs=settings.INGEST_JOB_HISTORY,
+            name="ingestion jobs",
+        )
+
+    def add_listener(self, callback):
+        """Register a callback invoked whenever new content has been ingested."""
+        self._listeners.append(callback)
+
+    async def _notify(self):
+        # Other workers learn of the change from the registry's content generation
+        await asyncio.to_thread(self.registry.bump_generation)
+        for callback in self._listeners:
+            callback()
+
+    def _source_lock(self, source: str) -> asyncio.Lock:
+        lock = self._source_locks.get(source)
+        if lock is None:
+            lock = self._source_locks[source] = asyncio.Lock()
+        return lock
+
+    async def ingest_document(self, path: str, filename: str, progress: ProgressFn = _no_progress) -> dict:
+        async with self._source_lock(filename):
+            with track_stage("ingestion"):
+                result = await self._ingest_document(path, filename, progress=progress)
+        if result["written"] or result["deleted"]:
+            await self._notify()
+        return result
+
+    async def ingest_url(self, url: str, progress: ProgressFn = _no_progress) -> dict:
+        async with self._source_lock(url):
+            with track_stage("ingestion"):
+                result = await self._ingest_url(url, progress=progress)
+        if result["written"] or result["deleted"]:
+            await self._notify()
+        return result
+
+    async def ingest_crawl(self, request: CrawlRequest, progress: ProgressFn = _no_progress) -> dict:
+        with track_stage("ingestion"):
+            result = await self._ingest_crawl(request, progress=progress)
+        if result["written"] or result["deleted"]:
+            await self._notify()
+        return result
+
+    async def list_sources(self) -> List[dict]:
+        """The ingested sources, from the chunk registry rather than the index."""
+        return await asyncio.to_thread(self.registry.list_sources)
+
+    async def delete_source(self, source: str) -> Optional[int]:
+        """
+        Deletes every chunk of `source` from the index, by the IDs the registry holds, in
+        concurrent batches (see delete_in_batches; one call for most sources). Returns how
+        many chunks were deleted, or None when the registry has no chunks for the source.
+        """
+        async def delete_batch(batch: List[Any]) -> int:
+            await asyncio.to_thread(self.vector_store.delete, batch)
+            return len(batch)
+
+        async with self._source_lock(source):
+            known = await asyncio.to_thread(self.registry.get, source)
+            if not known:
+                return None
+            with track_stage("deletion"):
+                deleted = await delete_in_batches(delete_batch, list(known.values()), _no_progress)
+            await asyncio.to_thread(self.registry.remove_source, source)
+        logger.info("Deleted source '%s' (%d chunks)", source, deleted)
+        await self._notify()
+        return deleted
+
+    async def forget_chunks(self, vector_ids: List[Any]) -> None:
+        """Called after chunks were deleted from the index by ID, so re-ingesting their source stores them again."""
+        await asyncio.to_thread(self.registry.remove_ids, vector_ids)
+        await self._notify()
+
+    async def forget_all(self) -> None:
+        """Called after the whole index was emptied."""
+        await asyncio.to_thread(self.registry.clear)
+        await self._notify()
+
+    def submit_delete_all(self, delete_all: Callable[[ProgressFn], Awaitable[dict]]) -> Job:
+        """
+        Queues `delete_all(progress)`, the provider's wipe of the whole index, as a background
+        job that clears the registry when it ends. Raises JobQueueFull when the queue is full.
+        """
+        async def run(job: Job) -> dict:
+            try:
+                with track_stage("deletion"):
+                    result = await delete_all(job.update)
+                job.update(stage="done")
+                return result
+            finally:
+                # Even after a partial failure: re-ingesting a source that is still stored
+                # only duplicates chunks, while skipping deleted ones would lose them
+                await self.forget_all()
+        return self.jobs.submit("delete", "all documents", run)
+
+    def submit_document(self, path: str, filename: str) -> Job:
+        """
+        Queues ingest_document for the file spooled at `path` as a background job. The file
+        is deleted when the job ends, or when the queue closes before the job has started.
+        Raises JobQueueFull when the queue is full.
+        """
+        return self.jobs.submit(
+            "document", filename, lambda job: self.ingest_document(path, filename, job.update),
+            cleanup=lambda: remove_file(path),
+        )
+
+    def submit_url(self, url: str) -> Job:
+        """Queues ingest_url as a background job. Raises JobQueueFull when the queue is full."""
+        return self.jobs.submit("url", url, lambda job: self.ingest_url(url, job.update))
+
+    def submit_crawl(self, request: CrawlRequest) -> Job:
+        """Queues ingest_crawl as a single background job. Raises JobQueueFull when the queue is full."""
+        start_urls = request.seeds + request.sitemaps
+        source = start_urls[0] + (f" (+{len(start_urls) - 1} more)" if len(start_urls) > 1 else "")
+        return self.jobs.submit("crawl", source, lambda job: self.ingest_crawl(request, job.update))
+
+    async def close(self) -> None:
+        await self.jobs.close()
+        self.registry.close()
 
-async def initialize_ingest_chain(vector_store) -> IngestionChainWrapper:
+async def initialize_ingest_chain(vector_store, http_client: httpx.AsyncClient, registry: ChunkRegistry, embeddings: Embeddings, add_embedded: AddEmbeddedFn) -> IngestionChainWrapper:
     """
-    Initializes and returns an IngestionChainWrapper with the provided vector_store.
+    Initializes and returns an IngestionChainWrapper with the provided vector_store, HTTP client
+    and chunk registry. Chunks are embedded with `embeddings` and written with `add_embedded`,
+    the vector store module's function for storing precomputed vectors.
     """
-    return IngestionChainWrapper(vector_store)
+    return IngestionChainWrapper(vector_store, http_client, registry, EmbeddingPipeline(embeddings, add_embedded))
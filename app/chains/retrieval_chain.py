@@ -0,0 +1,81 @@
+import logging
+from abc import ABC, abstractmethod
+from typing import AsyncIterator, List, Optional
+from langchain_core.prompts import ChatPromptTemplate
+from app.config import settings
+from app.utils.metrics import record_llm_usage, track_stage
+from app.utils.tracing import annotate, document_ids
+
+logger = logging.getLogger(__name__)
+
+class BaseRetrievalChain(ABC):
+    """
+    What answering a query needs, whatever the index:
+      - The embeddings used for query vectors
+      - The LLM and prompt used to answer from the retrieved context
+    Each backend's RetrievalChainWrapper implements search(); retrieval, prompting and
+    generation below are shared.
+    """
+    def __init__(self, embeddings, llm, prompt):
+        self.embeddings = embeddings
+        self.llm = llm
+        self.prompt = prompt
+
+    @abstractmethod
+    async def search(self, query: str, query_vector: List[float]) -> list:
+        """Return the context documents for the query, given its text and its vector."""
+        pass
+
+def create_answer_prompt() -> ChatPromptTemplate:
+    return ChatPromptTemplate.from_messages([
+        ("system", settings.SYSTEM_PROMPT),
+        ("human", "Question: {question}\nContext: {context}")
+    ])
+
+async def retrieve_documents(query: str, query_vector: List[float], wrapper: BaseRetrievalChain) -> list:
+    with track_stage("retrieval"):
+        docs = await wrapper.search(query, query_vector)
+        annotate(chunk_ids=document_ids(docs))
+    return docs
+
+def build_messages(query: str, docs: list, wrapper: BaseRetrievalChain) -> list:
+    # Same context layout as the "stuff" documents chain
+    context = "\n\n".join(doc.page_content for doc in docs)
+    return wrapper.prompt.format_messages(question=query, context=context)
+
+async def answer_query(query: str, wrapper: BaseRetrievalChain, query_vector: Optional[List[float]] = None) -> dict:
+    """
+    Retrieves context for the query and generates an answer with the LLM.
+    Pass query_vector to reuse an embedding the caller already computed.
+    """
+    if query_vector is None:
+        with track_stage("embedding"):
+            query_vector = await wrapper.embeddings.aembed_query(query)
+    docs = await retrieve_documents(query, query_vector, wrapper)
+    with track_stage("generation"):
+        response = await wrapper.llm.ainvoke(build_messages(query, docs, wrapper))
+        record_llm_usage("generation", response)
+    return {"query": query, "result": response.content}
+
+async def stream_answer(query: str, wrapper: BaseRetrievalChain, query_vector: Optional[List[float]] = None) -> AsyncIterator[dict]:
+    """
+    Streams the answer for a given query.
+    Yields a "retrieval" event as soon as the context documents are fetched,
+    then one "token" event per LLM chunk and a final "done" event with the full answer.
+    """
+    if query_vector is None:
+        with track_stage("embedding"):
+            query_vector = await wrapper.embeddings.aembed_query(query)
+    docs = await retrieve_documents(query, query_vector, wrapper)
+    yield {"event": "retrieval", "data": {"documents": len(docs)}}
+
+    answer = ""
+    with track_stage("generation"):
+        async for chunk in wrapper.llm.astream(build_messages(query, docs, wrapper)):
+            # With stream_usage the final chunk carries the token counts
+            record_llm_usage("generation", chunk)
+            if chunk.content:
+                answer += chunk.content
+                yield {"event": "token", "data": chunk.content}
+
+    yield {"event": "done", "data": {"result": answer}}
@@ -1,23 +1,34 @@
 import asyncio
 import logging
-from langchain.chains import RetrievalQA
-from langchain.prompts import ChatPromptTemplate
-from langchain_openai import AzureChatOpenAI
+from typing import List
 from app.config import settings
+from app.chains.retrieval_chain import BaseRetrievalChain, create_answer_prompt
 
 logger = logging.getLogger(__name__)
 
-class RetrievalChainWrapper:
+class RetrievalChainWrapper(BaseRetrievalChain):
     """
     Wrapper to hold:
-      - The RetrievalQA chain (which queries our Azure AI Search index)
+      - The retriever (which queries our Azure AI Search index)
       - The cached embeddings
+      - The LLM and prompt used to answer from the retrieved context
+    The retriever runs AzureSearch's hybrid (keyword + vector) search, which embeds the
+    query text through the cached embeddings, so the vector the caller already computed
+    is read back from the cache instead of being requested again.
     """
-    def __init__(self, chain, embeddings):
-        self.chain = chain
-        self.embeddings = embeddings
+    def __init__(self, embeddings, retriever, llm, prompt):
+        super().__init__(embeddings, llm, prompt)
+        self.retriever = retriever
+
+    async def search(self, query: str, query_vector: List[float]) -> list:
+        # hybrid, k=4 by default; AzureSearch has no search by precomputed vector
+        return await self.retriever.vectorstore.ahybrid_search(query, k=self.retriever.k, **self.retriever.search_kwargs)
+
+async def initialize_retrieval_chain(vector_store, cached_embeddings, http_client) -> RetrievalChainWrapper:
+    # langchain_openai (and the openai SDK under it) is slow to import, so it is
+    # only loaded when a provider that uses it is built
+    from langchain_openai import AzureChatOpenAI
 
-async def initialize_retrieval_chain(vector_store, cached_embeddings) -> RetrievalChainWrapper:
     logger.info("Starting chain initialization...")
     
     
@@ -35,32 +46,13 @@ async def initialize_retrieval_chain(vector_store, cached_embeddings) -> Retriev
         temperature =       settings.TEMPERATURE,
         request_timeout =   settings.REQUEST_TIMEOUT,
         api_version =       settings.AZURE_API_VERSION,
+        stream_usage =      True,
+        http_async_client = http_client,
     )
     logger.info("LLM loaded")
     
-    # 6. Create the prompt template for the RetrievalQA chain
-    prompt = ChatPromptTemplate.from_messages([
-        ("system", settings.SYSTEM_PROMPT),
-        ("human", "Question: {question}\nContext: {context}")
-    ])
+    # 6. Create the prompt template used to answer from the retrieved context
+    prompt = create_answer_prompt()
     logger.info("Prompt created")
     
-    # 7. Initialize the RetrievalQA chain using the LLM and retriever
-    chain = await asyncio.to_thread(
-        RetrievalQA.from_chain_type,
-        llm=llm,
-        chain_type="stuff",
-        retriever=retriever,
-        return_source_documents=False,
-        chain_type_kwargs={"prompt": prompt}
-    )
-    logger.info("RetrievalQA chain initialized")
-    
-    return RetrievalChainWrapper(chain, cached_embeddings)
-
-async def answer_query(query: str, wrapper: RetrievalChainWrapper) -> str:
-    """
-    Uses the RetrievalQA chain to generate an answer for a given query.
-    """
-    answer = await wrapper.chain.ainvoke(query)
-    return answer
+    return RetrievalChainWrapper(cached_embeddings, retriever, llm, prompt)
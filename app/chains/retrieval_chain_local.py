@@ -0,0 +1,109 @@
+import asyncio
+import logging
+import time
+from typing import Any, AsyncIterator, Iterator, List, Optional
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from app.config import settings
+from app.chains.retrieval_chain import BaseRetrievalChain, create_answer_prompt
+from app.chains.translation_batch import create_translation_chain
+
+logger = logging.getLogger(__name__)
+
+class StubChatModel(BaseChatModel):
+    """
+    Deterministic chat model for offline serving and load tests.
+    For RAG prompts ("Question: ...\\nContext: ...") it answers with the start of the
+    retrieved context; for anything else (e.g. translation) it echoes the input.
+    `latency` seconds are spent before the first token to mimic a remote LLM.
+    """
+    latency: float = 0.0
+    max_answer_chars: int = 400
+
+    @property
+    def _llm_type(self) -> str:
+        return "stub"
+
+    def _reply(self, messages: List[BaseMessage]) -> str:
+        content = str(messages[-1].content) if messages else ""
+        if "\nContext: " in content:
+            context = content.split("\nContext: ", 1)[1].strip()
+            if not context:
+                return "I do not have enough information from the provided context."
+            return context[: self.max_answer_chars]
+        return content
+
+    @staticmethod
+    def _usage(messages: List[BaseMessage], reply: str) -> dict:
+        # Whitespace-separated words stand in for tokens
+        input_tokens = sum(len(str(message.content).split()) for message in messages)
+        output_tokens = len(reply.split())
+        return {"input_tokens": input_tokens, "output_tokens": output_tokens, "total_tokens": input_tokens + output_tokens}
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> ChatResult:
+        if self.latency:
+            time.sleep(self.latency)
+        reply = self._reply(messages)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=reply, usage_metadata=self._usage(messages, reply)))])
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> ChatResult:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        reply = self._reply(messages)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=reply, usage_metadata=self._usage(messages, reply)))])
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        if self.latency:
+            time.sleep(self.latency)
+        reply = self._reply(messages)
+        for token in reply.split(" "):
+            yield ChatGenerationChunk(message=AIMessageChunk(content=token + " "))
+        yield ChatGenerationChunk(message=AIMessageChunk(content="", usage_metadata=self._usage(messages, reply)))
+
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        reply = self._reply(messages)
+        for token in reply.split(" "):
+            yield ChatGenerationChunk(message=AIMessageChunk(content=token + " "))
+        yield ChatGenerationChunk(message=AIMessageChunk(content="", usage_metadata=self._usage(messages, reply)))
+
+class RetrievalChainWrapper(BaseRetrievalChain):
+    """
+    Wrapper to hold:
+      - The retriever (which queries the in-process local index)
+      - The embeddings used for query vectors
+      - The LLM and prompt used to answer from the retrieved context
+    """
+    def __init__(self, embeddings, retriever, llm, prompt):
+        super().__init__(embeddings, llm, prompt)
+        self.retriever = retriever
+
+    async def search(self, query: str, query_vector: List[float]) -> list:
+        return await self.retriever.vectorstore.asimilarity_search_by_vector(query_vector, **self.retriever.search_kwargs)
+
+async def initialize_retrieval_chain(vector_store, embeddings, llm=None) -> RetrievalChainWrapper:
+    """
+    Builds the local retrieval chain. Defaults to StubChatModel so no LLM service is needed.
+    """
+    retriever = vector_store.as_retriever(search_kwargs={"k": settings.LOCAL_RETRIEVAL_K})
+    logger.info("Retriever created")
+
+    if llm is None:
+        llm = StubChatModel(latency=settings.LOCAL_LLM_LATENCY)
+    logger.info("LLM loaded")
+
+    prompt = create_answer_prompt()
+    logger.info("Prompt created")
+
+    return RetrievalChainWrapper(embeddings, retriever, llm, prompt)
+
+async def initialize_translation_chain(llm=None):
+    """
+    Translation chain for the local provider. The stub model echoes the batch payload,
+    so batched translation maps back by index exactly as with a real model.
+    """
+    if llm is None:
+        llm = StubChatModel(latency=settings.LOCAL_LLM_LATENCY)
+    return create_translation_chain(llm)
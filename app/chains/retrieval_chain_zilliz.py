@@ -1,28 +1,41 @@
 import asyncio
 import logging
 import datetime
-from langchain_openai import ChatOpenAI
-from langchain.chains import RetrievalQA
-from langchain.prompts import ChatPromptTemplate
-from langchain_milvus import Zilliz
-from langchain.docstore.document import Document
+from typing import List
 from app.config import settings
+from app.chains.retrieval_chain import BaseRetrievalChain, create_answer_prompt
+from app.utils.metrics import track_stage
+from app.utils.tracing import trace_span
+from app.utils.batched_writer import BatchedWriter
+from app.utils.lazy import AsyncLazy
 
 logger = logging.getLogger(__name__)
 
-class RetrievalChainWrapper:
+class RetrievalChainWrapper(BaseRetrievalChain):
     """
     A simple wrapper to hold:
-      - The RetrievalQA chain (which queries 'innovation_campus')
-      - A separate user_queries_vectorstore (which inserts user queries into 'user_queries')
+      - The retriever (which queries 'innovation_campus')
+      - A separate user_queries_vectorstore (which inserts user queries into 'user_queries'),
+        an AsyncLazy that connects on the first insert
       - The cached embeddings
+      - The LLM and prompt used to answer from the retrieved context
+      - A background writer that batches inserts into user_queries_vectorstore
+    The query is embedded once per request and the vector is passed explicitly to
+    both the similarity search and the user query insert.
     """
-    def __init__(self, chain, embeddings, user_queries_vectorstore):
-        self.chain = chain
-        self.embeddings = embeddings
+    def __init__(self, embeddings, user_queries_vectorstore, retriever, llm, prompt, query_log_writer):
+        super().__init__(embeddings, llm, prompt)
         self.user_queries_vectorstore = user_queries_vectorstore
+        self.query_log_writer = query_log_writer
+        self.retriever = retriever
 
-async def initialize_retrieval_chain(vector_store, cached_embeddings) -> RetrievalChainWrapper:
+    async def search(self, query: str, query_vector: List[float]) -> list:
+        return await self.retriever.vectorstore.asimilarity_search_by_vector(query_vector, **self.retriever.search_kwargs)
+
+async def initialize_retrieval_chain(vector_store, cached_embeddings, http_client) -> RetrievalChainWrapper:
+    # Deferred: both packages take about a second to import
+    from langchain_openai import ChatOpenAI
+    from langchain_milvus import Zilliz
 
     # 4. Create a retriever from that store
     retriever = vector_store.as_retriever(search_kwargs={"k": 10})
@@ -34,31 +47,19 @@ async def initialize_retrieval_chain(vector_store, cached_embeddings) -> Retriev
         model_name=settings.OPENAI_API_CHAT_MODEL_NAME,
         openai_api_key=settings.OPENAI_API_KEY,
         temperature=settings.TEMPERATURE,
-        request_timeout=settings.REQUEST_TIMEOUT
+        request_timeout=settings.REQUEST_TIMEOUT,
+        stream_usage=True,
+        http_async_client=http_client
     )
     logger.info("LLM loaded")
     
-    # 6. Create prompt
-    prompt = ChatPromptTemplate.from_messages([
-        ("system", settings.SYSTEM_PROMPT),
-        ("human", "Question: {question}\nContext: {context}")
-    ])
+    # 6. Create prompt used to answer from the retrieved context
+    prompt = create_answer_prompt()
     logger.info("Prompt created")
     
-    # 7. Initialize the RetrievalQA chain
-    chain = await asyncio.to_thread(
-        RetrievalQA.from_chain_type,
-        llm=llm,
-        chain_type="stuff",
-        retriever=retriever,
-        return_source_documents=False,
-        chain_type_kwargs={"prompt": prompt}
-    )
-    logger.info("RetrievalQA chain initialized")
-    
-    # 8. Also create a separate Zilliz vector store for storing user queries
-    #    in the "user_queries" collection
-    user_queries_vectorstore = await asyncio.to_thread(
+    # 7. Also prepare a separate Zilliz vector store for storing user queries
+    #    in the "user_queries" collection; it connects on the writer's first flush
+    user_queries_vectorstore = AsyncLazy(lambda: asyncio.to_thread(
         Zilliz,
         embedding_function=cached_embeddings,
         collection_name=settings.ZILLIZ_USER_QUERIES_COLLECTION_NAME,  # <--- we insert user queries here
@@ -79,30 +80,41 @@ async def initialize_retrieval_chain(vector_store, cached_embeddings) -> Retriev
         vector_field="vector",
         auto_id=True,
         drop_old=False
+    ), name="Zilliz user_queries store")
+
+    # 8. Start the background writer that batches user query inserts off the response path
+    async def insert_user_queries(items: list):
+        # Vectors were computed for retrieval already, so insert them as-is instead of re-embedding
+        with track_stage("query_log"):
+            store = await user_queries_vectorstore.get()
+            await asyncio.to_thread(
+                store.add_embeddings,
+                texts=[item["text"] for item in items],
+                embeddings=[item["vector"] for item in items],
+                metadatas=[{"timestamp": item["timestamp"]} for item in items],
+            )
+
+    query_log_writer = BatchedWriter(
+        insert_user_queries,
+        max_queue_size=settings.USER_QUERY_LOG_QUEUE_SIZE,
+        batch_size=settings.USER_QUERY_LOG_BATCH_SIZE,
+        flush_interval=settings.USER_QUERY_LOG_FLUSH_INTERVAL,
+        spill_path=settings.USER_QUERY_LOG_SPILL_PATH or None,
+        name="user_queries writer",
     )
-    logger.info("Connected to Zilliz for user queries insertion")
+    query_log_writer.start()
     
-    # 9. Return the wrapper with chain + cached embeddings + user_queries store
-    return RetrievalChainWrapper(chain, cached_embeddings, user_queries_vectorstore)
+    # 9. Return the wrapper with retriever + cached embeddings + user_queries store
+    return RetrievalChainWrapper(cached_embeddings, user_queries_vectorstore, retriever, llm, prompt, query_log_writer)
 
-async def answer_and_store(query: str, wrapper: RetrievalChainWrapper) -> str:
+async def store_user_query(query: str, wrapper: RetrievalChainWrapper, query_vector: List[float]) -> None:
     """
-    1) Use the wrapper.chain (which retrieves from 'COLLECTION_NAME') to get the answer.
-    2) Insert the user's query into the 'user_queries' collection (so we can see them in Zilliz Cloud).
+    Queues the user's query for insertion into the 'user_queries' collection.
+    The insert happens in the background with the given vector, so this never waits on embedding or Zilliz.
     """
-    # a) Let the chain generate an answer
-    #    (We can use chain.ainvoke instead of chain.arun to avoid the deprecation warning.)
-    answer = await wrapper.chain.ainvoke(query)
-
-    # b) Create a Document for the user query
-    doc = Document(
-        page_content=query,  # goes to 'text' field
-        metadata={
+    with trace_span("query_log"):
+        wrapper.query_log_writer.submit({
+            "text": query,  # goes to 'text' field
+            "vector": list(query_vector),
             "timestamp": int(datetime.datetime.now().timestamp()),
-        }
-    )
-
-    # c) Insert the Document into the 'user_queries' store
-    await asyncio.to_thread(wrapper.user_queries_vectorstore.add_documents, [doc])
-
-    return answer
+        })
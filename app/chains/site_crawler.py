@@ -0,0 +1,252 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import urldefrag, urljoin, urlsplit
+from urllib.robotparser import RobotFileParser
+import httpx
+from app.config import settings
+from app.utils.process_pool import run_in_process
+
+logger = logging.getLogger(__name__)
+
+# Nested sitemap indexes followed below a sitemap given to the crawl
+MAX_SITEMAP_DEPTH = 3
+# Redirects followed per fetch; each target is checked before it is requested
+MAX_REDIRECTS = 5
+
+# The synchronous parsers below run in the process pool (run_in_process), so they
+# must stay module-level and take plain data.
+
+def parse_page(html: str, base_url: str) -> Tuple[str, List[str]]:
+    """The page's text and the absolute URLs of its links, without fragments."""
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, 'html.parser')
+    links = []
+    for a in soup.find_all("a", href=True):
+        url, _ = urldefrag(urljoin(base_url, a["href"].strip()))
+        links.append(url)
+    return soup.get_text(separator="\n"), links
+
+def parse_sitemap(xml: str) -> Tuple[List[str], List[str]]:
+    """The page URLs and the nested sitemap URLs listed in a sitemap or sitemap index."""
+    import xml.etree.ElementTree as ElementTree
+
+    root = ElementTree.fromstring(xml)
+    pages, sitemaps = [], []
+    for loc in root.iter():
+        # Tags carry the sitemap namespace, e.g. {http://www.sitemaps.org/schemas/sitemap/0.9}loc
+        if loc.tag.rsplit("}", 1)[-1] != "loc" or not loc.text:
+            continue
+        if root.tag.rsplit("}", 1)[-1] == "sitemapindex":
+            sitemaps.append(loc.text.strip())
+        else:
+            pages.append(loc.text.strip())
+    return pages, sitemaps
+
+@dataclass
+class CrawlScope:
+    """
+    Which URLs a crawl may fetch: http(s) URLs on one of `hosts` whose path starts with one
+    of `path_prefixes`. Hosts default to those of the seed and sitemap URLs.
+    """
+    hosts: Sequence[str]
+    path_prefixes: Sequence[str] = ("/",)
+
+    def allows_host(self, url: str) -> bool:
+        parts = urlsplit(url)
+        return parts.scheme in ("http", "https") and (parts.hostname or "") in self.hosts
+
+    def allows(self, url: str) -> bool:
+        return self.allows_host(url) and any((urlsplit(url).path or "/").startswith(prefix) for prefix in self.path_prefixes)
+
+@dataclass
+class CrawlRequest:
+    seeds: List[str] = field(default_factory=list)
+    sitemaps: List[str] = field(default_factory=list)
+    hosts: List[str] = field(default_factory=list)
+    path_prefixes: List[str] = field(default_factory=lambda: ["/"])
+    max_depth: int = field(default_factory=lambda: settings.CRAWL_MAX_DEPTH)
+    max_pages: int = field(default_factory=lambda: settings.CRAWL_MAX_PAGES)
+
+    def scope(self) -> CrawlScope:
+        hosts = self.hosts or [urlsplit(url).hostname for url in self.seeds + self.sitemaps]
+        return CrawlScope(hosts=[host.lower() for host in hosts if host], path_prefixes=self.path_prefixes or ["/"])
+
+class HostThrottle:
+    """
+    Politeness per host: at most `concurrency` requests in flight to a host, and request
+    starts to the same host at least `delay` seconds apart.
+    """
+    def __init__(self, concurrency: int, delay: float):
+        self.concurrency = max(1, concurrency)
+        self.delay = delay
+        self._hosts: Dict[str, Tuple[asyncio.Semaphore, asyncio.Lock, List[float]]] = {}
+
+    @asynccontextmanager
+    async def slot(self, host: str):
+        if host not in self._hosts:
+            self._hosts[host] = (asyncio.Semaphore(self.concurrency), asyncio.Lock(), [0.0])
+        semaphore, lock, next_start = self._hosts[host]
+        async with semaphore:
+            async with lock:
+                loop = asyncio.get_running_loop()
+                wait = next_start[0] - loop.time()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+                next_start[0] = loop.time() + self.delay
+            yield
+
+class SiteCrawler:
+    """
+    Breadth-first crawl of the pages in `request`'s scope, starting from its seed URLs and
+    the pages listed in its sitemaps (both at depth 0), down to its max_depth of links and
+    at most its max_pages pages.
+    Up to CRAWL_CONCURRENCY pages are fetched at once over the provider's pooled keep-alive
+    HTTP client, at most CRAWL_PER_HOST_CONCURRENCY per host and CRAWL_HOST_DELAY seconds
+    apart, honouring robots.txt unless CRAWL_RESPECT_ROBOTS is off. Redirects are followed
+    only to URLs the crawl could fetch anyway (robots.txt and sitemaps: to the crawl's hosts).
+    Only HTML pages of up to CRAWL_MAX_PAGE_BYTES are kept; parsing runs in the process pool.
+    pages() yields (url, text) for each page as soon as it is parsed; fetching pauses while
+    a few parsed pages wait for the caller.
+    """
+    def __init__(self, request: CrawlRequest, http_client: httpx.AsyncClient, progress: Callable[..., None]):
+        self.request = request
+        self.scope = request.scope()
+        self.http_client = http_client
+        self.progress = progress
+        self.throttle = HostThrottle(settings.CRAWL_PER_HOST_CONCURRENCY, settings.CRAWL_HOST_DELAY)
+        self.headers = {"User-Agent": settings.CRAWL_USER_AGENT}
+        self._robots: Dict[str, asyncio.Future] = {}
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._seen = set()
+        self.pages_fetched = 0
+        self.failed: List[dict] = []
+
+    def _enqueue(self, url: str, depth: int) -> None:
+        if url in self._seen or len(self._seen) >= self.request.max_pages or not self.scope.allows(url):
+            return
+        self._seen.add(url)
+        self._queue.put_nowait((url, depth))
+        self.progress(pages_queued=len(self._seen))
+
+    async def _get(self, url: str, may_follow: Callable[[str], Awaitable[bool]]) -> httpx.Response:
+        """
+        GETs the URL, following up to MAX_REDIRECTS redirects here rather than in the client:
+        a redirect target is only requested if `may_follow` allows it, so an in-scope page
+        cannot lead the crawl to another host or an internal address.
+        """
+        for _ in range(MAX_REDIRECTS + 1):
+            async with self.throttle.slot(urlsplit(url).hostname or ""):
+                response = await self.http_client.get(url, headers=self.headers, follow_redirects=False)
+            if not response.is_redirect:
+                response.raise_for_status()
+                return response
+            location = urldefrag(urljoin(url, response.headers["location"]))[0]
+            if not await may_follow(location):
+                raise ValueError(f"Redirect to '{location}' is outside the crawl's scope or disallowed by robots.txt")
+            url = location
+        raise ValueError(f"More than {MAX_REDIRECTS} redirects")
+
+    async def _on_scope_host(self, url: str) -> bool:
+        return self.scope.allows_host(url)
+
+    async def _may_fetch(self, url: str) -> bool:
+        return self.scope.allows(url) and await self._allowed_by_robots(url)
+
+    async def _allowed_by_robots(self, url: str) -> bool:
+        if not settings.CRAWL_RESPECT_ROBOTS:
+            return True
+        parts = urlsplit(url)
+        origin = f"{parts.scheme}://{parts.netloc}"
+        if origin not in self._robots:
+            self._robots[origin] = asyncio.ensure_future(self._load_robots(origin))
+        robots = await self._robots[origin]
+        return robots is None or robots.can_fetch(settings.CRAWL_USER_AGENT, url)
+
+    async def _load_robots(self, origin: str) -> Optional[RobotFileParser]:
+        try:
+            response = await self._get(f"{origin}/robots.txt", self._on_scope_host)
+        except Exception:
+            # No robots.txt (or none reachable) allows everything
+            return None
+        robots = RobotFileParser()
+        robots.parse(response.text.splitlines())
+        return robots
+
+    async def _load_sitemap(self, url: str, level: int = 0) -> None:
+        try:
+            response = await self._get(url, self._on_scope_host)
+            pages, sitemaps = await run_in_process(parse_sitemap, response.text)
+        except Exception as e:
+            logger.warning("Could not read sitemap '%s': %s", url, e)
+            self.failed.append({"url": url, "error": str(e)})
+            return
+        for page in pages:
+            self._enqueue(page, 0)
+        if level < MAX_SITEMAP_DEPTH:
+            for sitemap in sitemaps:
+                if self.scope.allows_host(sitemap):
+                    await self._load_sitemap(sitemap, level + 1)
+
+    async def _fetch(self, url: str, depth: int) -> Optional[str]:
+        """The page's text, after queueing its in-scope links; None when it isn't an HTML page."""
+        if not await self._allowed_by_robots(url):
+            logger.info("Skipping '%s': disallowed by robots.txt", url)
+            return None
+        response = await self._get(url, self._may_fetch)
+        if not self.scope.allows(str(response.url)):
+            raise ValueError(f"Final URL '{response.url}' is outside the crawl's scope")
+        if "html" not in response.headers.get("content-type", "text/html"):
+            return None
+        if len(response.content) > settings.CRAWL_MAX_PAGE_BYTES:
+            raise ValueError(f"Page exceeds {settings.CRAWL_MAX_PAGE_BYTES} bytes")
+        # Links are resolved against the final URL, after redirects
+        text, links = await run_in_process(parse_page, response.text, str(response.url))
+        self.pages_fetched += 1
+        self.progress(pages_fetched=self.pages_fetched)
+        if depth < self.request.max_depth:
+            for link in links:
+                self._enqueue(link, depth + 1)
+        return text
+
+    async def _worker(self, pages: asyncio.Queue) -> None:
+        while True:
+            url, depth = await self._queue.get()
+            try:
+                text = await self._fetch(url, depth)
+                if text is not None and text.strip():
+                    await pages.put((url, text))
+            except Exception as e:
+                logger.warning("Crawl of '%s' failed: %s", url, e)
+                self.failed.append({"url": url, "error": str(e)})
+                self.progress(pages_failed=len(self.failed))
+            finally:
+                self._queue.task_done()
+
+    async def pages(self) -> AsyncIterator[Tuple[str, str]]:
+        self.progress(stage="crawling", pages_queued=0, pages_fetched=0, pages_failed=0)
+        for sitemap in self.request.sitemaps:
+            await self._load_sitemap(sitemap)
+        for seed in self.request.seeds:
+            self._enqueue(urldefrag(seed)[0], 0)
+
+        pages: asyncio.Queue = asyncio.Queue(maxsize=max(1, settings.CRAWL_CONCURRENCY))
+        workers = [asyncio.ensure_future(self._worker(pages)) for _ in range(max(1, settings.CRAWL_CONCURRENCY))]
+        crawled = asyncio.ensure_future(self._queue.join())
+        try:
+            while True:
+                get = asyncio.ensure_future(pages.get())
+                await asyncio.wait([get, crawled], return_when=asyncio.FIRST_COMPLETED)
+                if not get.done():
+                    get.cancel()
+                    break
+                yield get.result()
+            # Pages parsed after the last get
+            while not pages.empty():
+                yield pages.get_nowait()
+        finally:
+            for task in workers + [crawled] + list(self._robots.values()):
+                task.cancel()
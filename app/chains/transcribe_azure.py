@@ -1,13 +1,39 @@
 import io
 import asyncio
 import logging
+from typing import TYPE_CHECKING
 from fastapi import UploadFile
-import azure.cognitiveservices.speech as speechsdk
 from app.config import settings
 
+if TYPE_CHECKING:
+    import azure.cognitiveservices.speech as speechsdk
+
 logger = logging.getLogger(__name__)
 
+_speech_config = None
+
+def get_speech_config() -> "speechsdk.SpeechConfig":
+    """
+    Returns the Azure Speech config, created on the first transcription and reused afterwards.
+    """
+    global _speech_config
+    if _speech_config is None:
+        import azure.cognitiveservices.speech as speechsdk
+
+        # Configure Azure Speech SDK with custom endpoint and key.
+        speech_config = speechsdk.SpeechConfig(
+            subscription=settings.AZURE_SPEECH_API_KEY,
+            endpoint=settings.AZURE_SPEECH_ENDPOINT
+        )
+        # Set the recognition language to English.
+        speech_config.speech_recognition_language = "en-US"
+        _speech_config = speech_config
+    return _speech_config
+
 async def transcribe(self, file: "UploadFile") -> str:
+    # The Speech SDK loads a native library, so it is only imported once audio arrives
+    import azure.cognitiveservices.speech as speechsdk
+
     # Read the uploaded WAV file.
     try:
         wav_bytes = await file.read()
@@ -26,14 +52,7 @@ async def transcribe(self, file: "UploadFile") -> str:
         logger.error(f"Error creating push audio stream: {e}")
         raise e
 
-    # Configure Azure Speech SDK with custom endpoint and key.
-    speech_config = speechsdk.SpeechConfig(
-        subscription=settings.AZURE_SPEECH_API_KEY,
-        endpoint=settings.AZURE_SPEECH_ENDPOINT
-    )
-    # Set the recognition language to English.
-    speech_config.speech_recognition_language = "en-US"
-
+    speech_config = get_speech_config()
     audio_config = speechsdk.audio.AudioConfig(stream=push_stream)
     speech_recognizer = speechsdk.SpeechRecognizer(
         speech_config=speech_config,
@@ -1,6 +1,5 @@
 import os
 import tempfile
-import aiofiles
 from fastapi import UploadFile
 import logging
 
@@ -27,6 +26,8 @@ async def transcribe(self, file: "UploadFile") -> str:
         logger.error(f"Error creating temporary file: {e}")
         raise e
 
+    import aiofiles
+
     try:
         async with aiofiles.open(temp_path, 'wb') as out_file:
             await out_file.write(contents)
@@ -38,7 +39,7 @@ async def transcribe(self, file: "UploadFile") -> str:
     try:
         with open(temp_path, "rb") as audio:
             logger.info("Sending audio file for transcription")
-            transcript = self.client.audio.transcriptions.create(
+            transcript = await self.client.audio.transcriptions.create(
                 model="whisper-1",
                 file=audio
             )
@@ -0,0 +1,143 @@
+import json
+import asyncio
+import logging
+from typing import List, Optional
+from langchain_core.prompts import ChatPromptTemplate
+from app.config import settings
+from app.utils.metrics import record_llm_usage
+from app.utils.tokens import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+# JSON keys and punctuation around each item in the batch payload
+ITEM_OVERHEAD_TOKENS = 10
+
+SINGLE_PROMPT = ChatPromptTemplate.from_messages([
+    (
+        "system",
+        "Translate the following text to {target_lang}. Provide only the translation."
+    ),
+    ("human", "{faq}")
+])
+
+# The reply has the same shape as the request, so results map back by index
+BATCH_PROMPT = ChatPromptTemplate.from_messages([
+    (
+        "system",
+        "Translate FAQ headings to {target_lang}. The user sends a JSON object of the form "
+        "{{\"translations\": [{{\"index\": 0, \"text\": \"...\"}}]}}. Reply with the same JSON object: "
+        "keep every index and replace each text with its translation. Provide only the JSON."
+    ),
+    ("human", "{payload}")
+])
+
+class TranslationChainWrapper:
+    """
+    Wrapper to hold:
+      - The LLM used for translation
+      - The per-text chain (SINGLE_PROMPT | llm)
+      - The batch chain (BATCH_PROMPT | llm in JSON mode), which translates many texts in one call
+    translate() splits the texts into batches of at most `max_batch_tokens` estimated input
+    tokens and `max_batch_items` texts, runs the batches concurrently and maps the results back
+    by index. Texts missing from a batch reply, or from a batch that failed, fall back to the
+    per-text chain.
+    """
+    def __init__(self, llm, batch_enabled: bool = True, max_batch_tokens: int = 2000, max_batch_items: int = 50, json_mode: bool = True):
+        self.llm = llm
+        self.chain = SINGLE_PROMPT | llm
+        batch_llm = llm.bind(response_format={"type": "json_object"}) if json_mode else llm
+        self.batch_chain = BATCH_PROMPT | batch_llm
+        self.batch_enabled = batch_enabled
+        self.max_batch_tokens = max_batch_tokens
+        self.max_batch_items = max_batch_items
+
+    async def ainvoke(self, inputs: dict, **kwargs):
+        """Translates a single text ({"faq": ..., "target_lang": ...}), like the plain prompt | llm chain."""
+        return await self.chain.ainvoke(inputs, **kwargs)
+
+    def split_batches(self, texts: List[str]) -> List[List[int]]:
+        """Groups text indexes into batches that fit the token and item budgets."""
+        batches, current, current_tokens = [], [], 0
+        for index, text in enumerate(texts):
+            tokens = estimate_tokens(text) + ITEM_OVERHEAD_TOKENS
+            if current and (current_tokens + tokens > self.max_batch_tokens or len(current) >= self.max_batch_items):
+                batches.append(current)
+                current, current_tokens = [], 0
+            current.append(index)
+            current_tokens += tokens
+        if current:
+            batches.append(current)
+        return batches
+
+    async def translate(self, texts: List[str], target_lang: str) -> List[str]:
+        """
+        Returns one translation per text, in order.
+        """
+        if not texts:
+            return []
+        if not self.batch_enabled:
+            return list(await asyncio.gather(*(self._translate_one(text, target_lang) for text in texts)))
+
+        batches = self.split_batches(texts)
+        replies = await asyncio.gather(*(self._translate_batch(texts, batch, target_lang) for batch in batches))
+        results: List[Optional[str]] = [None] * len(texts)
+        for reply in replies:
+            for index, translation in reply.items():
+                results[index] = translation
+
+        missing = [index for index, translation in enumerate(results) if translation is None]
+        if missing:
+            logger.warning("Batch translation missed %d of %d texts; translating them one by one", len(missing), len(texts))
+            fallbacks = await asyncio.gather(*(self._translate_one(texts[index], target_lang) for index in missing))
+            for index, translation in zip(missing, fallbacks):
+                results[index] = translation
+        logger.info("Translated %d texts to %s in %d batch call(s) and %d single call(s)", len(texts), target_lang, len(batches), len(missing))
+        return results
+
+    async def _translate_one(self, text: str, target_lang: str) -> str:
+        result = await self.chain.ainvoke({"faq": text, "target_lang": target_lang})
+        record_llm_usage("translation", result)
+        return result.content if hasattr(result, "content") else str(result)
+
+    async def _translate_batch(self, texts: List[str], batch: List[int], target_lang: str) -> dict:
+        """
+        Translates the texts at the `batch` indexes in one call. Returns {index: translation}
+        for the items the reply contained; a failed call returns {} so every item falls back.
+        """
+        payload = json.dumps(
+            {"translations": [{"index": index, "text": texts[index]} for index in batch]},
+            ensure_ascii=False,
+        )
+        try:
+            result = await self.batch_chain.ainvoke({"payload": payload, "target_lang": target_lang})
+        except Exception as e:
+            logger.warning("Batch translation call for %d texts failed: %s", len(batch), e)
+            return {}
+        record_llm_usage("translation", result)
+        try:
+            items = json.loads(result.content)["translations"]
+        except (ValueError, KeyError, TypeError) as e:
+            logger.warning("Could not parse batch translation reply: %s", e)
+            return {}
+
+        wanted = set(batch)
+        translations = {}
+        for item in items if isinstance(items, list) else []:
+            if not isinstance(item, dict):
+                continue
+            index, text = item.get("index"), item.get("text")
+            if index in wanted and isinstance(text, str) and text.strip():
+                translations[index] = text
+        return translations
+
+def create_translation_chain(llm, json_mode: bool = True) -> TranslationChainWrapper:
+    """
+    Wraps `llm` for FAQ translation using the TRANSLATION_BATCH_* settings.
+    """
+    return TranslationChainWrapper(
+        llm,
+        batch_enabled=settings.TRANSLATION_BATCH_ENABLED,
+        max_batch_tokens=settings.TRANSLATION_BATCH_MAX_TOKENS,
+        max_batch_items=settings.TRANSLATION_BATCH_MAX_ITEMS,
+        json_mode=json_mode,
+    )
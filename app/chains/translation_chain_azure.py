@@ -1,16 +1,18 @@
 import asyncio
 import logging
-from langchain_openai import AzureChatOpenAI
-from langchain.prompts import ChatPromptTemplate
 from app.config import settings
+from app.chains.translation_batch import create_translation_chain
 
 logger = logging.getLogger(__name__)
 
-async def initialize_translation_chain():
+async def initialize_translation_chain(http_client):
     """
-    Initializes a translation chain using the new RunnableSequence style.
-    This chain is composed by piping a prompt template into the LLM.
+    Initializes the FAQ translation chain. The returned TranslationChainWrapper
+    translates a whole list of texts in a few batched calls (translate) and still
+    supports single-text ainvoke.
     """
+    from langchain_openai import AzureChatOpenAI
+
     logger.info("Starting translation chain initialization...")
     
     # Initialize LLM for translation
@@ -23,22 +25,12 @@ async def initialize_translation_chain():
         temperature =       settings.TEMPERATURE,
         request_timeout =   settings.REQUEST_TIMEOUT,
         api_version =       settings.AZURE_API_VERSION,
+        http_async_client = http_client,
     )
     logger.info("LLM loaded for translation")
     
-    # Create prompt template for translation
-    prompt = ChatPromptTemplate.from_messages([
-        (
-            "system",
-            "Translate the following text to {target_lang}. Provide only the translation."
-        ),
-        ("human", "{faq}")
-    ])
-    logger.info("Prompt created for translation chain")
-    
-    # Compose the translation chain using the new style: prompt | llm
-    # This creates a pipeline where the prompt processes the input and passes it to the LLM.
-    translation_chain = prompt | llm
-    logger.info("Translation chain initialized using RunnableSequence (prompt | llm)")
+    # Per-text and batched (JSON mode) translation over the same LLM; see translation_batch.py
+    translation_chain = create_translation_chain(llm)
+    logger.info("Translation chain initialized (batching %s)", "enabled" if translation_chain.batch_enabled else "disabled")
     
     return translation_chain
@@ -1,24 +1,40 @@
-from langchain.embeddings import CacheBackedEmbeddings
-from langchain_openai import AzureOpenAIEmbeddings
-from langchain.storage import InMemoryByteStore
-from langchain_community.vectorstores import AzureSearch
 import asyncio
 from app.config import settings
+from app.utils.embedding_cache import create_embedding_cache, create_cached_embeddings
 import logging
 
 logger = logging.getLogger(__name__)
 
-async def initialize_vector_store_azure():
+async def initialize_vector_store_azure(http_client):
+    # Imported on first use to keep app startup light when this tenant is disabled
+    from langchain_openai import AzureOpenAIEmbeddings
+    from langchain_community.vectorstores import AzureSearch
+
     # 1. Create the underlying embeddings model using Azure OpenAI
-    embeddings = AzureOpenAIEmbeddings(
+    embedding_args = dict(
         azure_endpoint=settings.AZURE_OPENAI_ENDPOINT,
         api_key=settings.AZURE_OPENAI_API_KEY,  
         deployment=settings.OPENAI_API_EMBEDDING_MODEL_NAME,
+        dimensions=settings.OPENAI_API_EMBEDDING_DIMENSIONS,
+        http_async_client=http_client,
     )
+    embeddings = AzureOpenAIEmbeddings(**embedding_args)
 
-    # 2. Set up an in-memory byte store and create a cached embeddings function
-    byte_store = InMemoryByteStore()
-    cached_embeddings = CacheBackedEmbeddings(embeddings, byte_store)
+    # 2. Set up the embedding cache backend and create a cached embeddings function
+    #    (caches both document and query embeddings, keyed by model and dimension)
+    embedding_cache = create_embedding_cache(
+        settings.EMBEDDING_CACHE_BACKEND,
+        settings.EMBEDDING_CACHE_PATH,
+        settings.EMBEDDING_CACHE_MAX_ENTRIES,
+    )
+    cache_args = dict(
+        model_name=f"azure/{settings.OPENAI_API_EMBEDDING_MODEL_NAME}",
+        dimensions=settings.OPENAI_API_EMBEDDING_DIMENSIONS,
+    )
+    cached_embeddings = create_cached_embeddings(embeddings, embedding_cache, **cache_args)
+    # Ingestion (EmbeddingPipeline) retries rate-limited batches itself, under its token
+    # limiter, so its client must not retry them as well; it shares the same cache
+    ingest_embeddings = create_cached_embeddings(AzureOpenAIEmbeddings(**embedding_args, max_retries=0), embedding_cache, **cache_args)
     logger.info("Cached embeddings initialized")
 
     # 3. Create an Azure AI Search vector store (index) for retrieval
@@ -28,7 +44,12 @@ async def initialize_vector_store_azure():
         azure_search_endpoint=settings.AZURE_AI_SEARCH_ENDPOINT,
         azure_search_key=settings.AZURE_AI_SEARCH_API_KEY,
         index_name=settings.AZURE_INDEX_NAME,
-        embedding_function=cached_embeddings.embed_query,
+        # The Embeddings object (not just its embed_query) lets async searches use aembed_query
+        embedding_function=cached_embeddings,
     )
 
-    return vector_store, cached_embeddings
\ No newline at end of file
+    return vector_store, cached_embeddings, ingest_embeddings, embedding_cache
+
+def add_embedded_documents_azure(vector_store, docs, vectors):
+    """Uploads `docs` with their precomputed `vectors`, so they are not embedded again."""
+    return vector_store.add_embeddings(zip([doc.page_content for doc in docs], vectors), [doc.metadata for doc in docs])
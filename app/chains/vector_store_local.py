@@ -0,0 +1,217 @@
+import os
+import re
+import json
+import uuid
+import hashlib
+import asyncio
+import logging
+import threading
+from typing import Any, Iterable, List, Optional, Tuple
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+class HashEmbeddings(Embeddings):
+    """
+    Deterministic local embeddings using the hashing trick: every lowercase word
+    is hashed into one of `dimensions` buckets with a hash-derived sign, and the
+    result is L2-normalized. No network calls, so it is suitable for offline
+    serving and load tests; texts sharing words get similar vectors.
+    """
+    def __init__(self, dimensions: int):
+        self.dimensions = dimensions
+
+    def _embed(self, text: str) -> List[float]:
+        vector = np.zeros(self.dimensions, dtype=np.float32)
+        for token in re.findall(r"\w+", text.lower()):
+            digest = int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "little")
+            vector[digest % self.dimensions] += 1.0 if (digest >> 63) & 1 else -1.0
+        norm = np.linalg.norm(vector)
+        if norm:
+            vector /= norm
+        return vector.tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed(text)
+
+class LocalVectorStore(VectorStore):
+    """
+    In-process vector store backed by a NumPy matrix with brute-force cosine search.
+    Vectors are persisted to `<directory>/vectors.npy` (memory-mapped on load) and
+    chunk texts/metadata to `<directory>/docs.jsonl`. Writes replace both files atomically.
+    """
+    def __init__(self, embedding: Embeddings, directory: Optional[str] = None):
+        self.embedding = embedding
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._vectors = None  # (N x D) float32, rows L2-normalized
+        self._ids: List[str] = []
+        self._docs: List[Document] = []
+        if directory:
+            self._load()
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self.embedding
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    @property
+    def ids(self) -> List[str]:
+        return list(self._ids)
+
+    # -- persistence -------------------------------------------------
+
+    def _paths(self) -> Tuple[str, str]:
+        return os.path.join(self.directory, "vectors.npy"), os.path.join(self.directory, "docs.jsonl")
+
+    def _load(self):
+        vectors_path, docs_path = self._paths()
+        if not (os.path.exists(vectors_path) and os.path.exists(docs_path)):
+            return
+        self._vectors = np.load(vectors_path, mmap_mode="r")
+        with open(docs_path, encoding="utf-8") as f:
+            for line in f:
+                record = json.loads(line)
+                self._ids.append(record["id"])
+                self._docs.append(Document(id=record["id"], page_content=record["text"], metadata=record["metadata"]))
+        if not self._ids:
+            self._vectors = None
+        logger.info("Loaded %d chunks from local index at %s", len(self._ids), self.directory)
+
+    def _save(self, vectors: np.ndarray, ids: List[str], docs: List[Document]):
+        if not self.directory:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        vectors_path, docs_path = self._paths()
+        with open(vectors_path + ".tmp", "wb") as f:
+            np.save(f, vectors)
+        with open(docs_path + ".tmp", "w", encoding="utf-8") as f:
+            for doc_id, doc in zip(ids, docs):
+                f.write(json.dumps({"id": doc_id, "text": doc.page_content, "metadata": doc.metadata}) + "\n")
+        os.replace(vectors_path + ".tmp", vectors_path)
+        os.replace(docs_path + ".tmp", docs_path)
+
+    # -- writes ------------------------------------------------------
+
+    @staticmethod
+    def _normalize(vectors) -> np.ndarray:
+        matrix = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return matrix / norms
+
+    def add_embeddings(
+        self,
+        texts: List[str],
+        embeddings: List[List[float]],
+        metadatas: Optional[List[dict]] = None,
+        ids: Optional[List[str]] = None,
+    ) -> List[str]:
+        if not texts:
+            return []
+        metadatas = metadatas or [{} for _ in texts]
+        ids = [doc_id or str(uuid.uuid4()) for doc_id in (ids or [None] * len(texts))]
+        new_vectors = self._normalize(embeddings)
+        new_docs = [Document(id=doc_id, page_content=text, metadata=metadata) for doc_id, text, metadata in zip(ids, texts, metadatas)]
+        with self._lock:
+            vectors = new_vectors if self._vectors is None else np.vstack([self._vectors, new_vectors])
+            all_ids = self._ids + ids
+            all_docs = self._docs + new_docs
+            self._save(vectors, all_ids, all_docs)
+            self._vectors, self._ids, self._docs = vectors, all_ids, all_docs
+        return ids
+
+    def add_texts(
+        self,
+        texts: Iterable[str],
+        metadatas: Optional[List[dict]] = None,
+        *,
+        ids: Optional[List[str]] = None,
+        **kwargs: Any,
+    ) -> List[str]:
+        texts = list(texts)
+        return self.add_embeddings(texts, self.embedding.embed_documents(texts), metadatas, ids)
+
+    def delete(self, ids: Optional[List[str]] = None, **kwargs: Any) -> Optional[bool]:
+        if not ids:
+            return False
+        to_delete = set(ids)
+        with self._lock:
+            keep = [i for i, doc_id in enumerate(self._ids) if doc_id not in to_delete]
+            if len(keep) == len(self._ids):
+                return False
+            vectors = np.asarray(self._vectors)[keep] if keep else None
+            kept_ids = [self._ids[i] for i in keep]
+            kept_docs = [self._docs[i] for i in keep]
+            if vectors is None:
+                vectors = np.zeros((0, 0), dtype=np.float32)
+            self._save(vectors, kept_ids, kept_docs)
+            self._vectors = vectors if kept_ids else None
+            self._ids, self._docs = kept_ids, kept_docs
+        return True
+
+    # -- search ------------------------------------------------------
+
+    def similarity_search_with_score_by_vector(self, embedding: List[float], k: int = 4, **kwargs: Any) -> List[Tuple[Document, float]]:
+        with self._lock:
+            vectors, docs = self._vectors, self._docs
+        if vectors is None or not docs:
+            return []
+        query = self._normalize(embedding)[0]
+        scores = vectors @ query
+        k = min(k, len(docs))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(docs[i], float(scores[i])) for i in top]
+
+    def similarity_search_by_vector(self, embedding: List[float], k: int = 4, **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score_by_vector(embedding, k, **kwargs)]
+
+    async def asimilarity_search_by_vector(self, embedding: List[float], k: int = 4, **kwargs: Any) -> List[Document]:
+        # The matrix product releases the GIL, so large indexes don't stall the event loop
+        return await asyncio.to_thread(self.similarity_search_by_vector, embedding, k, **kwargs)
+
+    def similarity_search(self, query: str, k: int = 4, **kwargs: Any) -> List[Document]:
+        return self.similarity_search_by_vector(self.embedding.embed_query(query), k, **kwargs)
+
+    def _select_relevance_score_fn(self):
+        return lambda score: score
+
+    @classmethod
+    def from_texts(
+        cls,
+        texts: List[str],
+        embedding: Embeddings,
+        metadatas: Optional[List[dict]] = None,
+        *,
+        ids: Optional[List[str]] = None,
+        directory: Optional[str] = None,
+        **kwargs: Any,
+    ) -> "LocalVectorStore":
+        store = cls(embedding, directory)
+        store.add_texts(texts, metadatas, ids=ids)
+        return store
+
+async def initialize_vector_store_local(tenant: str, embeddings: Optional[Embeddings] = None):
+    """
+    Creates (or reloads) the local index for a tenant under settings.LOCAL_INDEX_DIR.
+    Defaults to deterministic HashEmbeddings so no embedding service is needed.
+    """
+    if embeddings is None:
+        embeddings = HashEmbeddings(settings.LOCAL_EMBEDDING_DIMENSIONS)
+    directory = os.path.join(settings.LOCAL_INDEX_DIR, tenant)
+    vector_store = await asyncio.to_thread(LocalVectorStore, embeddings, directory)
+    logger.info("Local vector store initialized at %s", directory)
+    return vector_store, embeddings
+
+def add_embedded_documents_local(vector_store: LocalVectorStore, docs: List[Document], vectors: List[List[float]]) -> List[str]:
+    return vector_store.add_embeddings([doc.page_content for doc in docs], vectors, [doc.metadata for doc in docs])
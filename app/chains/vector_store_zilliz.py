@@ -1,22 +1,37 @@
-from langchain.embeddings import CacheBackedEmbeddings
-from langchain_openai import OpenAIEmbeddings
-from langchain.storage import InMemoryByteStore
-from langchain.vectorstores import Zilliz
 import asyncio
 from app.config import settings
+from app.utils.embedding_cache import create_embedding_cache, create_cached_embeddings
 import logging
 
 logger = logging.getLogger(__name__)
 
-async def initialize_vector_store_zilliz():
-    embeddings = OpenAIEmbeddings(
+async def initialize_vector_store_zilliz(http_client):
+    from langchain_openai import OpenAIEmbeddings
+    from langchain.vectorstores import Zilliz
+
+    embedding_args = dict(
         openai_api_key = settings.OPENAI_API_KEY,
-        model = settings.OPENAI_API_EMBEDDING_MODEL_NAME
+        model = settings.OPENAI_API_EMBEDDING_MODEL_NAME,
+        dimensions = settings.OPENAI_API_EMBEDDING_DIMENSIONS,
+        http_async_client = http_client
     )
+    embeddings = OpenAIEmbeddings(**embedding_args)
 
-    # 2. Set up an in-memory byte store and create a cached embeddings function
-    byte_store = InMemoryByteStore()
-    cached_embeddings = CacheBackedEmbeddings(embeddings, byte_store)
+    # 2. Set up the embedding cache backend and create a cached embeddings function
+    #    (caches both document and query embeddings, keyed by model and dimension)
+    embedding_cache = create_embedding_cache(
+        settings.EMBEDDING_CACHE_BACKEND,
+        settings.EMBEDDING_CACHE_PATH,
+        settings.EMBEDDING_CACHE_MAX_ENTRIES,
+    )
+    cache_args = dict(
+        model_name=f"openai/{settings.OPENAI_API_EMBEDDING_MODEL_NAME}",
+        dimensions=settings.OPENAI_API_EMBEDDING_DIMENSIONS,
+    )
+    cached_embeddings = create_cached_embeddings(embeddings, embedding_cache, **cache_args)
+    # Ingestion (EmbeddingPipeline) retries rate-limited batches itself, under its token
+    # limiter, so its client must not retry them as well; it shares the same cache
+    ingest_embeddings = create_cached_embeddings(OpenAIEmbeddings(**embedding_args, max_retries=0), embedding_cache, **cache_args)
     logger.info("Cached embeddings initialized")
 
     # 3. Create an Azure AI Search vector store (index) for retrieval
@@ -44,4 +59,36 @@ async def initialize_vector_store_zilliz():
         drop_old=False
     )
 
-    return vector_store, cached_embeddings
\ No newline at end of file
+    return vector_store, cached_embeddings, ingest_embeddings, embedding_cache
+
+def add_embedded_documents_zilliz(vector_store, docs, vectors):
+    """
+    Inserts `docs` with their precomputed `vectors`, so they are not embedded again.
+    The Zilliz store only inserts texts it embeds itself, so this builds the same insert
+    as its add_texts, from the store's own collection and field names. Returns the primary keys.
+    """
+    from pymilvus import Collection
+
+    if not docs:
+        return []
+    texts = [doc.page_content for doc in docs]
+    metadatas = [doc.metadata for doc in docs]
+    if not isinstance(vector_store.col, Collection):
+        # Like add_texts, the first insert creates the collection
+        vector_store._init(embeddings=vectors, metadatas=metadatas)
+
+    # auto_id=True, so Zilliz assigns the primary keys
+    columns = {vector_store._text_field: texts, vector_store._vector_field: vectors}
+    if vector_store._metadata_field is not None:
+        columns[vector_store._metadata_field] = metadatas
+    else:
+        # Metadata keys are stored in the collection's fields of the same name
+        for metadata in metadatas:
+            for key, value in metadata.items():
+                if key in vector_store.fields and key != vector_store._primary_field:
+                    columns.setdefault(key, []).append(value)
+    result = vector_store.col.insert(
+        [columns[field] for field in vector_store.fields if field in columns],
+        timeout=vector_store.timeout,
+    )
+    return result.primary_keys
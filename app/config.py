@@ -1,8 +1,9 @@
 from pydantic_settings import BaseSettings
-from typing import ClassVar
+from typing import ClassVar, Optional
 
 class Settings(BaseSettings):
-    PROVIDER: str = "azure" # azure or zilliz
+    PROVIDER: str = "azure" # azure or zilliz (both mean Azure for wichita + Zilliz for wsu) or local (in-process index, no cloud services)
+    TENANTS: str = "wichita,wsu"  # tenants this process serves; the others get no provider and no routes
     SYSTEM_PROMPT: str = (
         "Please answer the question below in up to 5 sentences (not including any extra links), or give information, following these rules:\n"
         "1. Only use information explicitly contained in the context.\n"
@@ -15,6 +16,7 @@ class Settings(BaseSettings):
     )
     OPENAI_API_CHAT_MODEL_NAME: str = "gpt-4o-mini"
     OPENAI_API_EMBEDDING_MODEL_NAME: str = "text-embedding-3-large"
+    OPENAI_API_EMBEDDING_DIMENSIONS: Optional[int] = None  # None keeps the model's native dimension
     OPENAI_API_KEY: str
     ZILLIZ_AUTH_TOKEN: str
     ZILLIZ_URL: str
@@ -41,6 +43,97 @@ class Settings(BaseSettings):
     CHUNK_OVERLAP: int = 400
     PORT: int = 8000
 
+    # Background ingestion jobs, per tenant: the ingest endpoints return a job ID to poll
+    INGEST_MAX_CONCURRENT_JOBS: int = 2  # jobs running at once; the rest wait in the queue
+    INGEST_QUEUE_SIZE: int = 100  # waiting jobs; further submissions are rejected with 503
+    INGEST_JOB_HISTORY: int = 500  # finished jobs kept for status polling
+    INGEST_BATCH_SIZE: int = 64  # most chunks embedded and stored per batch
+    INGEST_EMBED_BATCH_TOKENS: int = 50_000  # most estimated tokens per embedding request
+    INGEST_EMBED_CONCURRENCY: int = 4  # embedding requests in flight per ingestion job
+    INGEST_EMBED_TPM: int = 0  # embedding tokens per minute for each tenant's ingestion; 0 is unlimited
+    INGEST_EMBED_MAX_RETRIES: int = 6  # retries of a batch rate limited with 429
+    INGEST_PROCESS_POOL_SIZE: int = 2  # processes for text extraction and splitting; 0 runs them in threads instead
+    INGEST_PDF_PAGES_PER_TASK: int = 20  # pages of one PDF extracted per process pool task
+    INGEST_MAX_UPLOAD_BYTES: int = 100 * 1024 * 1024  # larger uploads are rejected with 413
+    INGEST_SPOOL_DIR: str = ""  # where uploads wait for their job; empty uses the system temp directory
+    INGEST_ENCODING_SAMPLE_BYTES: int = 64 * 1024  # bytes of a text file used to detect its encoding
+    INGEST_TEXT_SECTION_CHARS: int = 1_000_000  # characters of a text file extracted and split at a time
+    INGEST_REGISTRY_PATH: str = ".cache/ingested_chunks.sqlite3"  # chunk hashes per source, for incremental re-ingest
+    DELETE_CONCURRENCY: int = 4  # delete batches (of up to 1000 IDs) in flight at once
+
+    # Site crawls (POST /api/ingest_crawl); requests may lower the depth and page limits
+    CRAWL_MAX_DEPTH: int = 2  # links followed from the seed and sitemap pages
+    CRAWL_MAX_PAGES: int = 5000  # pages queued per crawl
+    CRAWL_CONCURRENCY: int = 16  # pages fetched at once per crawl
+    CRAWL_PER_HOST_CONCURRENCY: int = 4  # requests in flight to one host
+    CRAWL_HOST_DELAY: float = 0.1  # seconds between request starts to one host
+    CRAWL_RESPECT_ROBOTS: bool = True
+    CRAWL_USER_AGENT: str = "ChatbotCrawler/1.0"
+    CRAWL_MAX_PAGE_BYTES: int = 5 * 1024 * 1024  # larger pages are skipped and reported as failed
+
+    # In-process local provider (PROVIDER=local)
+    LOCAL_INDEX_DIR: str = ".local_index"  # one sub-directory per tenant
+    LOCAL_EMBEDDING_DIMENSIONS: int = 384
+    LOCAL_RETRIEVAL_K: int = 4
+    LOCAL_LLM_LATENCY: float = 0.0  # seconds the stub LLM waits before answering
+    LOCAL_FAQ_PATH: str = ""  # optional JSON list of FAQ headings
+
+    # Semantic answer cache in front of answer_query. Each worker keeps its own; a change to
+    # the index by any worker on the host clears them all on their next query (through the
+    # content generation in the chunk registry). Workers on other hosts rely on the TTL.
+    ANSWER_CACHE_ENABLED: bool = True
+    ANSWER_CACHE_SIMILARITY_THRESHOLD: float = 0.95  # cosine similarity needed for a hit
+    ANSWER_CACHE_MAX_ENTRIES: int = 500
+    ANSWER_CACHE_TTL: int = 3600  # seconds
+
+    # FAQ cache, per tenant: ttl (reloaded on the request path once FAQ_CACHE_TTL expires),
+    # swr (the expired list is served while one background refresh runs) or preload (loaded at
+    # startup, refreshed every FAQ_REFRESH_INTERVAL and otherwise served like swr)
+    WICHITA_FAQ_CACHE_MODE: str = "preload"
+    WSU_FAQ_CACHE_MODE: str = "preload"
+    FAQ_CACHE_TTL: int = 300  # seconds
+    FAQ_REFRESH_INTERVAL: int = 300  # seconds
+
+    # Translated FAQs, keyed by tenant, language and source text hash (persisted across restarts)
+    TRANSLATION_CACHE_ENABLED: bool = True
+    TRANSLATION_CACHE_BACKEND: str = "sqlite"  # sqlite (on-disk, shared by workers) or memory
+    TRANSLATION_CACHE_PATH: str = ".cache/translations.sqlite3"
+    TRANSLATION_CACHE_MAX_ENTRIES: int = 20_000
+    TRANSLATION_PRELOAD_LANGUAGES: str = ""  # comma-separated, e.g. "es,vi"; translated in the background whenever FAQs load
+
+    # Batched FAQ translation: uncached FAQs go out in a few JSON-mode calls instead of one call each;
+    # items missing from a reply are retried one by one
+    TRANSLATION_BATCH_ENABLED: bool = True
+    TRANSLATION_BATCH_MAX_TOKENS: int = 2000  # estimated input tokens per call (~4 characters per token)
+    TRANSLATION_BATCH_MAX_ITEMS: int = 50  # texts per call
+
+    # Embedding cache shared by document and query embeddings
+    EMBEDDING_CACHE_BACKEND: str = "sqlite"  # sqlite (on-disk, shared by workers) or memory
+    EMBEDDING_CACHE_PATH: str = ".cache/embeddings.sqlite3"
+    EMBEDDING_CACHE_MAX_ENTRIES: int = 50_000
+
+    # Shared async HTTP client (Zilliz REST and URL ingestion)
+    HTTP_MAX_CONNECTIONS: int = 100
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    HTTP_KEEPALIVE_EXPIRY: float = 30.0  # seconds
+    HTTP_CONNECT_TIMEOUT: float = 10.0  # seconds
+    HTTP_READ_TIMEOUT: float = 60.0  # seconds
+
+    # Background batched writer for the user_queries collection
+    USER_QUERY_LOG_QUEUE_SIZE: int = 1000
+    USER_QUERY_LOG_BATCH_SIZE: int = 50
+    USER_QUERY_LOG_FLUSH_INTERVAL: float = 2.0  # seconds
+    USER_QUERY_LOG_SPILL_PATH: str = ""  # JSONL file for overflow; empty drops instead
+
+    # Prometheus metrics (request, stage, cache and token metrics served at /metrics)
+    METRICS_ENABLED: bool = True
+
+    # Server-Timing headers and opt-in request traces (send the TRACE_HEADER header to capture one)
+    TRACING_ENABLED: bool = True
+    TRACE_HEADER: str = "X-Debug-Trace"
+    TRACE_BUFFER_SIZE: int = 200  # most recent captured traces kept in memory
+    ADMIN_TOKEN: str = ""  # bearer token for /admin endpoints; empty disables them
+
     WSU_TEMPLATE: ClassVar[dict] = {
         "title": "WSU Chatbot Dashboard",
         "hero_img": "/static/img/chatbot_hero_back_WSU.png",
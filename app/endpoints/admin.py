@@ -0,0 +1,47 @@
+import hmac
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import JSONResponse
+from app.config import settings
+from app.utils.tracing import trace_buffer
+import logging
+
+logger = logging.getLogger(__name__)
+
+def is_admin(request: Request) -> bool:
+    """Whether the request carries `Authorization: Bearer <ADMIN_TOKEN>`; never while ADMIN_TOKEN is unset."""
+    if not settings.ADMIN_TOKEN:
+        return False
+    authorization = request.headers.get("Authorization", "")
+    scheme, _, token = authorization.partition(" ")
+    return scheme.lower() == "bearer" and hmac.compare_digest(token, settings.ADMIN_TOKEN)
+
+def require_admin(request: Request):
+    """
+    Allows the request only with `Authorization: Bearer <ADMIN_TOKEN>`.
+    Admin endpoints are hidden (404) while ADMIN_TOKEN is unset.
+    """
+    if not settings.ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not is_admin(request):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+router = APIRouter(prefix="/admin", dependencies=[Depends(require_admin)])
+
+@router.get("/traces")
+async def list_traces(limit: Optional[int] = None):
+    """
+    Dumps the captured request traces, newest first.
+    A trace is captured for each API request sent with the debug header (settings.TRACE_HEADER).
+    """
+    return JSONResponse(trace_buffer.list(limit))
+
+@router.get("/traces/{trace_id}")
+async def get_trace(trace_id: str):
+    """
+    Returns one captured trace by the X-Trace-Id its response carried.
+    """
+    trace = trace_buffer.get(trace_id)
+    if trace is None:
+        raise HTTPException(status_code=404, detail="Trace not found or already evicted")
+    return JSONResponse(trace)
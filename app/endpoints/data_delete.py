@@ -1,24 +1,68 @@
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from fastapi.responses import JSONResponse
-from app.chains.delete_documents_azure import delete_document, delete_all_documents
+from app.endpoints.admin import require_admin
+from app.endpoints.ingest import job_accepted
+from app.utils.job_queue import JobQueueFull
 import logging
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
 @router.get("/document_delete")
-async def document_delete(id: str = Query(..., description="The ID of the document to delete")):
+async def document_delete(request: Request, id: str = Query(..., description="The ID of the document to delete")):
     """
-    Deletes a document from the Azure AI Search index.
+    Deletes a document from the tenant's index (Azure AI Search, Zilliz or local).
     Called with a query parameter, e.g.:
       localhost:8000/api/document_delete?id=DOCUMENT_ID
     """
     try:
-        #TODO move to provider
-        #TODO add delete document for zilliz
-        result = await delete_document(id)
+        result = await request.state.provider.delete_document(id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error("Document deletion error: %s", e)
         raise HTTPException(status_code=500, detail="Document deletion failed")
-        
+
     return JSONResponse(content=result)
+
+# Wiping a tenant needs the admin token
+@router.delete("/documents", dependencies=[Depends(require_admin)])
+async def delete_all_documents(request: Request):
+    """
+    Queues the deletion of every document in the tenant's index as a background job.
+    Returns a job ID at once; poll /ingest_jobs/{job_id} for progress
+    (stage, documents_found, documents_deleted) and the result.
+    """
+    provider = request.state.provider
+    try:
+        job = provider.ingest_chain.submit_delete_all(provider.delete_all_documents)
+    except JobQueueFull as e:
+        logger.warning("Deletion rejected: %s", e)
+        raise HTTPException(status_code=503, detail="Too many jobs queued, try again later")
+
+    return job_accepted(request, job)
+
+# Listing and deleting sources also need the admin token
+@router.get("/sources", dependencies=[Depends(require_admin)])
+async def list_sources(request: Request):
+    """
+    Lists the ingested documents and URLs, most recently ingested first, with each one's
+    chunk count, kind, content hash and ingestion time. Read from the chunk registry, not the index.
+    """
+    return JSONResponse(await request.state.provider.ingest_chain.list_sources())
+
+@router.delete("/sources", dependencies=[Depends(require_admin)])
+async def delete_source(request: Request, source: str = Query(..., description="The file name or URL to delete")):
+    """
+    Deletes every chunk of an ingested document or URL from the index, e.g.:
+      DELETE localhost:8000/wsu/api/sources?source=handbook.pdf  (with Authorization: Bearer <ADMIN_TOKEN>)
+    """
+    try:
+        deleted = await request.state.provider.ingest_chain.delete_source(source)
+    except Exception as e:
+        logger.error("Source deletion error for '%s': %s", source, e)
+        raise HTTPException(status_code=500, detail="Source deletion failed")
+
+    if deleted is None:
+        raise HTTPException(status_code=404, detail="Source not found")
+    return JSONResponse({"source": source, "deleted": deleted})
@@ -10,11 +10,13 @@ router = APIRouter()
 @router.get("/data_search")
 async def search_data(request: Request, query: str, limit: int = 100, radius: float = 0.8):
     """
-    Delegates to the provider's search_data method.
+    Delegates to the provider's search_data method. Returns 501 for providers without it.
     """
     try:
         result = await request.state.provider.search_data(query, limit, radius)
         return JSONResponse(result)
+    except NotImplementedError as e:
+        raise HTTPException(status_code=501, detail=str(e))
     except Exception as e:
         logger.exception("Search data error")
         raise HTTPException(status_code=500, detail=str(e))
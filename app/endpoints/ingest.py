@@ -1,48 +1,168 @@
-from fastapi import APIRouter, Request, HTTPException, UploadFile, File
+import os
+import hmac
+import asyncio
+import tempfile
+from typing import Optional
+from fastapi import APIRouter, Depends, Request, HTTPException, UploadFile, File
 from fastapi.responses import JSONResponse
+from app.config import settings
+from app.chains.ingest_chain import remove_file
+from app.chains.site_crawler import CrawlRequest
+from app.endpoints.admin import is_admin, require_admin
+from app.utils.job_queue import Job, JobQueueFull
 import logging
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
+# Bytes copied per read while spooling an upload
+SPOOL_BLOCK_SIZE = 1024 * 1024
+
+async def spool_upload(file: UploadFile) -> str:
+    """
+    Copies the upload block by block to a file of its own that the ingestion job reads
+    and deletes, so the upload is never held in memory whole. Raises 413 past
+    INGEST_MAX_UPLOAD_BYTES. Returns the file's path.
+    """
+    suffix = os.path.splitext(file.filename or "")[1]
+    fd, path = tempfile.mkstemp(prefix="ingest-", suffix=suffix, dir=settings.INGEST_SPOOL_DIR or None)
+    size = 0
+    try:
+        with os.fdopen(fd, "wb") as spool:
+            while block := await file.read(SPOOL_BLOCK_SIZE):
+                size += len(block)
+                if size > settings.INGEST_MAX_UPLOAD_BYTES:
+                    raise HTTPException(status_code=413, detail=f"File exceeds {settings.INGEST_MAX_UPLOAD_BYTES} bytes")
+                await asyncio.to_thread(spool.write, block)
+    except BaseException:
+        await asyncio.to_thread(remove_file, path)
+        raise
+    return path
+
+def job_accepted(request: Request, job: Job) -> JSONResponse:
+    """
+    202 response for a queued ingestion job, with the URL to poll for its status.
+    The URL carries the job's token, so only the submitter (or an admin) can poll it.
+    """
+    status_url = request.url.path.rsplit("/", 1)[0] + f"/ingest_jobs/{job.job_id}?token={job.token}"
+    return JSONResponse(
+        {"status": job.status, "job_id": job.job_id, "status_url": status_url},
+        status_code=202,
+        headers={"Location": status_url},
+    )
+
 @router.post("/ingest_document")
 async def ingest_document(request: Request, file: UploadFile = File(...)):
     """
-    Receives an uploaded document, processes it using the ingestion chain,
-    and ingests its contents into vector_store
+    Receives an uploaded document, spools it to disk and queues it for ingestion into
+    vector_store. Returns a job ID at once; poll /ingest_jobs/{job_id} for progress and the result.
     """
+    # Reject uploads whose declared length is already over the cap without copying them
     try:
-        contents = await file.read()
+        content_length = int(request.headers.get("content-length") or 0)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid Content-Length header")
+    if content_length > settings.INGEST_MAX_UPLOAD_BYTES + SPOOL_BLOCK_SIZE:
+        raise HTTPException(status_code=413, detail=f"File exceeds {settings.INGEST_MAX_UPLOAD_BYTES} bytes")
+    try:
+        path = await spool_upload(file)
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error("Failed to read uploaded file: %s", e)
         raise HTTPException(status_code=400, detail="Failed to read file")
-    
+
     try:
-        result = await request.state.provider.ingest_chain.ingest_document(contents, file.filename)
-    except Exception as e:
-        logger.error("Ingestion chain error: %s", e)
-        raise HTTPException(status_code=500, detail="Ingestion failed")
-        
-    return JSONResponse(result)
+        job = request.state.provider.ingest_chain.submit_document(path, file.filename)
+    except JobQueueFull as e:
+        await asyncio.to_thread(remove_file, path)
+        logger.warning("Ingestion rejected: %s", e)
+        raise HTTPException(status_code=503, detail="Too many ingestion jobs queued, try again later")
+
+    return job_accepted(request, job)
 
 @router.post("/ingest_url")
-async def ingest_document(request: Request):
+async def ingest_url(request: Request):
     """
-    Receives a url, processes it using the ingestion chain,
-    and ingests its contents into vector_store
+    Receives a url and queues it for ingestion into vector_store.
+    Returns a job ID at once; poll /ingest_jobs/{job_id} for progress and the result.
     """
     try:
         data = await request.json()
     except Exception as e:
         logger.error("Failed to read uploaded file: %s", e)
         raise HTTPException(status_code=400, detail="Failed to read file")
-    
+
     url = data.get("url")
-    
+    if not url:
+        raise HTTPException(status_code=400, detail="Missing url")
+
     try:
-        result = await request.state.provider.ingest_chain.ingest_url(url)
+        job = request.state.provider.ingest_chain.submit_url(url)
+    except JobQueueFull as e:
+        logger.warning("Ingestion rejected: %s", e)
+        raise HTTPException(status_code=503, detail="Too many ingestion jobs queued, try again later")
+
+    return job_accepted(request, job)
+
+@router.post("/ingest_crawl", dependencies=[Depends(require_admin)])
+async def ingest_crawl(request: Request):
+    """
+    Queues a crawl of a site for ingestion as one job. JSON body:
+      - seeds: URLs to start from, and/or
+      - sitemaps: sitemap (or sitemap index) URLs whose pages are crawled too
+      - hosts: hosts the crawl may visit (default: those of the seeds and sitemaps)
+      - path_prefixes: URL paths the crawl may visit (default: ["/"])
+      - max_depth, max_pages: at most CRAWL_MAX_DEPTH and CRAWL_MAX_PAGES
+    Returns a job ID at once; poll /ingest_jobs/{job_id} for progress and the result.
+    """
+    try:
+        data = await request.json()
     except Exception as e:
-        logger.error("Ingestion chain error: %s", e)
-        raise HTTPException(status_code=500, detail="Ingestion failed")
-        
-    return JSONResponse(result)
\ No newline at end of file
+        logger.error("Failed to read crawl request: %s", e)
+        raise HTTPException(status_code=400, detail="Invalid JSON body")
+
+    lists = {}
+    for key in ("seeds", "sitemaps", "hosts", "path_prefixes"):
+        value = data.get(key) or []
+        if not isinstance(value, list) or not all(isinstance(item, str) and item for item in value):
+            raise HTTPException(status_code=400, detail=f"{key} must be a list of strings")
+        lists[key] = value
+    if not lists["seeds"] and not lists["sitemaps"]:
+        raise HTTPException(status_code=400, detail="Missing seeds or sitemaps")
+    try:
+        max_depth = min(int(data.get("max_depth", settings.CRAWL_MAX_DEPTH)), settings.CRAWL_MAX_DEPTH)
+        max_pages = min(int(data.get("max_pages", settings.CRAWL_MAX_PAGES)), settings.CRAWL_MAX_PAGES)
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=400, detail="max_depth and max_pages must be integers")
+    if max_depth < 0 or max_pages < 1:
+        raise HTTPException(status_code=400, detail="max_depth must be at least 0 and max_pages at least 1")
+
+    crawl = CrawlRequest(**lists, max_depth=max_depth, max_pages=max_pages)
+    try:
+        job = request.state.provider.ingest_chain.submit_crawl(crawl)
+    except JobQueueFull as e:
+        logger.warning("Ingestion rejected: %s", e)
+        raise HTTPException(status_code=503, detail="Too many ingestion jobs queued, try again later")
+
+    return job_accepted(request, job)
+
+@router.get("/ingest_jobs", dependencies=[Depends(require_admin)])
+async def list_ingest_jobs(request: Request, limit: Optional[int] = None):
+    """
+    Lists this tenant's queued, running and recently finished ingestion jobs, newest first.
+    """
+    return JSONResponse(request.state.provider.ingest_chain.jobs.list(limit))
+
+@router.get("/ingest_jobs/{job_id}")
+async def get_ingest_job(request: Request, job_id: str, token: Optional[str] = None):
+    """
+    Reports an ingestion job's status (queued, running, succeeded or failed), its progress
+    (stage, chunks_stored, chunks_skipped, chunks_total) and its result or error.
+    Needs the job's token (from the status_url returned on submission) or the admin token;
+    without either the job is reported as not found.
+    """
+    job = request.state.provider.ingest_chain.jobs.get(job_id)
+    if job is None or not ((token and hmac.compare_digest(token, job.token)) or is_admin(request)):
+        raise HTTPException(status_code=404, detail="Job not found or already evicted")
+    return JSONResponse(job.to_dict())
@@ -1,6 +1,8 @@
-from fastapi import APIRouter, Request, HTTPException
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, Depends, Request, HTTPException
+from fastapi.responses import JSONResponse, StreamingResponse
+import json
 import logging
+from app.endpoints.admin import require_admin
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
@@ -28,3 +30,60 @@ async def handle_post(request: Request):
         raise HTTPException(status_code=500, detail="Processing error")
     
     return JSONResponse({"response": result["result"]})
+
+@router.post("/qa/stream")
+async def handle_stream(request: Request, format: str = "sse"):
+    """
+    Streaming variant of /qa. Sends a "retrieval" event once the context is fetched,
+    then the LLM tokens as they are produced, then a final "done" event.
+    Called with a query parameter selecting the wire format, e.g.:
+      localhost:8000/wichita/api/qa/stream?format=sse    (text/event-stream)
+      localhost:8000/wichita/api/qa/stream?format=ndjson (chunked JSON, one event per line)
+    """
+    if format not in ("sse", "ndjson"):
+        raise HTTPException(status_code=400, detail="format must be 'sse' or 'ndjson'")
+
+    try:
+        data = await request.json()
+    except Exception as e:
+        logger.error("Failed to parse request JSON: %s", e)
+        raise HTTPException(status_code=400, detail="Invalid JSON request")
+
+    user_message = data.get("userMessage", "No message provided")
+    logger.info(f"Received user query (stream): {user_message}")
+    provider = request.state.provider
+
+    def encode(event: dict) -> str:
+        if format == "sse":
+            return f"event: {event['event']}\ndata: {json.dumps(event.get('data'))}\n\n"
+        return json.dumps(event) + "\n"
+
+    async def event_stream():
+        try:
+            async for event in provider.stream_answer(user_message):
+                yield encode(event)
+        except Exception as e:
+            # Headers are already sent, so errors are reported in-band
+            logger.error("Error processing streaming retrieval chain: %s", e)
+            yield encode({"event": "error", "data": {"error": "Processing error"}})
+
+    media_type = "text/event-stream" if format == "sse" else "application/x-ndjson"
+    return StreamingResponse(
+        event_stream(),
+        media_type=media_type,
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@router.get("/qa/stats", dependencies=[Depends(require_admin)])
+async def qa_stats(request: Request):
+    """
+    Returns answer cache, embedding cache and request coalescing counters for the provider.
+    Needs the admin token; the embedding cache stats include its file path.
+    """
+    provider = request.state.provider
+    answer_cache = provider.answer_cache.stats() if provider.answer_cache is not None else None
+    return JSONResponse({
+        "answer_cache": answer_cache,
+        "embedding_cache": provider.embedding_cache.stats() if provider.embedding_cache is not None else None,
+        "single_flight": provider.single_flight.stats(),
+    })
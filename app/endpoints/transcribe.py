@@ -25,6 +25,8 @@ async def transcribe_audio(request: Request, file: UploadFile = File(...)):
     try:
         provider = request.state.provider
         transcript_text = await provider.transcribe_audio(file)
+    except NotImplementedError as e:
+        raise HTTPException(status_code=501, detail=str(e))
     except Exception as e:
         logger.error(f"Error during transcription: {e}")
         raise HTTPException(status_code=500, detail="Error during transcription")
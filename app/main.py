@@ -1,31 +1,87 @@
 import os
+import time
+import asyncio
 import uvicorn
 import logging
+from functools import partial
 from fastapi import FastAPI, Request, Response, APIRouter, Depends
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import RedirectResponse
 from contextlib import asynccontextmanager
 from app import *
+from app.utils.metrics import (
+    CONTENT_TYPE_LATEST,
+    MetricsMiddleware,
+    register_provider_collector,
+    render_metrics,
+    tenant_context,
+    unregister_provider_collector,
+)
+from app.utils.tracing import TracingMiddleware
+from app.utils.process_pool import shutdown_process_pool
 
 logger = logging.getLogger(__name__)
 
+# The factory that builds each tenant's provider, for each PROVIDER setting. "azure" and
+# "zilliz" both mean the cloud services, Azure AI Search for wichita and Zilliz for wsu.
+CLOUD_PROVIDERS = {"wichita": AzureProvider.create, "wsu": ZillizProvider.create}
+PROVIDER_TENANTS = {
+    "azure": CLOUD_PROVIDERS,
+    "zilliz": CLOUD_PROVIDERS,
+    # Serve both tenants from in-process indexes, with no cloud services
+    "local": {"wichita": partial(LocalProvider.create, "wichita"), "wsu": partial(LocalProvider.create, "wsu")},
+}
+if settings.PROVIDER not in PROVIDER_TENANTS:
+    raise ValueError(f"Unknown PROVIDER {settings.PROVIDER!r}; expected one of {', '.join(PROVIDER_TENANTS)}")
+# TENANTS picks the tenants this process serves; the others are skipped entirely: no provider, no routes
+_requested_tenants = {tenant.strip() for tenant in settings.TENANTS.split(",") if tenant.strip()}
+if not _requested_tenants or _requested_tenants - set(CLOUD_PROVIDERS):
+    raise ValueError(f"Invalid TENANTS {settings.TENANTS!r}; expected a comma-separated subset of {', '.join(CLOUD_PROVIDERS)}")
+ENABLED_TENANTS = tuple(tenant for tenant in PROVIDER_TENANTS[settings.PROVIDER] if tenant in _requested_tenants)
+
+async def create_provider(tenant: str, factory):
+    # Created inside the tenant's context so background tasks the provider
+    # starts (e.g. the user_queries writer) report metrics under that tenant
+    with tenant_context(tenant):
+        return await factory()
+
 # runs at startup
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    logger.info("Startup: initializing chains...")
-    
-    # Initialize Azure Provider
-    azure_provider = await AzureProvider.create()
-    app.state.azure_provider = azure_provider
-
-    # Initialize Zilliz Provider
-    zilliz_provider = await ZillizProvider.create()
-    app.state.zilliz_provider = zilliz_provider
-
-    logger.info("Chains stored in app state.")
+    logger.info("Startup: initializing chains for %s...", ", ".join(ENABLED_TENANTS))
+    start = time.perf_counter()
+
+    # Providers are independent, so they are built concurrently
+    factories = {tenant: PROVIDER_TENANTS[settings.PROVIDER][tenant] for tenant in ENABLED_TENANTS}
+    results = await asyncio.gather(
+        *(create_provider(tenant, factory) for tenant, factory in factories.items()),
+        return_exceptions=True,
+    )
+    providers = {tenant: result for tenant, result in zip(factories, results) if not isinstance(result, BaseException)}
+    errors = [result for result in results if isinstance(result, BaseException)]
+    if errors:
+        # Don't leak the providers that did start
+        await asyncio.gather(*(provider.close() for provider in providers.values()), return_exceptions=True)
+        raise errors[0]
+
+    app.state.providers = providers
+    for tenant, provider in providers.items():
+        setattr(app.state, f"{tenant}_provider", provider)
+
+    cache_collector = None
+    if settings.METRICS_ENABLED:
+        cache_collector = register_provider_collector(providers)
+
+    logger.info("Chains stored in app state in %.2fs.", time.perf_counter() - start)
     yield
     logger.info("Shutdown: cleaning up resources...")
+    if cache_collector is not None:
+        unregister_provider_collector(cache_collector)
+    for provider in providers.values():
+        await provider.close()
+    # After the providers, whose ingestion jobs may still be using the pool
+    shutdown_process_pool()
 
 app = FastAPI(lifespan=lifespan)
 
@@ -49,32 +105,44 @@ async def frame_control(request: Request, call_next):
         response.headers["Content-Security-Policy"] = "frame-ancestors 'none'"
     return response
 
+# Server-Timing headers and opt-in request traces for the tenant APIs
+if settings.TRACING_ENABLED:
+    app.add_middleware(TracingMiddleware, tenants=ENABLED_TENANTS, header_name=settings.TRACE_HEADER)
+
+# request latency, in-flight requests and tenant labels for stage metrics
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware, tenants=ENABLED_TENANTS)
+
+    @app.get("/metrics", include_in_schema=False)
+    async def metrics():
+        return Response(render_metrics(), media_type=CONTENT_TYPE_LATEST)
+
 
 # Mount static files
 static_folder = os.path.join(os.path.dirname(__file__), "..", "static")
 app.mount("/static", StaticFiles(directory=static_folder), name="static")
 
-# Redirect to /wichita route by default
+# Redirect to the first enabled tenant (/wichita unless only WSU is served)
 @app.get("/")
 async def default_route():
-    return RedirectResponse(url="/wichita")
+    return RedirectResponse(url=f"/{ENABLED_TENANTS[0]}")
 
 # -------------------------------------------------
 # Provider-specific dependency functions
 # -------------------------------------------------
-def set_azure_provider(request: Request):
-    request.state.provider = request.app.state.azure_provider
+def set_wichita_provider(request: Request):
+    request.state.provider = request.app.state.wichita_provider
     request.state.template = settings.WICHITA_TEMPLATE
 
-def set_zilliz_provider(request: Request):
-    request.state.provider = request.app.state.zilliz_provider
+def set_wsu_provider(request: Request):
+    request.state.provider = request.app.state.wsu_provider
     request.state.template = settings.WSU_TEMPLATE
 
 # -------------------------------------------------
 # Provider-specific API routers
 # -------------------------------------------------
 # Wichita API: endpoints will be available at /api/...
-wichita_api_router = APIRouter(prefix="/wichita", dependencies=[Depends(set_azure_provider)])
+wichita_api_router = APIRouter(prefix="/wichita", dependencies=[Depends(set_wichita_provider)])
 wichita_api_router.include_router(chatbot_router, prefix="/api")
 wichita_api_router.include_router(ingest_router, prefix="/api")
 wichita_api_router.include_router(data_delete_router, prefix="/api")
@@ -84,7 +152,7 @@ wichita_api_router.include_router(faq_router, prefix="/api")
 wichita_api_router.include_router(transcribe_router, prefix="/api")
 
 # WSU API: endpoints will be available at /wsu/api/...
-wsu_api_router = APIRouter(prefix="/wsu", dependencies=[Depends(set_zilliz_provider)])
+wsu_api_router = APIRouter(prefix="/wsu", dependencies=[Depends(set_wsu_provider)])
 wsu_api_router.include_router(chatbot_router, prefix="/api")
 wsu_api_router.include_router(ingest_router, prefix="/api")
 wsu_api_router.include_router(data_delete_router, prefix="/api")
@@ -96,10 +164,14 @@ wsu_api_router.include_router(transcribe_router, prefix="/api")
 # -------------------------------------------------
 # Include non-API routes and provider-specific API routers
 # -------------------------------------------------
-app.include_router(wichita_router)
-app.include_router(wsu_router)
-app.include_router(wichita_api_router)
-app.include_router(wsu_api_router)
+tenant_routers = {
+    "wichita": (wichita_router, wichita_api_router),
+    "wsu": (wsu_router, wsu_api_router),
+}
+for tenant in ENABLED_TENANTS:
+    for tenant_router in tenant_routers[tenant]:
+        app.include_router(tenant_router)
+app.include_router(admin_router)
 
 if __name__ == '__main__':
     uvicorn.run("app.main:app", host="0.0.0.0", port=settings.PORT, reload=False)
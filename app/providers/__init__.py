@@ -1,10 +1,12 @@
 from .azure_provider import AzureProvider
 from .zilliz_provider import ZillizProvider
+from .local_provider import LocalProvider
 from app.chains import *
 
 __all__ = [
     "ZillizProvider",
     "AzureProvider",
+    "LocalProvider",
     "initialize_retrieval_chain_azure",
     "initialize_retrieval_chain_zilliz",
     "initialize_ingest_chain",
@@ -1,36 +1,43 @@
-from motor.motor_asyncio import AsyncIOMotorClient
-from bson import ObjectId
 from .base import BaseProvider
 from app.config import settings
+from app.utils.metrics import track_stage
+from app.utils.lazy import AsyncLazy
+from app.utils.refreshing_cache import RefreshingCache
+from app.utils.translation_cache import create_translation_cache
+from app.utils.chunk_registry import create_chunk_registry
+from app.utils.http_client import create_http_client
 from app.chains import *
 import logging
 import asyncio
 from fastapi import UploadFile
-from openai import OpenAI
-import time
-from app.chains.retrieval_chain_azure import answer_query as answer
 
 logger = logging.getLogger(__name__)
 
-def serialize_document(doc: dict) -> dict:
-    if "_id" in doc and isinstance(doc["_id"], ObjectId):
-        doc["_id"] = str(doc["_id"])
-    return doc
-
 class AzureProvider(BaseProvider):
     def __init__(self):
-        self.mongo_client = AsyncIOMotorClient(settings.AZURE_MONGO_CONNECTION_STRING)
-        self.db = self.mongo_client[settings.AZURE_MONGO_DATABASE_NAME]
-        self.faq_collection = self.db["faq"]
-        self.client = OpenAI(api_key=settings.OPENAI_API_KEY)
+        super().__init__()
+        # Created on the first FAQ fetch (see faq_collection)
+        self.mongo_client = None
+        # Pooled keep-alive HTTP client shared by URL ingestion and all model calls
+        self.http_client = create_http_client()
+        # The SDKs are imported here and in faq_collection rather than at module level,
+        # so importing the app stays cheap (see benchmarks/import_time.py)
+        from openai import AsyncOpenAI
+        self.client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY, http_client=self.http_client)
         # These attributes will be initialized asynchronously
-        self.retrieval_chain = None
+        self.embedding_cache = None
         self.ingest_chain = None
         self.translation_chain = None
-        # Initialize caching variables for FAQs
-        self._cached_faqs = None
-        self._cache_timestamp = None
-        self._cache_ttl = 300  # seconds, e.g., re-fetch every 5 minutes
+        # FAQ headings, kept fresh according to WICHITA_FAQ_CACHE_MODE
+        self.faq_cache = RefreshingCache(
+            self._fetch_faqs,
+            mode=settings.WICHITA_FAQ_CACHE_MODE,
+            ttl=settings.FAQ_CACHE_TTL,
+            refresh_interval=settings.FAQ_REFRESH_INTERVAL,
+            name="faq",
+        )
+        # Translated FAQs per language, persisted across restarts
+        self.translation_cache = create_translation_cache("wichita", settings.AZURE_DEPLOYMENT_NAME)
 
 
     @classmethod
@@ -39,64 +46,102 @@ class AzureProvider(BaseProvider):
         Async factory method to initialize all chains upon creation.
         """
         instance = cls()
-        vector_store, cached_embeddings = await initialize_vector_store_azure()
-        instance.retrieval_chain = await initialize_retrieval_chain_azure(vector_store, cached_embeddings)
-        instance.ingest_chain = await initialize_ingest_chain(vector_store)
-        instance.translation_chain = await initialize_translation_chain_azure()
+        vector_store, cached_embeddings, ingest_embeddings, instance.embedding_cache = await initialize_vector_store_azure(instance.http_client)
+        instance.retrieval_chain = await initialize_retrieval_chain_azure(vector_store, cached_embeddings, instance.http_client)
+        instance.ingest_chain = await initialize_ingest_chain(
+            vector_store, instance.http_client, create_chunk_registry("wichita"), ingest_embeddings, add_embedded_documents_azure
+        )
+        # Only FAQ translation uses this chain, so it is built on first use
+        instance.translation_chain = AsyncLazy(lambda: initialize_translation_chain_azure(instance.http_client), name="translation chain")
+        if instance.translation_cache is not None:
+            # Pre-translate TRANSLATION_PRELOAD_LANGUAGES whenever a new FAQ list is loaded
+            instance.faq_cache.add_listener(
+                lambda faqs: instance.translation_cache.schedule_pretranslation(faqs, instance._translate_texts)
+            )
+        # In preload mode, FAQs are fetched now and then refreshed in the background
+        await instance.faq_cache.start()
         return instance
+
+
+    @property
+    def faq_collection(self):
+        # The Mongo client starts background monitor threads, so it is only created
+        # once FAQs are first fetched (at startup when WICHITA_FAQ_CACHE_MODE is preload)
+        if self.mongo_client is None:
+            from motor.motor_asyncio import AsyncIOMotorClient
+            self.mongo_client = AsyncIOMotorClient(settings.AZURE_MONGO_CONNECTION_STRING)
+        return self.mongo_client[settings.AZURE_MONGO_DATABASE_NAME]["faq"]
     
 
-    async def answer_query(self, query: str) -> dict:
-        return await answer(query, self.retrieval_chain)
+    async def close(self) -> None:
+        await self.ingest_chain.close()
+        await self.faq_cache.close()
+        if self.translation_cache is not None:
+            await self.translation_cache.close()
+        await self.http_client.aclose()
+        if self.mongo_client is not None:
+            self.mongo_client.close()
+        if self.embedding_cache is not None:
+            self.embedding_cache.close()
 
 
     async def get_faqs(self) -> list:
-        current_time = time.time()
-        # Check if the cache exists and is still valid.
-        if self._cached_faqs is not None and (current_time - self._cache_timestamp) < self._cache_ttl:
-            return self._cached_faqs
+        return await self.faq_cache.get()
 
+
+    async def _fetch_faqs(self) -> list:
         logger.info("Retrieving from database")
-        cursor = self.faq_collection.find({})
-        faqs = await cursor.to_list(length=1000)
-        serialized_faqs = [serialize_document(faq) for faq in faqs]
-        headings = [
+        with track_stage("faq_fetch"):
+            # Only the headings are used, so fetch nothing else
+            cursor = self.faq_collection.find({}, {"_id": 0, "faqs.heading": 1})
+            faqs = await cursor.to_list(length=None)
+        return [
             item.get("heading")
-            for doc in serialized_faqs
+            for doc in faqs
             for item in doc.get("faqs", [])
             if isinstance(item, dict) and item.get("heading")
         ]
-        # Update cache and timestamp.
-        self._cached_faqs = headings
-        self._cache_timestamp = current_time
-
-        return headings
 
 
     async def translate_faqs(self, target_lang: str = 'en') -> list:
         """
         Translates FAQs to the target language using the translation chain.
         If target language is English, returns cached FAQs.
+        Translations are served from the translation cache when enabled.
         """
-        faq_texts = await self.get_faqs()  # This now uses caching with TTL
+        faq_texts = await self.get_faqs()
         if target_lang.lower() == 'en':
             return faq_texts
+        if self.translation_cache is None:
+            return await self._translate_texts(faq_texts, target_lang)
+        return await self.translation_cache.translate(faq_texts, target_lang, self._translate_texts)
 
-        tasks = [
-            asyncio.to_thread(self.translation_chain.invoke, {"faq": faq, "target_lang": target_lang})
-            for faq in faq_texts
-        ]
-        results = await asyncio.gather(*tasks)
-        translated_faqs = [result.content for result in results if hasattr(result, "content")]
-        # Ref zilliz_provider.py translate_faqs for notes
 
-        return translated_faqs
+    async def _translate_texts(self, texts: list, target_lang: str) -> list:
+        translation_chain = await self.translation_chain.get()
+        with track_stage("translation"):
+            # A few batched calls for the whole list (TRANSLATION_BATCH_*); one entry per
+            # input text, so translations can be cached by source text
+            return await translation_chain.translate(texts, target_lang)
 
 
     async def transcribe_audio(self, file: UploadFile) -> str:
-        return await transcribe_azure(self, file)
+        with track_stage("transcription"):
+            return await transcribe_azure(self, file)
     
 
     async def search_data(self, query: str, limit: int = 100, radius: float = 0.8) -> dict:
         # TODO: Implement data analytics search functionality for AzureProvider.
-        raise NotImplementedError("search_data is not implemented for AzureProvider.")
\ No newline at end of file
+        raise NotImplementedError("search_data is not implemented for AzureProvider.")
+
+
+    async def delete_document(self, document_id: str) -> dict:
+        with track_stage("deletion"):
+            result = await delete_document(document_id)
+        await self.ingest_chain.forget_chunks([document_id])
+        return result
+
+
+    async def delete_all_documents(self, progress=lambda **progress: None) -> dict:
+        # Pages through the index and deletes in concurrent batches of up to 1000 IDs
+        return await delete_all_documents(progress)
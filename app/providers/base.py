@@ -1,12 +1,98 @@
 # providers/base.py
+import asyncio
 from abc import ABC, abstractmethod
-from typing import Any
+from typing import Any, AsyncIterator, Callable, List
 from fastapi import UploadFile
+from app.config import settings
+from app.chains.retrieval_chain import answer_query, stream_answer
+from app.utils.answer_cache import SemanticAnswerCache
+from app.utils.single_flight import SingleFlight, normalize_query
+from app.utils.metrics import record_cache, track_stage
 
 class BaseProvider(ABC):
-    @abstractmethod
+    """
+    Answering is shared by all providers: each one sets `retrieval_chain` (a
+    BaseRetrievalChain, see app.chains.retrieval_chain) and `ingest_chain` in create(),
+    and the query is embedded once here and reused for the answer cache lookup and the search.
+    """
+    def __init__(self):
+        # Set during asynchronous initialization
+        self.retrieval_chain = None
+        # Semantic answer cache in front of answer_query
+        self.answer_cache = SemanticAnswerCache(
+            threshold=settings.ANSWER_CACHE_SIMILARITY_THRESHOLD,
+            max_entries=settings.ANSWER_CACHE_MAX_ENTRIES,
+            ttl=settings.ANSWER_CACHE_TTL,
+        ) if settings.ANSWER_CACHE_ENABLED else None
+        # Identical questions arriving while one is in flight share its execution
+        self.single_flight = SingleFlight()
+
     async def answer_query(self, query: str) -> dict:
         """Process the query using the provider's retrieval chain and return the result."""
+        result, query_vector = await self.single_flight.do(normalize_query(query), lambda: self._answer_query(query))
+        # Every caller's query is logged, including coalesced and cached ones
+        await self.log_query(query, query_vector)
+        return {**result, "query": query}
+
+    async def _answer_query(self, query: str) -> tuple:
+        generation = await self._answer_cache_generation()
+        query_vector = await self._embed_query(query)
+        cached = self._cached_answer(query_vector)
+        if cached is not None:
+            return cached, query_vector
+
+        result = await answer_query(query, self.retrieval_chain, query_vector)
+        await self._store_answer(query_vector, result, generation)
+        return result, query_vector
+
+    async def stream_answer(self, query: str) -> AsyncIterator[dict]:
+        """Stream the answer for the query as retrieval, token and done events."""
+        generation = await self._answer_cache_generation()
+        query_vector = await self._embed_query(query)
+        cached = self._cached_answer(query_vector)
+        if cached is not None:
+            yield {"event": "retrieval", "data": {"documents": 0, "cached": True}}
+            yield {"event": "token", "data": cached["result"]}
+            await self.log_query(query, query_vector)
+            yield {"event": "done", "data": {"result": cached["result"]}}
+            return
+
+        async for event in stream_answer(query, self.retrieval_chain, query_vector):
+            if event["event"] == "done":
+                await self._store_answer(query_vector, {"query": query, "result": event["data"]["result"]}, generation)
+                await self.log_query(query, query_vector)
+            yield event
+
+    async def _embed_query(self, query: str) -> List[float]:
+        with track_stage("embedding"):
+            return await self.retrieval_chain.embeddings.aembed_query(query)
+
+    async def _answer_cache_generation(self):
+        """
+        Brings the answer cache up to date with the index, which other workers may have
+        changed (see ChunkRegistry.generation), and returns the generation to store under.
+        """
+        if self.answer_cache is None:
+            return None
+        self.answer_cache.sync(await asyncio.to_thread(self.ingest_chain.registry.generation))
+        return self.answer_cache.generation
+
+    async def _store_answer(self, query_vector: List[float], answer: dict, generation) -> None:
+        if self.answer_cache is None:
+            return
+        # Drops the answer if the index changed while it was computed
+        self.answer_cache.sync(await asyncio.to_thread(self.ingest_chain.registry.generation))
+        self.answer_cache.store(query_vector, answer, generation)
+
+    def _cached_answer(self, query_vector: List[float]):
+        if self.answer_cache is None:
+            return None
+        cached = self.answer_cache.lookup(query_vector)
+        record_cache("answer", cached is not None)
+        return cached
+
+    async def log_query(self, query: str, query_vector: List[float]) -> None:
+        """Called once per answered query with its vector; providers that log queries override it."""
         pass
 
     @abstractmethod
@@ -27,4 +113,18 @@ class BaseProvider(ABC):
     @abstractmethod
     async def search_data(self, query: str, limit: int, radius: float) -> dict:
         """Search for similar data and return"""
-        pass
\ No newline at end of file
+        pass
+
+    @abstractmethod
+    async def delete_document(self, document_id: str) -> dict:
+        """Delete one chunk from the index by its ID."""
+        pass
+
+    @abstractmethod
+    async def delete_all_documents(self, progress: Callable[..., None] = lambda **progress: None) -> dict:
+        """Delete every chunk in the index, reporting progress fields as it goes."""
+        pass
+
+    async def close(self) -> None:
+        """Release background tasks and connections held by the provider."""
+        pass
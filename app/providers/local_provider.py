@@ -0,0 +1,118 @@
+import json
+import os
+import asyncio
+import logging
+from typing import Optional
+from fastapi import UploadFile
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models import BaseChatModel
+from .base import BaseProvider
+from app.config import settings
+from app.utils.metrics import record_cache, track_stage
+from app.utils.lazy import AsyncLazy
+from app.utils.translation_cache import create_translation_cache
+from app.utils.chunk_registry import create_chunk_registry
+from app.utils.http_client import create_http_client
+from app.chains import *
+
+logger = logging.getLogger(__name__)
+
+class LocalProvider(BaseProvider):
+    """
+    Provider that serves a tenant entirely in-process: chunks and vectors live in a
+    NumPy-backed LocalVectorStore persisted under settings.LOCAL_INDEX_DIR, embeddings
+    default to deterministic HashEmbeddings and the LLM defaults to StubChatModel.
+    Pass real `embeddings`/`llm` objects to create() to mix local search with remote models.
+    """
+    def __init__(self, tenant: str):
+        super().__init__()
+        self.tenant = tenant
+        # Pooled keep-alive HTTP client used for URL ingestion
+        self.http_client = create_http_client()
+        # These attributes will be initialized asynchronously
+        self.vector_store = None
+        self.embedding_cache = None
+        self.ingest_chain = None
+        self.translation_chain = None
+        self._cached_faqs = None
+        # Translated FAQs per language, persisted across restarts
+        self.translation_cache = create_translation_cache(tenant, "local")
+
+
+    @classmethod
+    async def create(cls, tenant: str, embeddings: Optional[Embeddings] = None, llm: Optional[BaseChatModel] = None):
+        """
+        Async factory method to initialize all chains upon creation.
+        """
+        instance = cls(tenant)
+        instance.vector_store, embeddings = await initialize_vector_store_local(tenant, embeddings)
+        instance.retrieval_chain = await initialize_retrieval_chain_local(instance.vector_store, embeddings, llm)
+        # The registry lives with the index, so removing the index directory resets both
+        registry = create_chunk_registry(tenant, os.path.join(settings.LOCAL_INDEX_DIR, tenant, "chunks.sqlite3"))
+        instance.ingest_chain = await initialize_ingest_chain(instance.vector_store, instance.http_client, registry, embeddings, add_embedded_documents_local)
+        # Only FAQ translation uses this chain, so it is built on first use
+        instance.translation_chain = AsyncLazy(lambda: initialize_translation_chain_local(llm), name="translation chain")
+        return instance
+
+
+    async def close(self) -> None:
+        await self.ingest_chain.close()
+        if self.translation_cache is not None:
+            await self.translation_cache.close()
+        await self.http_client.aclose()
+
+
+    async def get_faqs(self) -> list:
+        """
+        Returns FAQ headings from the JSON list at settings.LOCAL_FAQ_PATH, if configured.
+        """
+        record_cache("faq", self._cached_faqs is not None)
+        if self._cached_faqs is None:
+            path = settings.LOCAL_FAQ_PATH
+            if path and os.path.exists(path):
+                with track_stage("faq_fetch"), open(path, encoding="utf-8") as f:
+                    self._cached_faqs = json.load(f)
+            else:
+                self._cached_faqs = []
+        return self._cached_faqs
+
+
+    async def translate_faqs(self, target_lang: str = 'en') -> list:
+        faq_texts = await self.get_faqs()
+        if target_lang.lower() == 'en':
+            return faq_texts
+        if self.translation_cache is None:
+            return await self._translate_texts(faq_texts, target_lang)
+        return await self.translation_cache.translate(faq_texts, target_lang, self._translate_texts)
+
+
+    async def _translate_texts(self, texts: list, target_lang: str) -> list:
+        translation_chain = await self.translation_chain.get()
+        with track_stage("translation"):
+            # A few batched calls for the whole list (TRANSLATION_BATCH_*); one entry per
+            # input text, so translations can be cached by source text
+            return await translation_chain.translate(texts, target_lang)
+
+
+    async def transcribe_audio(self, file: UploadFile) -> str:
+        raise NotImplementedError("transcribe_audio is not implemented for LocalProvider.")
+
+
+    async def search_data(self, query: str, limit: int = 100, radius: float = 0.8) -> dict:
+        raise NotImplementedError("search_data is not implemented for LocalProvider.")
+
+
+    async def delete_document(self, document_id: str) -> dict:
+        with track_stage("deletion"):
+            deleted = await asyncio.to_thread(self.vector_store.delete, [document_id])
+        await self.ingest_chain.forget_chunks([document_id])
+        return {"deleted": [{"key": document_id, "succeeded": bool(deleted)}]}
+
+
+    async def delete_all_documents(self, progress=lambda **progress: None) -> dict:
+        # A single delete, since every LocalVectorStore write rewrites the index files
+        ids = self.vector_store.ids
+        progress(stage="deleting", documents_found=len(ids))
+        await asyncio.to_thread(self.vector_store.delete, ids)
+        progress(documents_deleted=len(ids))
+        return {"total_deleted": len(ids)}
@@ -1,28 +1,41 @@
-import requests
 from .base import BaseProvider
 from app.config import settings
+from app.utils.metrics import track_stage
+from app.utils.lazy import AsyncLazy
+from app.utils.refreshing_cache import RefreshingCache
+from app.utils.translation_cache import create_translation_cache
+from app.utils.chunk_registry import create_chunk_registry
+from app.utils.http_client import create_http_client
 from app.chains import *
 import logging
 import asyncio
-import pandas as pd
-import time
 from fastapi import UploadFile
-from openai import OpenAI
-from app.chains.retrieval_chain_zilliz import answer_and_store as answer
+from app.chains.retrieval_chain_zilliz import store_user_query
 
 logger = logging.getLogger(__name__)
 
 class ZillizProvider(BaseProvider):
     def __init__(self):
-        self.client = OpenAI(api_key=settings.OPENAI_API_KEY)
+        super().__init__()
+        # Pooled keep-alive HTTP client shared by Zilliz REST calls, URL ingestion and all model calls
+        self.http_client = create_http_client()
+        from openai import AsyncOpenAI
+        self.client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY, http_client=self.http_client)
         # These will be set during asynchronous initialization
-        self.retrieval_chain = None
+        self.vector_store = None
+        self.embedding_cache = None
         self.ingest_chain = None
         self.translation_chain = None
-        # Initialize caching variables for FAQs
-        self._cached_faqs = None
-        self._cache_timestamp = None
-        self._cache_ttl = 300  # Time-to-live in seconds (e.g., 5 minutes)
+        # FAQs, kept fresh according to WSU_FAQ_CACHE_MODE
+        self.faq_cache = RefreshingCache(
+            self._fetch_faqs,
+            mode=settings.WSU_FAQ_CACHE_MODE,
+            ttl=settings.FAQ_CACHE_TTL,
+            refresh_interval=settings.FAQ_REFRESH_INTERVAL,
+            name="faq",
+        )
+        # Translated FAQs per language, persisted across restarts
+        self.translation_cache = create_translation_cache("wsu", settings.OPENAI_API_CHAT_MODEL_NAME)
 
 
     @classmethod
@@ -31,23 +44,45 @@ class ZillizProvider(BaseProvider):
         Async factory method to initialize all chains upon creation.
         """
         instance = cls()
-        vector_store, cached_embeddings = await initialize_vector_store_zilliz()
-        instance.retrieval_chain = await initialize_retrieval_chain_zilliz(vector_store, cached_embeddings)
-        instance.ingest_chain = await initialize_ingest_chain(vector_store)
-        instance.translation_chain = await initialize_translation_chain_openai_api()
+        instance.vector_store, cached_embeddings, ingest_embeddings, instance.embedding_cache = await initialize_vector_store_zilliz(instance.http_client)
+        instance.retrieval_chain = await initialize_retrieval_chain_zilliz(instance.vector_store, cached_embeddings, instance.http_client)
+        instance.ingest_chain = await initialize_ingest_chain(
+            instance.vector_store, instance.http_client, create_chunk_registry("wsu"), ingest_embeddings, add_embedded_documents_zilliz
+        )
+        # Only FAQ translation uses this chain, so it is built on first use
+        instance.translation_chain = AsyncLazy(lambda: initialize_translation_chain_openai_api(instance.http_client), name="translation chain")
+        if instance.translation_cache is not None:
+            # Pre-translate TRANSLATION_PRELOAD_LANGUAGES whenever a new FAQ list is loaded
+            instance.faq_cache.add_listener(
+                lambda faqs: instance.translation_cache.schedule_pretranslation(faqs, instance._translate_texts)
+            )
+        # In preload mode, FAQs are fetched now and then refreshed in the background
+        await instance.faq_cache.start()
         return instance
 
 
-    async def answer_query(self, query):
-        return await answer(query, self.retrieval_chain)
+    async def close(self) -> None:
+        await self.ingest_chain.close()
+        await self.faq_cache.close()
+        if self.translation_cache is not None:
+            await self.translation_cache.close()
+        # Flush queued user queries before shutting down
+        await self.retrieval_chain.query_log_writer.close()
+        await self.http_client.aclose()
+        if self.embedding_cache is not None:
+            self.embedding_cache.close()
+
+
+    async def log_query(self, query: str, query_vector: list) -> None:
+        # Queued for the user_queries collection with the vector already computed
+        await store_user_query(query, self.retrieval_chain, query_vector)
 
 
     async def get_faqs(self) -> list:
-        current_time = time.time()
-        # Check if the cache exists and is still valid.
-        if self._cached_faqs is not None and (current_time - self._cache_timestamp) < self._cache_ttl:
-            return self._cached_faqs
+        return await self.faq_cache.get()
 
+
+    async def _fetch_faqs(self) -> list:
         logger.info("Retrieving from database")
         payload = {
             "collectionName": "faq_collection",
@@ -58,43 +93,41 @@ class ZillizProvider(BaseProvider):
             "Accept": "application/json",
             "Content-Type": "application/json"
         }
-        response = requests.post(settings.ZILLIZ_URL + "/v2/vectordb/entities/query", json=payload, headers=headers)
-        result = response.json()
-        faq_list = [item["faq"] for item in result.get("data", []) if "faq" in item]
-        
-        # Cache the result and update the timestamp
-        self._cached_faqs = faq_list
-        self._cache_timestamp = current_time
-
-        return faq_list
+        with track_stage("faq_fetch"):
+            response = await self.http_client.post(settings.ZILLIZ_URL + "/v2/vectordb/entities/query", json=payload, headers=headers)
+            # Raise instead of caching an empty list, so a failed refresh keeps the previous FAQs
+            response.raise_for_status()
+            result = response.json()
+        return [item["faq"] for item in result.get("data", []) if "faq" in item]
 
 
     async def translate_faqs(self, target_lang: str = 'en') -> list:
         """
         Translates FAQs to the target language using the translation chain.
         If target language is English, returns FAQs as is.
+        Translations are served from the translation cache when enabled.
         """
         faq_texts = await self.get_faqs()
         if target_lang.lower() == 'en':
             return faq_texts
+        # English FAQs are preloaded or refreshed per WSU_FAQ_CACHE_MODE; use ttl for small,
+        # infrequent user bases where a periodic refresh would add more requests than it saves
+        if self.translation_cache is None:
+            return await self._translate_texts(faq_texts, target_lang)
+        return await self.translation_cache.translate(faq_texts, target_lang, self._translate_texts)
 
-        tasks = [
-            asyncio.to_thread(self.translation_chain.invoke, {"faq": faq, "target_lang": target_lang})
-            for faq in faq_texts
-        ]
-        results = await asyncio.gather(*tasks)
-        translated_faqs = [result.content if hasattr(result, "content") else str(result) for result in results]
-        # Currently not storing translated faqs in cache. Only en faqs
-        # Would make sense to store faqs in cache at server startup and periodicalliy update them instead of at chatbot open request
-        #   For larger user base this would significantly decrease request count
-        #   For smaller and infrequent usage user base, would significantly increase request count
-        #   Consider a toggleable option for this
 
-        return translated_faqs
+    async def _translate_texts(self, texts: list, target_lang: str) -> list:
+        translation_chain = await self.translation_chain.get()
+        with track_stage("translation"):
+            # A few batched calls for the whole list (TRANSLATION_BATCH_*); one entry per
+            # input text, so translations can be cached by source text
+            return await translation_chain.translate(texts, target_lang)
 
     
     async def transcribe_audio(self, file: UploadFile) -> str:
-        return await transcribe_openai_api(self, file)
+        with track_stage("transcription"):
+            return await transcribe_openai_api(self, file)
 
 
     async def search_data(self, query: str, limit: int = 100, radius: float = 0.8) -> dict:
@@ -105,11 +138,14 @@ class ZillizProvider(BaseProvider):
         # 1. Generate embedding
         try:
             logger.info("Generating embedding for query: %s", query)
-            embedding_response = await asyncio.to_thread(
-                self.client.embeddings.create,
-                input=query,
-                model=settings.OPENAI_API_EMBEDDING_MODEL_NAME
-            )
+            dimensions = settings.OPENAI_API_EMBEDDING_DIMENSIONS
+            with track_stage("embedding"):
+                embedding_response = await self.client.embeddings.create(
+                    input=query,
+                    model=settings.OPENAI_API_EMBEDDING_MODEL_NAME,
+                    # Must match the dimension the user_queries vectors were stored with
+                    **({"dimensions": dimensions} if dimensions else {})
+                )
             query_vector = embedding_response.data[0].embedding
             logger.debug("Embedding generated successfully: %s", query_vector[:10])  # partial logging for brevity
         except Exception as e:
@@ -140,13 +176,15 @@ class ZillizProvider(BaseProvider):
         try:
             search_url = f"{settings.ZILLIZ_URL}/v2/vectordb/entities/search"
             logger.info("Sending request to Zilliz URL: %s", search_url)
-            response = requests.post(search_url, json=payload, headers=headers)
+            response = await self.http_client.post(search_url, json=payload, headers=headers)
             response.raise_for_status()
             logger.debug("Response status code: %s", response.status_code)
             result = response.json()
             logger.debug("Response JSON: %s", result)
 
             # 4. Convert response data to a DataFrame
+            #    (pandas is only needed here, so it is imported on the first search)
+            import pandas as pd
             data = result.get("data", [])
             df = pd.DataFrame(data)
             if df.empty or "timestamp" not in df.columns:
@@ -169,4 +207,16 @@ class ZillizProvider(BaseProvider):
             logger.exception("Zilliz query failed")
             raise RuntimeError(f"Zilliz query failed: {e}")
 
-        return {"frequency": total_frequency, "result": aggregated_results}
\ No newline at end of file
+        return {"frequency": total_frequency, "result": aggregated_results}
+
+
+    async def delete_document(self, document_id: str) -> dict:
+        with track_stage("deletion"):
+            result = await delete_document_zilliz(self.vector_store, document_id)
+        await self.ingest_chain.forget_chunks([int(document_id)])
+        return result
+
+
+    async def delete_all_documents(self, progress=lambda **progress: None) -> dict:
+        # One filter-based delete on the server; no IDs are listed
+        return await delete_all_documents_zilliz(self.vector_store, progress)
@@ -0,0 +1,126 @@
+import time
+import logging
+from collections import OrderedDict
+from typing import Optional
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+class SemanticAnswerCache:
+    """
+    In-memory answer cache keyed by query embedding.
+    A lookup hits when a stored query's cosine similarity to the new query is at
+    least `threshold`. Entries expire after `ttl` seconds and the least recently
+    used entry is evicted once `max_entries` is reached.
+
+    Vectors live in a preallocated (max_entries x dim) matrix so a lookup is a
+    single matrix-vector product over the occupied slots.
+
+    The cache is per process. sync() is given the index's content generation, which
+    all workers on the host share, and drops every answer once it has changed.
+    """
+    def __init__(self, threshold: float, max_entries: int, ttl: float):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._matrix = None
+        self._entries = OrderedDict()  # slot -> (answer, created_at), in LRU order
+        self._free_slots = list(range(max_entries))
+        # Bumped on every invalidation so answers computed against old content are not stored
+        self.generation = 0
+        # The content generation seen by the last sync()
+        self.content_generation = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _normalize(vector) -> np.ndarray:
+        vec = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vec)
+        return vec / norm if norm else vec
+
+    def _remove(self, slot: int):
+        del self._entries[slot]
+        self._free_slots.append(slot)
+
+    def _purge_expired(self, now: float):
+        expired = [slot for slot, (_, created_at) in self._entries.items() if now - created_at >= self.ttl]
+        for slot in expired:
+            self._remove(slot)
+
+    def lookup(self, vector) -> Optional[dict]:
+        """Return the cached answer for the closest stored query, or None on a miss."""
+        if not self._entries:
+            self.misses += 1
+            return None
+
+        query = self._normalize(vector)
+        if query.shape[0] != self._matrix.shape[1]:
+            self.misses += 1
+            return None
+
+        slots = np.fromiter(self._entries.keys(), dtype=np.int64, count=len(self._entries))
+        scores = self._matrix[slots] @ query
+        best = int(np.argmax(scores))
+        slot = int(slots[best])
+        answer, created_at = self._entries[slot]
+
+        if scores[best] < self.threshold:
+            self.misses += 1
+            return None
+        if time.time() - created_at >= self.ttl:
+            self._remove(slot)
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(slot)
+        self.hits += 1
+        logger.info("Answer cache hit (similarity %.3f)", scores[best])
+        return answer
+
+    def store(self, vector, answer: dict, generation: int):
+        """
+        Cache an answer. `generation` must be the value of self.generation read
+        before the answer was computed; stale answers are dropped.
+        """
+        if generation != self.generation or self.max_entries <= 0:
+            return
+
+        vec = self._normalize(vector)
+        if self._matrix is None or self._matrix.shape[1] != vec.shape[0]:
+            self._matrix = np.zeros((self.max_entries, vec.shape[0]), dtype=np.float32)
+            self._entries.clear()
+            self._free_slots = list(range(self.max_entries))
+
+        self._purge_expired(time.time())
+        if not self._free_slots:
+            # Evict the least recently used entry
+            slot, _ = self._entries.popitem(last=False)
+            self._free_slots.append(slot)
+            self.evictions += 1
+
+        slot = self._free_slots.pop()
+        self._matrix[slot] = vec
+        self._entries[slot] = (answer, time.time())
+
+    def invalidate(self):
+        """Drop every cached answer, e.g. after the underlying index changed."""
+        self._entries.clear()
+        self._free_slots = list(range(self.max_entries))
+        self.generation += 1
+        logger.info("Answer cache invalidated")
+
+    def sync(self, content_generation: int):
+        """Invalidate if the index content changed since the last call, in this worker or another."""
+        if self.content_generation is not None and content_generation != self.content_generation:
+            self.invalidate()
+        self.content_generation = content_generation
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
@@ -0,0 +1,157 @@
+import asyncio
+import json
+import logging
+import os
+from typing import Awaitable, Callable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+class BatchedWriter:
+    """
+    Background writer that takes JSON-serializable items off the request path.
+    Items are queued in a bounded asyncio.Queue and handed to `flush_fn` in batches
+    of up to `batch_size`, or whatever has accumulated after `flush_interval` seconds.
+
+    When the queue is full (or a flush fails) items are appended to `spill_path`
+    as JSON lines if one is configured, otherwise they are dropped. Spilled items
+    are replayed the next time the writer starts. The spill file is written from a
+    worker thread, never on the event loop.
+    """
+    def __init__(
+        self,
+        flush_fn: Callable[[List[dict]], Awaitable[None]],
+        max_queue_size: int,
+        batch_size: int,
+        flush_interval: float,
+        spill_path: Optional[str] = None,
+        name: str = "writer",
+    ):
+        self.flush_fn = flush_fn
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.spill_path = spill_path
+        self.name = name
+        self._queue = asyncio.Queue(maxsize=max_queue_size)
+        self._task = None
+        self._closed = False
+        # Overflowed items waiting for the spill task, which writes them in order
+        self._pending_spill: List[dict] = []
+        self._spill_task = None
+        self.written = 0
+        self.dropped = 0
+        self.spilled = 0
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    def submit(self, item: dict) -> bool:
+        """Queue an item without waiting. Returns False if it had to be spilled or dropped."""
+        if not self._closed:
+            try:
+                self._queue.put_nowait(item)
+                return True
+            except asyncio.QueueFull:
+                pass
+        self._overflow([item])
+        return False
+
+    async def close(self):
+        """Flush everything still queued and stop the background task."""
+        if self._closed:
+            return
+        self._closed = True
+        if self._task is not None:
+            await self._queue.put(_STOP)
+            await self._task
+        if self._spill_task is not None:
+            await self._spill_task
+        logger.info("%s closed: %s", self.name, self.stats())
+
+    def stats(self) -> dict:
+        return {
+            "queued": self._queue.qsize(),
+            "written": self.written,
+            "dropped": self.dropped,
+            "spilled": self.spilled,
+        }
+
+    def _overflow(self, items: List[dict]):
+        """Hands `items` to the spill task, starting it unless it is already running."""
+        self._pending_spill.extend(items)
+        if self._spill_task is None or self._spill_task.done():
+            self._spill_task = asyncio.create_task(self._drain_spill())
+
+    async def _drain_spill(self):
+        while self._pending_spill:
+            items, self._pending_spill = self._pending_spill, []
+            await asyncio.to_thread(self._spill, items)
+
+    def _spill(self, items: List[dict]):
+        # Runs in a worker thread, one call at a time
+        if self.spill_path:
+            try:
+                with open(self.spill_path, "a", encoding="utf-8") as f:
+                    for item in items:
+                        f.write(json.dumps(item) + "\n")
+                self.spilled += len(items)
+                return
+            except OSError as e:
+                logger.error("%s failed to spill to %s: %s", self.name, self.spill_path, e)
+        self.dropped += len(items)
+        logger.warning("%s dropped %d item(s)", self.name, len(items))
+
+    async def _flush(self, batch: List[dict]):
+        try:
+            await self.flush_fn(batch)
+            self.written += len(batch)
+        except Exception as e:
+            logger.error("%s failed to flush %d item(s): %s", self.name, len(batch), e)
+            self._overflow(batch)
+
+    def _take_spilled(self) -> List[dict]:
+        if not self.spill_path or not os.path.exists(self.spill_path):
+            return []
+        replay_path = self.spill_path + ".replay"
+        os.replace(self.spill_path, replay_path)
+        with open(replay_path, encoding="utf-8") as f:
+            items = [json.loads(line) for line in f if line.strip()]
+        os.remove(replay_path)
+        return items
+
+    async def _replay_spill(self):
+        items = await asyncio.to_thread(self._take_spilled)
+        if not items:
+            return
+        logger.info("%s replaying %d spilled item(s)", self.name, len(items))
+        for i in range(0, len(items), self.batch_size):
+            await self._flush(items[i : i + self.batch_size])
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        try:
+            await self._replay_spill()
+        except Exception as e:
+            logger.error("%s failed to replay spilled items: %s", self.name, e)
+        stop = False
+        while not stop:
+            item = await self._queue.get()
+            if item is _STOP:
+                break
+            batch = [item]
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if item is _STOP:
+                    stop = True
+                    break
+                batch.append(item)
+            await self._flush(batch)
@@ -0,0 +1,170 @@
+import os
+import json
+import sqlite3
+import hashlib
+import logging
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+def chunk_hash(source: str, text: str) -> str:
+    """Fingerprint of a chunk: the same text from another source is a different chunk."""
+    return hashlib.sha256(f"{source}\0{text}".encode("utf-8")).hexdigest()
+
+def content_hash(chunk_hashes: Iterable[str]) -> str:
+    """Fingerprint of a version of a source, from its chunk hashes in order."""
+    return hashlib.sha256("\n".join(chunk_hashes).encode("ascii")).hexdigest()
+
+class ChunkRegistry:
+    """
+    The manifest of what is in the index: the chunks stored for each ingested source
+    (file name or URL), keyed by content hash, with the ID the vector store gave each one,
+    and for each source its kind, the hash of its latest version and when that was ingested.
+    Ingestion uses it to skip chunks that are already stored and to delete a source's stale
+    chunks on re-ingest; listing and deleting sources use it instead of scanning the index.
+    Backed by SQLite in WAL mode, so every worker on the host shares it and it survives
+    restarts; `namespace` keeps tenants that share a file apart. Its content generation,
+    bumped on every change to the index, lets each worker notice changes another one made.
+    IDs are stored as JSON, since Zilliz assigns integer IDs and the other stores strings.
+    """
+    def __init__(self, path: str, namespace: str):
+        self.path = path
+        self.namespace = namespace
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS ingested_chunks ("
+            " namespace TEXT NOT NULL, source TEXT NOT NULL, chunk_hash TEXT NOT NULL, vector_id TEXT NOT NULL,"
+            " PRIMARY KEY (namespace, source, chunk_hash))"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ingested_chunks_vector_id ON ingested_chunks (namespace, vector_id)")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS ingested_sources ("
+            " namespace TEXT NOT NULL, source TEXT NOT NULL, kind TEXT NOT NULL, content_hash TEXT NOT NULL,"
+            " ingested_at REAL NOT NULL, PRIMARY KEY (namespace, source))"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS content_generation ("
+            " namespace TEXT PRIMARY KEY, generation INTEGER NOT NULL)"
+        )
+
+    def get(self, source: str) -> Dict[str, Any]:
+        """Maps the hash of each chunk stored for `source` to its vector store ID."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT chunk_hash, vector_id FROM ingested_chunks WHERE namespace = ? AND source = ?",
+                (self.namespace, source),
+            ).fetchall()
+        return {digest: json.loads(vector_id) for digest, vector_id in rows}
+
+    def add(self, source: str, entries: Sequence[Tuple[str, Any]]) -> None:
+        """Records (chunk hash, vector store ID) pairs just stored for `source`."""
+        if not entries:
+            return
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO ingested_chunks (namespace, source, chunk_hash, vector_id) VALUES (?, ?, ?, ?)",
+                [(self.namespace, source, digest, json.dumps(vector_id)) for digest, vector_id in entries],
+            )
+
+    def remove(self, source: str, hashes: Iterable[str]) -> None:
+        hashes = list(hashes)
+        if not hashes:
+            return
+        with self._lock:
+            self._conn.executemany(
+                "DELETE FROM ingested_chunks WHERE namespace = ? AND source = ? AND chunk_hash = ?",
+                [(self.namespace, source, digest) for digest in hashes],
+            )
+
+    def remove_ids(self, vector_ids: Iterable[Any]) -> None:
+        """Forgets chunks deleted from the index by vector store ID, whatever their source."""
+        vector_ids = [json.dumps(vector_id) for vector_id in vector_ids]
+        if not vector_ids:
+            return
+        with self._lock:
+            self._conn.executemany(
+                "DELETE FROM ingested_chunks WHERE namespace = ? AND vector_id = ?",
+                [(self.namespace, vector_id) for vector_id in vector_ids],
+            )
+
+    def record_source(self, source: str, kind: str, content_hash: str) -> None:
+        """Records that `source` was fully ingested just now, at the version hashed as `content_hash`."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO ingested_sources (namespace, source, kind, content_hash, ingested_at) VALUES (?, ?, ?, ?, ?)",
+                (self.namespace, source, kind, content_hash, time.time()),
+            )
+
+    def list_sources(self) -> List[dict]:
+        """
+        Every source with chunks in the index, most recently ingested first, with its chunk count.
+        A source whose first ingestion failed part-way is listed too, without kind, hash or timestamp.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT c.source, COUNT(*), s.kind, s.content_hash, s.ingested_at FROM ingested_chunks c"
+                " LEFT JOIN ingested_sources s ON s.namespace = c.namespace AND s.source = c.source"
+                " WHERE c.namespace = ? GROUP BY c.source ORDER BY s.ingested_at DESC, c.source",
+                (self.namespace,),
+            ).fetchall()
+        return [
+            {"source": source, "kind": kind, "chunks": chunks, "content_hash": digest, "ingested_at": ingested_at}
+            for source, chunks, kind, digest, ingested_at in rows
+        ]
+
+    def remove_source(self, source: str) -> None:
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute("DELETE FROM ingested_chunks WHERE namespace = ? AND source = ?", (self.namespace, source))
+                self._conn.execute("DELETE FROM ingested_sources WHERE namespace = ? AND source = ?", (self.namespace, source))
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def clear(self) -> None:
+        """Forgets every source of this namespace, after the index was emptied."""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute("DELETE FROM ingested_chunks WHERE namespace = ?", (self.namespace,))
+                self._conn.execute("DELETE FROM ingested_sources WHERE namespace = ?", (self.namespace,))
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def generation(self) -> int:
+        """How many times this namespace's index content has changed, counted across all workers."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT generation FROM content_generation WHERE namespace = ?", (self.namespace,)
+            ).fetchone()
+        return row[0] if row else 0
+
+    def bump_generation(self) -> None:
+        """Records a change to the index content (ingestion or deletion)."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO content_generation (namespace, generation) VALUES (?, 1)"
+                " ON CONFLICT (namespace) DO UPDATE SET generation = generation + 1",
+                (self.namespace,),
+            )
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+def create_chunk_registry(tenant: str, path: Optional[str] = None) -> ChunkRegistry:
+    """Returns `tenant`'s chunk registry, stored at `path` (INGEST_REGISTRY_PATH by default)."""
+    return ChunkRegistry(path or settings.INGEST_REGISTRY_PATH, namespace=tenant)
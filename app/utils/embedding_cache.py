@@ -0,0 +1,204 @@
+import os
+import sqlite3
+import threading
+import time
+import logging
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Iterator, List, Optional, Sequence, Tuple
+from langchain_core.stores import ByteStore
+
+if TYPE_CHECKING:
+    from langchain.embeddings import CacheBackedEmbeddings
+
+logger = logging.getLogger(__name__)
+
+class LRUMemoryByteStore(ByteStore):
+    """
+    Per-process in-memory byte store with LRU eviction once `max_entries` is reached.
+    """
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def mget(self, keys: Sequence[str]) -> List[Optional[bytes]]:
+        values = []
+        with self._lock:
+            for key in keys:
+                value = self._data.get(key)
+                if value is None:
+                    self.misses += 1
+                else:
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                values.append(value)
+        return values
+
+    def mset(self, key_value_pairs: Sequence[Tuple[str, bytes]]) -> None:
+        with self._lock:
+            for key, value in key_value_pairs:
+                self._data[key] = value
+                self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def mdelete(self, keys: Sequence[str]) -> None:
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+
+    def yield_keys(self, prefix: Optional[str] = None) -> Iterator[str]:
+        with self._lock:
+            keys = list(self._data.keys())
+        for key in keys:
+            if prefix is None or key.startswith(prefix):
+                yield key
+
+    def close(self) -> None:
+        pass
+
+    def stats(self) -> dict:
+        return {
+            "backend": "memory",
+            "entries": len(self._data),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+class SQLiteByteStore(ByteStore):
+    """
+    On-disk byte store backed by a single SQLite file, with LRU eviction once
+    `max_entries` is reached. WAL mode lets every uvicorn/gunicorn worker on the
+    host share the same file, and entries survive restarts. Stores that share a file
+    need different `table` names.
+    A hit refreshes an entry's last_access only once it is `touch_interval` seconds old,
+    so repeated reads of hot entries do not each write to the file.
+    Hit/miss/eviction counters are per process.
+    """
+    def __init__(self, path: str, max_entries: int, table: str = "embeddings", touch_interval: float = 60.0):
+        self.path = path
+        self.max_entries = max_entries
+        self.table = table
+        self.touch_interval = touch_interval
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} ("
+            " key TEXT PRIMARY KEY, value BLOB NOT NULL, last_access REAL NOT NULL)"
+        )
+        self._conn.execute(f"CREATE INDEX IF NOT EXISTS {table}_last_access ON {table} (last_access)")
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def mget(self, keys: Sequence[str]) -> List[Optional[bytes]]:
+        if not keys:
+            return []
+        placeholders = ",".join("?" * len(keys))
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT key, value, last_access FROM {self.table} WHERE key IN ({placeholders})", list(keys)
+            ).fetchall()
+            found = {key: value for key, value, _ in rows}
+            now = time.time()
+            stale = [key for key, _, last_access in rows if now - last_access >= self.touch_interval]
+            if stale:
+                self._conn.executemany(
+                    f"UPDATE {self.table} SET last_access = ? WHERE key = ?",
+                    [(now, key) for key in stale],
+                )
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return [found.get(key) for key in keys]
+
+    def mset(self, key_value_pairs: Sequence[Tuple[str, bytes]]) -> None:
+        if not key_value_pairs:
+            return
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.executemany(
+                    f"INSERT OR REPLACE INTO {self.table} (key, value, last_access) VALUES (?, ?, ?)",
+                    [(key, value, now) for key, value in key_value_pairs],
+                )
+                (count,) = self._conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()
+                overflow = count - self.max_entries
+                if overflow > 0:
+                    self._conn.execute(
+                        f"DELETE FROM {self.table} WHERE key IN ("
+                        f" SELECT key FROM {self.table} ORDER BY last_access LIMIT ?)",
+                        (overflow,),
+                    )
+                    self.evictions += overflow
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def mdelete(self, keys: Sequence[str]) -> None:
+        with self._lock:
+            self._conn.executemany(f"DELETE FROM {self.table} WHERE key = ?", [(key,) for key in keys])
+
+    def yield_keys(self, prefix: Optional[str] = None) -> Iterator[str]:
+        with self._lock:
+            if prefix is None:
+                rows = self._conn.execute(f"SELECT key FROM {self.table}").fetchall()
+            else:
+                rows = self._conn.execute(
+                    f"SELECT key FROM {self.table} WHERE substr(key, 1, ?) = ?", (len(prefix), prefix)
+                ).fetchall()
+        for (key,) in rows:
+            yield key
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def stats(self) -> dict:
+        with self._lock:
+            (count,) = self._conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()
+        return {
+            "backend": "sqlite",
+            "path": self.path,
+            "entries": count,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+def create_embedding_cache(backend: str, path: str, max_entries: int) -> ByteStore:
+    """
+    Returns the byte store for the configured embedding cache backend ("sqlite" or "memory").
+    """
+    if backend == "sqlite":
+        return SQLiteByteStore(path, max_entries)
+    if backend == "memory":
+        return LRUMemoryByteStore(max_entries)
+    raise ValueError(f"Unknown embedding cache backend: {backend}")
+
+def create_cached_embeddings(embeddings, byte_store: ByteStore, model_name: str, dimensions: Optional[int]) -> "CacheBackedEmbeddings":
+    """
+    Wraps `embeddings` so both document and query embeddings are cached in `byte_store`.
+    Keys are namespaced by model name and dimension so switching models never serves stale vectors.
+    """
+    # `langchain.embeddings` pulls in most of the langchain package, so it is imported on first use
+    from langchain.embeddings import CacheBackedEmbeddings
+
+    namespace = f"{model_name}:{dimensions or 'default'}:"
+    return CacheBackedEmbeddings.from_bytes_store(
+        embeddings,
+        byte_store,
+        namespace=namespace,
+        query_embedding_cache=True,
+    )
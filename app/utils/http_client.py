@@ -0,0 +1,26 @@
+from typing import Optional
+import httpx
+from app.config import settings
+from app.utils.tracing import trace_http_request, trace_http_response
+
+def create_http_client(transport: Optional[httpx.AsyncBaseTransport] = None) -> httpx.AsyncClient:
+    """
+    Creates a pooled async HTTP client with keep-alive connections.
+    Pool limits and timeouts come from settings; the owner is responsible for closing it.
+    Each attempt (including SDK retries) is recorded as a span in detailed request traces.
+    `transport` replaces the network transport (e.g. with stand-ins for load tests).
+    """
+    return httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=settings.HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY,
+        ),
+        timeout=httpx.Timeout(
+            settings.HTTP_READ_TIMEOUT,
+            connect=settings.HTTP_CONNECT_TIMEOUT,
+        ),
+        follow_redirects=True,
+        transport=transport,
+        event_hooks={"request": [trace_http_request], "response": [trace_http_response]},
+    )
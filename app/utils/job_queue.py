@@ -0,0 +1,158 @@
+import time
+import uuid
+import secrets
+import asyncio
+import logging
+from collections import OrderedDict
+from typing import Awaitable, Callable, List, Optional
+from app.utils.tracing import current_span, current_trace
+
+logger = logging.getLogger(__name__)
+
+class JobQueueFull(Exception):
+    """Raised by JobQueue.submit when `max_queue_size` jobs are already waiting."""
+
+class Job:
+    """
+    A unit of background work and its progress; status is queued, running, succeeded or
+    failed. `run(job)` does the work and may call job.update(...) to report progress;
+    its return value becomes `result`. `cleanup()`, if given, releases what the job owns
+    (e.g. a spooled upload) once it ends, or when it is dropped without running.
+    `token` is a secret for whoever submitted the job to poll it with; it is not part of to_dict().
+    """
+    def __init__(self, kind: str, source: str, run: Callable[["Job"], Awaitable[dict]],
+                 cleanup: Optional[Callable[[], None]] = None):
+        self.job_id = uuid.uuid4().hex
+        self.token = secrets.token_urlsafe(16)
+        self.kind = kind
+        self.source = source
+        self.status = "queued"
+        self.progress = {}
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self._run = run
+        self._cleanup = cleanup
+
+    def update(self, **progress):
+        self.progress.update(progress)
+
+    @property
+    def done(self) -> bool:
+        return self.status in ("succeeded", "failed")
+
+    def to_dict(self) -> dict:
+        return {
+            "job_id": self.job_id,
+            "kind": self.kind,
+            "source": self.source,
+            "status": self.status,
+            "progress": dict(self.progress),
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+class JobQueue:
+    """
+    Bounded queue of background jobs run by `max_workers` asyncio workers, so at most
+    that many jobs run at once however many are submitted. submit() returns at once;
+    callers poll get(job_id) for progress. Up to `max_finished_jobs` finished jobs are
+    kept for polling, oldest dropped first. Workers start on the first submit.
+    """
+    def __init__(self, max_workers: int, max_queue_size: int, max_finished_jobs: int, name: str = "jobs"):
+        self.max_workers = max_workers
+        self.max_finished_jobs = max_finished_jobs
+        self.name = name
+        self._queue = asyncio.Queue(maxsize=max_queue_size)
+        self._jobs = OrderedDict()  # job_id -> Job, in submission order
+        self._workers: List[asyncio.Task] = []
+        self.succeeded = 0
+        self.failed = 0
+
+    def submit(self, kind: str, source: str, run: Callable[[Job], Awaitable[dict]],
+               cleanup: Optional[Callable[[], None]] = None) -> Job:
+        job = Job(kind, source, run, cleanup)
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            raise JobQueueFull(f"{self.name} queue is full ({self._queue.maxsize} jobs waiting)") from None
+        self._jobs[job.job_id] = job
+        if not self._workers:
+            self._workers = [asyncio.create_task(self._work()) for _ in range(self.max_workers)]
+        logger.info("%s: queued %s job %s for %s", self.name, kind, job.job_id, source)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    def list(self, limit: Optional[int] = None) -> List[dict]:
+        jobs = list(self._jobs.values())
+        jobs.reverse()  # newest first
+        return [job.to_dict() for job in jobs[:limit]]
+
+    def stats(self) -> dict:
+        return {
+            "queued": self._queue.qsize(),
+            "running": sum(1 for job in self._jobs.values() if job.status == "running"),
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+        }
+
+    async def _work(self):
+        # Workers outlive the request whose submit started them
+        current_trace.set(None)
+        current_span.set(None)
+        while True:
+            job = await self._queue.get()
+            await self._execute(job)
+
+    async def _execute(self, job: Job):
+        job.status, job.started_at = "running", time.time()
+        try:
+            job.result = await job._run(job)
+            job.status = "succeeded"
+            self.succeeded += 1
+        except Exception as e:
+            logger.error("%s: %s job %s for %s failed: %s", self.name, job.kind, job.job_id, job.source, e)
+            job.status, job.error = "failed", str(e)
+            self.failed += 1
+        finally:
+            job.finished_at = time.time()
+            # Release the payload (e.g. uploaded file contents) the closure holds
+            job._run = None
+            self._prune()
+            await self._release(job)
+
+    async def _release(self, job: Job):
+        cleanup, job._cleanup = job._cleanup, None
+        if cleanup is None:
+            return
+        try:
+            await asyncio.to_thread(cleanup)
+        except Exception as e:
+            logger.warning("%s: cleanup of %s job %s failed: %s", self.name, job.kind, job.job_id, e)
+
+    def _prune(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job.done]
+        for job_id in finished[: max(0, len(finished) - self.max_finished_jobs)]:
+            del self._jobs[job_id]
+
+    async def close(self) -> None:
+        """
+        Stops the workers. Jobs still queued or running are marked failed; queued jobs
+        that never started are cleaned up here, running ones as they are cancelled.
+        """
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        for job in list(self._jobs.values()):
+            if not job.done:
+                job.status, job.error, job.finished_at = "failed", "Server shut down before the job finished", time.time()
+                job._run = None
+                await self._release(job)
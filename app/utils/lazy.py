@@ -0,0 +1,37 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable, Generic, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+class AsyncLazy(Generic[T]):
+    """
+    Builds a value with an async factory on the first `get()` and caches it.
+    Concurrent first callers share a single build; a failed build is retried on the next call.
+    """
+    def __init__(self, factory: Callable[[], Awaitable[T]], name: str = "resource"):
+        self._factory = factory
+        self._name = name
+        self._value: Optional[T] = None
+        self._built = False
+        self._lock = asyncio.Lock()
+
+    @property
+    def built(self) -> bool:
+        return self._built
+
+    def peek(self) -> Optional[T]:
+        """Returns the value if it has been built, without building it."""
+        return self._value
+
+    async def get(self) -> T:
+        if self._built:
+            return self._value
+        async with self._lock:
+            if not self._built:
+                logger.info("Building %s on first use", self._name)
+                self._value = await self._factory()
+                self._built = True
+        return self._value
@@ -0,0 +1,204 @@
+import os
+import time
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterable, Optional
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+)
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from app.utils.tracing import increment, trace_span
+
+logger = logging.getLogger(__name__)
+
+# Tenant ("wichita", "wsu") the current request or background task belongs to.
+# Set by MetricsMiddleware per request and by tenant_context() around provider startup,
+# so tasks a provider spawns (e.g. the user_queries writer) inherit it.
+current_tenant: ContextVar[str] = ContextVar("current_tenant", default="none")
+
+# Covers cache hits and in-process work (ms) up to slow LLM generations and ingestions (minutes)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+REQUEST_DURATION = Histogram(
+    "chatbot_request_duration_seconds",
+    "HTTP request latency by tenant and route template.",
+    ["tenant", "method", "route", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    "chatbot_requests_in_flight",
+    "HTTP requests currently being served.",
+    ["tenant"],
+    multiprocess_mode="livesum",
+)
+STAGE_DURATION = Histogram(
+    "chatbot_stage_duration_seconds",
+    "Latency of pipeline stages (embedding, retrieval, generation, query_log, faq_fetch, translation, ingestion, deletion, transcription).",
+    ["tenant", "stage"],
+    buckets=LATENCY_BUCKETS,
+)
+STAGE_ERRORS = Counter(
+    "chatbot_stage_errors_total",
+    "Pipeline stages that raised an exception.",
+    ["tenant", "stage"],
+)
+CACHE_REQUESTS = Counter(
+    "chatbot_cache_requests_total",
+    "Answer, FAQ and translation cache lookups by result (hit/miss).",
+    ["tenant", "cache", "result"],
+)
+LLM_TOKENS = Counter(
+    "chatbot_llm_tokens_total",
+    "LLM tokens reported by the model, by stage and type (input/output).",
+    ["tenant", "stage", "type"],
+)
+
+@contextmanager
+def tenant_context(tenant: str):
+    """
+    Labels all metrics recorded inside the block (and tasks created in it) with `tenant`.
+    """
+    token = current_tenant.set(tenant)
+    try:
+        yield
+    finally:
+        current_tenant.reset(token)
+
+@contextmanager
+def track_stage(stage: str, tenant: Optional[str] = None):
+    """
+    Times the block into chatbot_stage_duration_seconds and counts exceptions raised in it.
+    The stage is also recorded in the current request's trace (Server-Timing and span tree).
+    """
+    tenant = tenant or current_tenant.get()
+    start = time.perf_counter()
+    with trace_span(stage):
+        try:
+            yield
+        except Exception:
+            STAGE_ERRORS.labels(tenant, stage).inc()
+            raise
+        finally:
+            STAGE_DURATION.labels(tenant, stage).observe(time.perf_counter() - start)
+
+def record_cache(cache: str, hit: bool, tenant: Optional[str] = None) -> None:
+    CACHE_REQUESTS.labels(tenant or current_tenant.get(), cache, "hit" if hit else "miss").inc()
+
+def record_llm_usage(stage: str, message, tenant: Optional[str] = None) -> None:
+    """
+    Adds the token usage LangChain attaches to a model response (or the last streamed chunk)
+    to the token counters and to the open span of a detailed trace.
+    Messages without usage metadata are ignored.
+    """
+    usage = getattr(message, "usage_metadata", None)
+    if not usage:
+        return
+    tenant = tenant or current_tenant.get()
+    input_tokens, output_tokens = usage.get("input_tokens", 0), usage.get("output_tokens", 0)
+    LLM_TOKENS.labels(tenant, stage, "input").inc(input_tokens)
+    LLM_TOKENS.labels(tenant, stage, "output").inc(output_tokens)
+    increment(input_tokens=input_tokens, output_tokens=output_tokens)
+
+class ProviderCacheCollector:
+    """
+    Exports the counters the caches already keep (SemanticAnswerCache, the translation
+    cache and the embedding byte stores) at scrape time, so cache hot paths carry no extra cost.
+    """
+    def __init__(self, providers: Dict[str, object]):
+        self.providers = providers
+
+    def collect(self) -> Iterable:
+        entries = GaugeMetricFamily("chatbot_cache_entries", "Entries held by each cache.", labels=["tenant", "cache"])
+        embedding_lookups = CounterMetricFamily(
+            "chatbot_embedding_cache_requests",
+            "Embedding cache lookups by result (hit/miss). Per process.",
+            labels=["tenant", "result"],
+        )
+        evictions = CounterMetricFamily("chatbot_cache_evictions", "Entries evicted from each cache.", labels=["tenant", "cache"])
+        for tenant, provider in self.providers.items():
+            answer_cache = getattr(provider, "answer_cache", None)
+            if answer_cache is not None:
+                stats = answer_cache.stats()
+                entries.add_metric([tenant, "answer"], stats["entries"])
+                evictions.add_metric([tenant, "answer"], stats["evictions"])
+            translation_cache = getattr(provider, "translation_cache", None)
+            if translation_cache is not None:
+                stats = translation_cache.stats()
+                entries.add_metric([tenant, "translation"], stats["entries"])
+                evictions.add_metric([tenant, "translation"], stats["evictions"])
+            embedding_cache = getattr(provider, "embedding_cache", None)
+            if embedding_cache is not None:
+                stats = embedding_cache.stats()
+                entries.add_metric([tenant, "embedding"], stats["entries"])
+                evictions.add_metric([tenant, "embedding"], stats["evictions"])
+                embedding_lookups.add_metric([tenant, "hit"], stats["hits"])
+                embedding_lookups.add_metric([tenant, "miss"], stats["misses"])
+        yield entries
+        yield embedding_lookups
+        yield evictions
+
+def register_provider_collector(providers: Dict[str, object]) -> ProviderCacheCollector:
+    collector = ProviderCacheCollector(providers)
+    REGISTRY.register(collector)
+    return collector
+
+def unregister_provider_collector(collector: ProviderCacheCollector) -> None:
+    REGISTRY.unregister(collector)
+
+def render_metrics() -> bytes:
+    """
+    Returns the Prometheus text exposition for this process, or for all workers when
+    PROMETHEUS_MULTIPROC_DIR is set (gunicorn/uvicorn with several workers).
+    """
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        from prometheus_client import multiprocess
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry)
+    return generate_latest(REGISTRY)
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware that tracks in-flight requests and request latency per tenant
+    and route template, and sets current_tenant for everything the request runs.
+    The tenant is the first path segment when it is one of `tenants`.
+    """
+    def __init__(self, app, tenants: Iterable[str]):
+        self.app = app
+        self.tenants = frozenset(tenants)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        segment = scope["path"].split("/", 2)[1]
+        tenant = segment if segment in self.tenants else "none"
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        in_flight = REQUESTS_IN_FLIGHT.labels(tenant)
+        in_flight.inc()
+        token = current_tenant.set(tenant)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # Label by route template, not raw path, to keep cardinality bounded
+            route = getattr(scope.get("route"), "path", "unmatched")
+            REQUEST_DURATION.labels(tenant, scope["method"], route, str(status)).observe(time.perf_counter() - start)
+            in_flight.dec()
+            current_tenant.reset(token)
+
@@ -0,0 +1,60 @@
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+from typing import Callable, Optional, TypeVar
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+def get_process_pool() -> Optional[ProcessPoolExecutor]:
+    """
+    Returns the shared process pool for CPU-bound work, creating it on first use,
+    or None when INGEST_PROCESS_POOL_SIZE is 0.
+    Workers are spawned rather than forked, since the server process already runs
+    threads (executor, Mongo monitors) that a fork would copy mid-operation. A spawned
+    worker re-imports the caller's module, so scripts that ingest directly need an
+    `if __name__ == "__main__":` guard.
+    """
+    global _pool
+    if settings.INGEST_PROCESS_POOL_SIZE <= 0:
+        return None
+    if _pool is None:
+        logger.info("Starting process pool with %d workers", settings.INGEST_PROCESS_POOL_SIZE)
+        _pool = ProcessPoolExecutor(
+            max_workers=settings.INGEST_PROCESS_POOL_SIZE,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _pool
+
+async def run_in_process(fn: Callable[..., T], *args, **kwargs) -> T:
+    """
+    Runs `fn(*args, **kwargs)` in the process pool, keeping CPU-bound work off the event
+    loop and out of the GIL the loop needs. `fn` and its arguments must be picklable
+    (module-level functions and plain data). Falls back to a thread when the pool is off.
+    """
+    global _pool
+    pool = get_process_pool()
+    if pool is None:
+        return await asyncio.to_thread(fn, *args, **kwargs)
+    try:
+        return await asyncio.get_running_loop().run_in_executor(pool, partial(fn, *args, **kwargs))
+    except BrokenProcessPool:
+        # A worker died (e.g. killed for memory); start a fresh pool for later calls
+        logger.error("Process pool broke while running %s; restarting it", getattr(fn, "__name__", fn))
+        if _pool is pool:
+            _pool = None
+            pool.shutdown(wait=False, cancel_futures=True)
+        raise
+
+def shutdown_process_pool() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=True, cancel_futures=True)
+        _pool = None
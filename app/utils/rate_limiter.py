@@ -0,0 +1,53 @@
+import time
+import random
+import asyncio
+from typing import Optional
+
+# Longest backoff between retries when the server gives no Retry-After
+MAX_BACKOFF = 60.0
+
+class TokenRateLimiter:
+    """
+    Token bucket holding up to one minute of `tokens_per_minute`, refilled continuously.
+    acquire(n) waits until n tokens are available and takes them; callers are served in
+    arrival order, so a large request is not starved by smaller ones. A limit of 0 or
+    less disables limiting.
+    """
+    def __init__(self, tokens_per_minute: int):
+        self.capacity = float(tokens_per_minute)
+        self.rate = self.capacity / 60
+        self.available = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, tokens: int) -> None:
+        if self.capacity <= 0:
+            return
+        # A request over a minute's budget would otherwise never fit
+        tokens = min(float(tokens), self.capacity)
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.available = min(self.capacity, self.available + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.available >= tokens:
+                    self.available -= tokens
+                    return
+                await asyncio.sleep((tokens - self.available) / self.rate)
+
+def rate_limit_delay(error: BaseException, attempt: int) -> Optional[float]:
+    """
+    Seconds to wait before retry `attempt` (0-based) after `error`, or None when the error
+    is not a rate limit (HTTP 429). Honours a numeric Retry-After header, otherwise backs off
+    exponentially up to MAX_BACKOFF, with jitter so concurrent callers don't retry in step.
+    """
+    response = getattr(error, "response", None)
+    status = getattr(error, "status_code", None) or getattr(response, "status_code", None)
+    if status != 429:
+        return None
+    headers = getattr(response, "headers", None) or {}
+    try:
+        delay = float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        delay = min(MAX_BACKOFF, 2.0 ** attempt)
+    return delay * (1 + random.random() / 4)
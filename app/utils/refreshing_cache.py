@@ -0,0 +1,115 @@
+import time
+import asyncio
+import logging
+from typing import Awaitable, Callable, Generic, Optional, TypeVar
+from app.utils.metrics import record_cache
+from app.utils.tracing import current_span, current_trace
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+CACHE_MODES = ("ttl", "swr", "preload")
+
+class RefreshingCache(Generic[T]):
+    """
+    Caches the value returned by an async `loader`. The mode decides who pays for reloading it:
+      - "ttl": the first request after `ttl` seconds reloads it inline.
+      - "swr" (stale-while-revalidate): once the value is older than `ttl`, requests keep getting
+        the stale value while a single background refresh runs.
+      - "preload": `start()` loads the value up front and a background task refreshes it every
+        `refresh_interval` seconds; expired values are also served stale as in "swr".
+    In every mode concurrent loads are coalesced into one. Requests only wait while there is no
+    value at all. A failed background refresh keeps the previous value.
+    """
+    def __init__(
+        self,
+        loader: Callable[[], Awaitable[T]],
+        mode: str = "ttl",
+        ttl: float = 300,
+        refresh_interval: float = 300,
+        name: str = "cache",  # also the `cache` label of chatbot_cache_requests_total
+    ):
+        if mode not in CACHE_MODES:
+            raise ValueError(f"Unknown cache mode {mode!r}; expected one of {', '.join(CACHE_MODES)}")
+        self._loader = loader
+        self.mode = mode
+        self.ttl = ttl
+        self.refresh_interval = refresh_interval
+        self.name = name
+        self._value: Optional[T] = None
+        self._loaded_at: Optional[float] = None
+        self._load_task: Optional[asyncio.Task] = None
+        self._refresh_loop: Optional[asyncio.Task] = None
+        self._listeners = []
+
+    def add_listener(self, callback):
+        """Register a callback invoked with the new value after every successful load."""
+        self._listeners.append(callback)
+
+    def _expired(self) -> bool:
+        return time.monotonic() - self._loaded_at >= self.ttl
+
+    async def _load(self) -> T:
+        # Runs as its own task; detach it from the trace of the request that started it,
+        # which may have finished before the load does
+        current_trace.set(None)
+        current_span.set(None)
+        value = await self._loader()
+        self._value, self._loaded_at = value, time.monotonic()
+        for callback in self._listeners:
+            callback(value)
+        return value
+
+    def _start_load(self) -> asyncio.Task:
+        if self._load_task is None or self._load_task.done():
+            self._load_task = asyncio.create_task(self._load())
+            self._load_task.add_done_callback(self._log_failure)
+        return self._load_task
+
+    def _log_failure(self, task: asyncio.Task):
+        if not task.cancelled() and task.exception() is not None and self._loaded_at is not None:
+            # Only background refreshes end up here unobserved; the stale value stays in use
+            logger.warning("Refreshing the %s cache failed, serving the previous value: %s", self.name, task.exception())
+
+    async def get(self) -> T:
+        if self._loaded_at is not None and (self.mode != "ttl" or not self._expired()):
+            if self._expired():
+                self._start_load()
+            record_cache(self.name, True)
+            return self._value
+        record_cache(self.name, False)
+        # Shield so a disconnecting caller does not cancel the load for the others
+        return await asyncio.shield(self._start_load())
+
+    async def start(self) -> None:
+        """
+        In "preload" mode, loads the value and starts the periodic refresh. A failed preload
+        is logged and the value is loaded on first use instead. No-op in the other modes.
+        """
+        if self.mode != "preload":
+            return
+        try:
+            await self._start_load()
+        except Exception as e:
+            logger.warning("Preloading the %s cache failed, loading on first use instead: %s", self.name, e)
+        self._refresh_loop = asyncio.create_task(self._refresh_periodically())
+
+    async def _refresh_periodically(self):
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            try:
+                await self._start_load()
+            except Exception:
+                # Already logged by _log_failure when there is a previous value
+                if self._loaded_at is None:
+                    logger.exception("Loading the %s cache failed", self.name)
+
+    async def close(self) -> None:
+        for task in (self._refresh_loop, self._load_task):
+            if task is not None and not task.done():
+                task.cancel()
+                try:
+                    await task
+                except (asyncio.CancelledError, Exception):
+                    pass
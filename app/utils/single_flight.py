@@ -0,0 +1,45 @@
+import asyncio
+import logging
+import re
+from typing import Awaitable, Callable, Hashable
+
+logger = logging.getLogger(__name__)
+
+def normalize_query(query: str) -> str:
+    """Case- and whitespace-insensitive key for coalescing identical questions."""
+    return re.sub(r"\s+", " ", query).strip().lower()
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls that share a key.
+    The first caller for a key starts the work in a task; callers arriving while
+    it is still running await the same task instead of starting their own.
+    """
+    def __init__(self):
+        self._in_flight = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable]):
+        self.calls += 1
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda t: self._forget(key, t))
+        else:
+            self.coalesced += 1
+            logger.debug("Coalesced in-flight request (%d coalesced so far)", self.coalesced)
+        # Shield so one waiter disconnecting does not cancel the work for the others
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: asyncio.Future):
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+
+    def stats(self) -> dict:
+        return {
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._in_flight),
+        }
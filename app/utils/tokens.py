@@ -0,0 +1,4 @@
+# Rough tokens for a text without loading a tokenizer (~4 characters per token for English).
+# Used to size translation batches and embedding batches, and to charge the embedding rate limiter.
+def estimate_tokens(text: str) -> int:
+    return len(text) // 4 + 1
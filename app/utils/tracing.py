@@ -0,0 +1,257 @@
+import time
+import uuid
+import logging
+import threading
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterable, List, Optional
+from starlette.datastructures import MutableHeaders
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Server-Timing metric name for each pipeline stage (see metrics.track_stage)
+SERVER_TIMING_NAMES = {
+    "embedding": "embed",
+    "retrieval": "search",
+    "generation": "llm",
+    "query_log": "log",
+    "translation": "translate",
+    "faq_fetch": "faq",
+    "ingestion": "ingest",
+    "deletion": "delete",
+    "transcription": "transcribe",
+}
+
+class Span:
+    """
+    A timed operation in a captured trace. `start` is relative to the start of the request.
+    """
+    __slots__ = ("name", "start", "duration", "attributes", "children")
+
+    def __init__(self, name: str, start: float, attributes: Optional[dict] = None):
+        self.name = name
+        self.start = start
+        self.duration = None
+        self.attributes = attributes or {}
+        self.children: List["Span"] = []
+
+    def to_dict(self) -> dict:
+        data = {
+            "name": self.name,
+            "start_ms": round(self.start * 1000, 2),
+            "duration_ms": round(self.duration * 1000, 2) if self.duration is not None else None,
+        }
+        data.update(self.attributes)
+        http = [child for child in self.children if child.name == "http" and child.duration is not None]
+        if len(http) > 1:
+            # Consecutive attempts to the same URL are client retries; the gap between
+            # one attempt's response and the next attempt is the backoff wait
+            http.sort(key=lambda span: span.start)
+            retries, retry_wait = 0, 0.0
+            for previous, current in zip(http, http[1:]):
+                if previous.attributes.get("url") == current.attributes.get("url"):
+                    retries += 1
+                    retry_wait += max(0.0, current.start - (previous.start + previous.duration))
+            if retries:
+                data["retries"] = retries
+                data["retry_wait_ms"] = round(retry_wait * 1000, 2)
+        if self.children:
+            data["children"] = [child.to_dict() for child in self.children]
+        return data
+
+class RequestTrace:
+    """
+    Per-request timing state. Stage totals are always kept (for Server-Timing);
+    the span tree is only built when the request opted in with the debug header.
+    """
+    def __init__(self, method: str, path: str, tenant: str, detailed: bool):
+        self.trace_id = uuid.uuid4().hex
+        self.method = method
+        self.path = path
+        self.tenant = tenant
+        self.timestamp = time.time()
+        self.origin = time.perf_counter()
+        self.stage_totals: Dict[str, float] = {}
+        self.root = Span("request", 0.0) if detailed else None
+        self.status = None
+        self._http_spans: Dict[int, Span] = {}
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.origin
+
+    def add_stage(self, stage: str, seconds: float):
+        self.stage_totals[stage] = self.stage_totals.get(stage, 0.0) + seconds
+
+    def server_timing(self) -> str:
+        entries = [
+            f"{SERVER_TIMING_NAMES[stage]};dur={seconds * 1000:.1f}"
+            for stage, seconds in self.stage_totals.items()
+        ]
+        entries.append(f"total;dur={self.elapsed() * 1000:.1f}")
+        return ", ".join(entries)
+
+    def to_dict(self) -> dict:
+        return {
+            "trace_id": self.trace_id,
+            "timestamp": self.timestamp,
+            "method": self.method,
+            "path": self.path,
+            "tenant": self.tenant,
+            "status": self.status,
+            "stages_ms": {stage: round(seconds * 1000, 2) for stage, seconds in self.stage_totals.items()},
+            "spans": self.root.to_dict() if self.root is not None else None,
+        }
+
+class TraceBuffer:
+    """
+    Bounded in-memory ring buffer of captured traces; the oldest is dropped when full.
+    """
+    def __init__(self, max_traces: int):
+        self._traces = deque(maxlen=max_traces)
+        self._lock = threading.Lock()
+
+    def add(self, trace: RequestTrace):
+        with self._lock:
+            self._traces.append(trace)
+
+    def list(self, limit: Optional[int] = None) -> List[dict]:
+        with self._lock:
+            traces = list(self._traces)
+        traces.reverse()  # newest first
+        return [trace.to_dict() for trace in traces[:limit]]
+
+    def get(self, trace_id: str) -> Optional[dict]:
+        with self._lock:
+            for trace in self._traces:
+                if trace.trace_id == trace_id:
+                    return trace.to_dict()
+        return None
+
+current_trace: ContextVar[Optional[RequestTrace]] = ContextVar("current_trace", default=None)
+current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+trace_buffer = TraceBuffer(settings.TRACE_BUFFER_SIZE)
+
+@contextmanager
+def trace_span(name: str, **attributes):
+    """
+    Records the block in the current request's trace: stage names in SERVER_TIMING_NAMES
+    add to the Server-Timing totals, and a child span is opened when the trace is detailed.
+    Does nothing outside a traced request (e.g. in background tasks).
+    """
+    trace = current_trace.get()
+    if trace is None:
+        yield
+        return
+    start = time.perf_counter()
+    token = None
+    span = None
+    if trace.root is not None:
+        span = Span(name, start - trace.origin, attributes)
+        (current_span.get() or trace.root).children.append(span)
+        token = current_span.set(span)
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        if name in SERVER_TIMING_NAMES:
+            trace.add_stage(name, elapsed)
+        if span is not None:
+            span.duration = elapsed
+            try:
+                current_span.reset(token)
+            except ValueError:
+                # Async generator finalized from another context; nothing to restore
+                pass
+
+def annotate(**attributes):
+    """
+    Adds attributes to the innermost open span of a detailed trace.
+    """
+    span = current_span.get()
+    if span is not None:
+        span.attributes.update(attributes)
+
+def increment(**counts):
+    """
+    Adds to numeric attributes of the innermost open span of a detailed trace.
+    """
+    span = current_span.get()
+    if span is not None:
+        for key, value in counts.items():
+            span.attributes[key] = span.attributes.get(key, 0) + value
+
+def document_ids(docs) -> list:
+    """
+    Best-effort IDs of retrieved chunks (Document.id, or the store's id/pk metadata).
+    """
+    return [doc.id or doc.metadata.get("id") or doc.metadata.get("pk") for doc in docs]
+
+async def trace_http_request(request):
+    """httpx request hook: opens an "http" span per attempt, so SDK retries show up."""
+    trace = current_trace.get()
+    if trace is None or trace.root is None:
+        return
+    span = Span(
+        "http",
+        time.perf_counter() - trace.origin,
+        # Query strings can carry credentials, so only the host and path are kept
+        {"method": request.method, "url": f"{request.url.host}{request.url.path}"},
+    )
+    (current_span.get() or trace.root).children.append(span)
+    trace._http_spans[id(request)] = span
+
+async def trace_http_response(response):
+    """httpx response hook: closes the attempt's span when the response headers arrive."""
+    trace = current_trace.get()
+    if trace is None or trace.root is None:
+        return
+    span = trace._http_spans.pop(id(response.request), None)
+    if span is not None:
+        span.duration = time.perf_counter() - trace.origin - span.start
+        span.attributes["status"] = response.status_code
+
+class TracingMiddleware:
+    """
+    Pure ASGI middleware for tenant API routes. It adds a Server-Timing header with
+    the per-stage breakdown to every response. Requests carrying the debug header
+    (settings.TRACE_HEADER) also get a full span tree, kept in trace_buffer and
+    referenced by the X-Trace-Id response header.
+    For streamed responses, Server-Timing only covers stages finished before the first byte.
+    """
+    def __init__(self, app, tenants: Iterable[str], header_name: str):
+        self.app = app
+        self.tenants = frozenset(tenants)
+        self.header_name = header_name.lower().encode("latin-1")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        tenant = scope["path"].split("/", 2)[1]
+        if tenant not in self.tenants:
+            await self.app(scope, receive, send)
+            return
+
+        detailed = any(name == self.header_name and value not in (b"", b"0") for name, value in scope["headers"])
+        trace = RequestTrace(scope["method"], scope["path"], tenant, detailed)
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                trace.status = message["status"]
+                headers = MutableHeaders(scope=message)
+                headers.append("Server-Timing", trace.server_timing())
+                headers.append("Timing-Allow-Origin", "*")
+                if detailed:
+                    headers.append("X-Trace-Id", trace.trace_id)
+            await send(message)
+
+        token = current_trace.set(trace)
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            current_trace.reset(token)
+            if detailed:
+                trace.root.duration = trace.elapsed()
+                trace_buffer.add(trace)
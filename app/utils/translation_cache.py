@@ -0,0 +1,129 @@
+import asyncio
+import hashlib
+import logging
+from collections import OrderedDict
+from typing import Awaitable, Callable, List, Optional, Sequence
+from langchain_core.stores import ByteStore
+from app.config import settings
+from app.utils.embedding_cache import LRUMemoryByteStore, SQLiteByteStore
+from app.utils.metrics import record_cache
+from app.utils.single_flight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+# Languages whose latest full translation is kept in memory, in addition to the byte store
+MAX_MEMOIZED_LANGUAGES = 32
+
+TranslateFn = Callable[[List[str], str], Awaitable[List[str]]]
+
+def normalize_language(lang: str) -> str:
+    return lang.strip().lower()
+
+class TranslationCache:
+    """
+    Translated FAQ texts, keyed by namespace (tenant and model), target language and a
+    hash of the source text. An entry therefore only stops being used when its source
+    FAQ changes, and only the changed FAQs are sent to the model again.
+    Entries live in a byte store (SQLite by default, shared by workers and kept across
+    restarts). The latest full translation of each language is also held in memory, so
+    a repeat request for an unchanged FAQ list is a dict lookup.
+    """
+    def __init__(self, byte_store: ByteStore, namespace: str, preload_languages: Sequence[str] = ()):
+        self.store = byte_store
+        self.namespace = namespace
+        self.preload_languages = [normalize_language(lang) for lang in preload_languages if lang.strip()]
+        self._memo = OrderedDict()  # language -> (source texts, translations)
+        self._single_flight = SingleFlight()
+        self._pretranslate_task: Optional[asyncio.Task] = None
+
+    def _key(self, lang: str, text: str) -> str:
+        digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        return f"{self.namespace}:{lang}:{digest}"
+
+    async def translate(self, texts: List[str], lang: str, translate_missing: TranslateFn) -> List[str]:
+        """
+        Returns `texts` translated to `lang`. Texts not in the cache are translated with
+        `translate_missing(texts, lang)` (which must return one translation per text) and stored.
+        Concurrent requests for the same language and texts share one call.
+        """
+        lang = normalize_language(lang)
+        source = tuple(texts)
+        memo = self._memo.get(lang)
+        if memo is not None and memo[0] == source:
+            self._memo.move_to_end(lang)
+            record_cache("translation", True)
+            return list(memo[1])
+        translations = await self._single_flight.do((lang, source), lambda: self._translate(source, lang, translate_missing))
+        return list(translations)
+
+    async def _translate(self, source: tuple, lang: str, translate_missing: TranslateFn) -> List[str]:
+        keys = [self._key(lang, text) for text in source]
+        cached = await asyncio.to_thread(self.store.mget, keys)
+        translations = [value.decode("utf-8") if value is not None else None for value in cached]
+        missing = [i for i, value in enumerate(translations) if value is None]
+        record_cache("translation", not missing)
+        if missing:
+            logger.info("Translating %d of %d FAQs to %s", len(missing), len(source), lang)
+            translated = await translate_missing([source[i] for i in missing], lang)
+            if len(translated) != len(missing):
+                raise ValueError(f"Expected {len(missing)} translations, got {len(translated)}")
+            for i, text in zip(missing, translated):
+                translations[i] = text
+            await asyncio.to_thread(
+                self.store.mset, [(keys[i], translations[i].encode("utf-8")) for i in missing]
+            )
+        self._memo[lang] = (source, translations)
+        self._memo.move_to_end(lang)
+        while len(self._memo) > MAX_MEMOIZED_LANGUAGES:
+            self._memo.popitem(last=False)
+        return translations
+
+    def schedule_pretranslation(self, texts: List[str], translate_missing: TranslateFn) -> None:
+        """
+        Translates `texts` into every preload language in the background, replacing any
+        pre-translation still running for an older FAQ list.
+        """
+        if not self.preload_languages:
+            return
+        if self._pretranslate_task is not None and not self._pretranslate_task.done():
+            self._pretranslate_task.cancel()
+        self._pretranslate_task = asyncio.create_task(self._pretranslate(list(texts), translate_missing))
+
+    async def _pretranslate(self, texts: List[str], translate_missing: TranslateFn):
+        for lang in self.preload_languages:
+            try:
+                await self.translate(texts, lang, translate_missing)
+            except Exception as e:
+                logger.warning("Pre-translating FAQs to %s failed: %s", lang, e)
+
+    def stats(self) -> dict:
+        stats = self.store.stats()
+        stats["memoized_languages"] = len(self._memo)
+        return stats
+
+    async def close(self) -> None:
+        task = self._pretranslate_task
+        if task is not None and not task.done():
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self.store.close()
+
+def create_translation_cache(tenant: str, model_name: str) -> Optional[TranslationCache]:
+    """
+    Returns the FAQ translation cache for `tenant` per the TRANSLATION_CACHE_* settings,
+    or None when it is disabled. Switching models starts a fresh namespace.
+    """
+    if not settings.TRANSLATION_CACHE_ENABLED:
+        return None
+    backend = settings.TRANSLATION_CACHE_BACKEND
+    if backend == "sqlite":
+        store = SQLiteByteStore(settings.TRANSLATION_CACHE_PATH, settings.TRANSLATION_CACHE_MAX_ENTRIES, table="translations")
+    elif backend == "memory":
+        store = LRUMemoryByteStore(settings.TRANSLATION_CACHE_MAX_ENTRIES)
+    else:
+        raise ValueError(f"Unknown translation cache backend: {backend}")
+    languages = settings.TRANSLATION_PRELOAD_LANGUAGES.split(",")
+    return TranslationCache(store, namespace=f"{tenant}/{model_name}", preload_languages=languages)
@@ -0,0 +1,137 @@
+"""
+Crawler check against a fake website.
+
+Runs SiteCrawler.pages() and initialize_ingest_chain_crawl over an httpx.MockTransport
+serving benchmarks.fakes.FakeSite, with the local vector store, a chunk registry in a
+temporary directory and hash embeddings, and checks that the crawl honours robots.txt,
+seeds from sitemaps, stops at the depth limit, stays on its hosts (also across redirects),
+strips fragments, reports failed pages and skips unchanged pages when re-crawled. Exits with status 1
+when a check fails.
+
+    python -m benchmarks.crawl_check --pages 40 --fanout 3 --max-depth 2
+"""
+import os
+
+# Settings are read at import time; the check never uses these values
+for _name in (
+    "OPENAI_API_KEY", "ZILLIZ_AUTH_TOKEN", "AZURE_OPENAI_API_KEY", "AZURE_AI_SEARCH_API_KEY",
+    "AZURE_SPEECH_API_KEY",
+):
+    os.environ.setdefault(_name, "benchmark")
+for _name in ("ZILLIZ_URL", "AZURE_OPENAI_ENDPOINT", "AZURE_AI_SEARCH_ENDPOINT", "AZURE_SPEECH_ENDPOINT"):
+    os.environ.setdefault(_name, "http://fake.invalid")
+os.environ.setdefault("AZURE_MONGO_CONNECTION_STRING", "mongodb://fake.invalid")
+
+import argparse
+import asyncio
+import logging
+import sys
+import tempfile
+from collections import defaultdict
+from typing import List
+import httpx
+from benchmarks.fakes import FAKE_SITE_HOST, FakeSite
+from app.config import settings
+from app.chains.embedding_pipeline import EmbeddingPipeline
+from app.chains.ingest_chain import initialize_ingest_chain_crawl
+from app.chains.site_crawler import CrawlRequest, SiteCrawler
+from app.chains.vector_store_local import HashEmbeddings, LocalVectorStore, add_embedded_documents_local
+from app.utils.chunk_registry import ChunkRegistry
+from app.utils.process_pool import shutdown_process_pool
+
+SECTION = "docs"
+# The broken page, and the redirects to an internal address and to a path robots.txt disallows
+FAILING_PAGES = ("broken", "away", "to-private")
+
+def crawl_request(args) -> CrawlRequest:
+    base = f"https://{FAKE_SITE_HOST}/{SECTION}"
+    return CrawlRequest(seeds=[f"{base}/page-0"], sitemaps=[f"{base}/sitemap.xml"], max_depth=args.max_depth, max_pages=args.pages * 2)
+
+async def check_crawler(args) -> List[str]:
+    """Crawls the site with SiteCrawler alone; returns the failed checks."""
+    site = FakeSite(pages=args.pages, fanout=args.fanout, broken_link=True, redirects=True)
+    # Like the providers' client, which follows redirects unless told otherwise
+    async with httpx.AsyncClient(transport=site.transport(), follow_redirects=True) as client:
+        crawler = SiteCrawler(crawl_request(args), client, lambda **kwargs: None)
+        yielded = [url async for url, _ in crawler.pages()]
+
+    base = f"https://{FAKE_SITE_HOST}/{SECTION}"
+    expected = {f"{base}/page-{n}" for n in range(args.pages) if site.depth(n) <= args.max_depth} | {f"{base}/orphan", f"{base}/moved"}
+    failures = []
+    if set(yielded) != expected:
+        failures.append(f"crawled pages: missing {sorted(expected - set(yielded))}, unexpected {sorted(set(yielded) - expected)}")
+    if f"{base}/orphan" not in yielded:
+        failures.append("the page only the sitemap lists was not crawled")
+    if f"{base}/new-home" not in site.requested:
+        failures.append("an in-scope redirect was not followed")
+    if any("#" in url for url in yielded + site.requested):
+        failures.append("a URL kept its fragment")
+    if len(yielded) != len(set(yielded)) or len(site.requested) != len(set(site.requested)):
+        failures.append("a page was fetched or yielded more than once")
+    if any("/private/" in url for url in site.requested):
+        failures.append("a page disallowed by robots.txt was fetched")
+    if any(not url.startswith(f"https://{FAKE_SITE_HOST}/") for url in site.requested):
+        failures.append("a host outside the crawl's scope was requested (directly or by a redirect)")
+    too_deep = [url for url in site.requested if "/page-" in url and site.depth(int(url.rsplit("-", 1)[1])) > args.max_depth]
+    if too_deep:
+        failures.append(f"pages beyond max_depth {args.max_depth} were fetched: {too_deep[:3]}")
+    if sorted(failure["url"] for failure in crawler.failed) != sorted(f"{base}/{name}" for name in FAILING_PAGES):
+        failures.append(f"failed pages reported: {crawler.failed}")
+    print(f"SiteCrawler: {len(yielded)} pages yielded, {len(site.requested)} requests, {len(crawler.failed)} failed")
+    return failures
+
+async def check_ingest(args, directory: str) -> List[str]:
+    """Ingests the site twice with initialize_ingest_chain_crawl; returns the failed checks."""
+    site = FakeSite(pages=args.pages, fanout=args.fanout, broken_link=True, redirects=True)
+    embeddings = HashEmbeddings(64)
+    vector_store = LocalVectorStore(embeddings)
+    registry = ChunkRegistry(os.path.join(directory, "chunk_registry.sqlite3"), "crawl-check")
+    pipeline = EmbeddingPipeline(embeddings, add_embedded_documents_local)
+    locks = defaultdict(asyncio.Lock)
+    # The linked pages, orphan and moved
+    expected_pages = sum(1 for n in range(args.pages) if site.depth(n) <= args.max_depth) + 2
+
+    failures = []
+    async with httpx.AsyncClient(transport=site.transport(), follow_redirects=True) as client:
+        first = await initialize_ingest_chain_crawl(crawl_request(args), vector_store, registry, pipeline, client, lambda url: locks[url])
+        again = await initialize_ingest_chain_crawl(crawl_request(args), vector_store, registry, pipeline, client, lambda url: locks[url])
+    for label, result in (("first crawl", first), ("re-crawl", again)):
+        print(f"initialize_ingest_chain_crawl, {label}: {result['pages']} pages, {result['pages_failed']} failed, "
+              f"{result['chunks']} chunks, {result['written']} written, {result['skipped']} skipped")
+        if result["pages"] != expected_pages or result["pages_failed"] != len(FAILING_PAGES):
+            failures.append(f"{label}: {result['pages']} pages ingested and {result['pages_failed']} failed, expected {expected_pages} and {len(FAILING_PAGES)}")
+    if not first["written"] or first["written"] != first["chunks"]:
+        failures.append(f"first crawl wrote {first['written']} of {first['chunks']} chunks")
+    if again["written"] or again["skipped"] != again["chunks"]:
+        failures.append(f"re-crawl wrote {again['written']} chunks of unchanged pages")
+    return failures
+
+async def run(args) -> List[str]:
+    with tempfile.TemporaryDirectory() as directory:
+        return await check_crawler(args) + await check_ingest(args, directory)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--pages", type=int, default=40, help="linked pages in the fake site")
+    parser.add_argument("--fanout", type=int, default=3, help="links from each page to its child pages")
+    parser.add_argument("--max-depth", type=int, default=2, help="max_depth of the crawl")
+    parser.add_argument("--log-level", default="ERROR", help="log level while checking (failed pages are logged as warnings by design)")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    logging.getLogger().setLevel(args.log_level.upper())
+    # The fake site has no rate limit to respect
+    settings.CRAWL_HOST_DELAY = 0
+    try:
+        failures = asyncio.run(run(args))
+    finally:
+        shutdown_process_pool()
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if failures:
+        sys.exit(1)
+    print("All crawl checks passed")
+
+if __name__ == "__main__":
+    main()
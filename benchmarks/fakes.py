@@ -0,0 +1,433 @@
+"""
+Configurable-latency stand-ins for the cloud services the server talks to.
+
+`patch_cloud_services(latencies)` returns an ExitStack that swaps the LLM, embeddings,
+Azure AI Search, Zilliz (SDK and REST), OpenAI REST and Mongo clients for local fakes
+in the modules that define them, and serves a fake website (FakeSite) to crawls, so the real provider factories, chains and
+routers run unchanged. Azure AI Search is faked below LangChain's AzureSearch, at the
+search client, so the AzureSearch methods the app calls are the real ones; the Zilliz
+fake keeps Milvus' method signatures and takes column inserts on its collection.
+"""
+import asyncio
+import contextlib
+import itertools
+import random
+import threading
+import time
+from dataclasses import dataclass
+from types import SimpleNamespace
+from typing import Dict, Iterator, List, Optional
+from unittest import mock
+import httpx
+import numpy as np
+from pymilvus import Collection
+from app.config import settings
+from app.utils.http_client import create_http_client
+from app.chains.vector_store_local import HashEmbeddings, LocalVectorStore
+from app.chains.retrieval_chain_local import StubChatModel
+
+FAKE_DIMENSIONS = 256
+
+@dataclass
+class Latencies:
+    """Simulated per-call latency of each remote service, in seconds."""
+    llm: float = 0.5
+    embeddings: float = 0.05
+    zilliz: float = 0.03
+    azure_search: float = 0.03
+    mongo: float = 0.01
+    website: float = 0.02
+
+class FakeEmbeddings(HashEmbeddings):
+    def __init__(self, latency: float):
+        super().__init__(FAKE_DIMENSIONS)
+        self.latency = latency
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        time.sleep(self.latency)
+        return super().embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        time.sleep(self.latency)
+        return super().embed_query(text)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        await asyncio.sleep(self.latency)
+        return super().embed_documents(texts)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        await asyncio.sleep(self.latency)
+        return super().embed_query(text)
+
+class FakeVectorStore(LocalVectorStore):
+    """
+    In-memory stand-in for the Zilliz stores (langchain's, and langchain_milvus' for the
+    query log) that sleeps like a remote vector database. Methods keep Milvus' signatures,
+    and like an auto_id collection it assigns integer primary keys. `col` and the field
+    attributes stand in for the pymilvus Collection the app inserts into directly.
+    """
+    def __init__(self, embedding, latency: float, collection_name: str = "fake"):
+        super().__init__(embedding)
+        self.latency = latency
+        self.collection_name = collection_name
+        self.timeout = None
+        self._primary_field = "pk"
+        self._text_field = settings.ZILLIZ_VECTOR_TEXT_FIELD_NAME
+        self._vector_field = settings.ZILLIZ_VECTOR_FIELD_NAME
+        self._metadata_field = None
+        self.fields = [self._primary_field, self._text_field, self._vector_field, "timestamp"]
+        self._next_pk = itertools.count(1)
+        self.col = FakeCollection(self)
+
+    def add_embeddings(self, texts, embeddings, metadatas=None, timeout=None, batch_size=1000, *, ids=None, **kwargs):
+        time.sleep(self.latency)
+        return super().add_embeddings(texts, embeddings, metadatas, [next(self._next_pk) for _ in texts])
+
+    def add_texts(self, texts, metadatas=None, timeout=None, batch_size=1000, *, ids=None, **kwargs):
+        texts = list(texts)
+        return self.add_embeddings(texts, self.embedding.embed_documents(texts), metadatas)
+
+    def delete(self, ids=None, expr=None, **kwargs):
+        time.sleep(self.latency)
+        if not ids and expr is not None:
+            ids = self.ids
+        count = len(set(ids or ()) & set(self.ids))
+        LocalVectorStore.delete(self, ids)
+        return SimpleNamespace(delete_count=count)
+
+    def similarity_search_by_vector(self, embedding, k: int = 4, param=None, expr=None, timeout=None, **kwargs):
+        time.sleep(self.latency)
+        return super().similarity_search_by_vector(embedding, k)
+
+    async def asimilarity_search_by_vector(self, embedding, k: int = 4, param=None, expr=None, timeout=None, **kwargs):
+        await asyncio.sleep(self.latency)
+        return LocalVectorStore.similarity_search_by_vector(self, embedding, k)
+
+class FakeCollection(Collection):
+    """
+    pymilvus Collection stand-in for the column inserts the app sends directly: one list
+    per field of the store, in its field order, without the auto_id primary key.
+    """
+    def __init__(self, store: FakeVectorStore):
+        # Collection.__init__ would connect to the server
+        self.store = store
+
+    def insert(self, data, partition_name=None, timeout=None, **kwargs):
+        text_field, vector_field, *metadata_fields = [field for field in self.store.fields if field != self.store._primary_field]
+        texts, vectors, *metadata_columns = data
+        metadatas = [dict(zip(metadata_fields, values)) for values in zip(*metadata_columns)] or None
+        return SimpleNamespace(primary_keys=self.store.add_embeddings(texts, vectors, metadatas))
+
+def seed(store: FakeVectorStore, chunks: int = 200):
+    texts, vectors = seed_texts_and_vectors(chunks)
+    LocalVectorStore.add_embeddings(store, texts, vectors, None, [next(store._next_pk) for _ in texts])
+    return store
+
+def seed_texts_and_vectors(chunks: int = 200):
+    topics = ["library", "parking", "tuition", "housing", "trash pickup", "permits", "parks", "transit"]
+    texts = [
+        f"{topics[i % len(topics)]} information sheet {i}: hours, fees, contacts and links for {topics[i % len(topics)]}."
+        for i in range(chunks)
+    ]
+    return texts, HashEmbeddings(FAKE_DIMENSIONS).embed_documents(texts)
+
+@dataclass
+class FakeIndexingResult:
+    key: str
+    succeeded: bool = True
+    error_message: Optional[str] = None
+    status_code: int = 200
+
+class FakeSearchIndex:
+    """
+    In-memory Azure AI Search index, shared by the sync and async client fakes below.
+    Documents are stored as uploaded (id, content, content_vector, metadata); searches rank
+    by cosine similarity to the vector query, or list documents in key order without one.
+    """
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.documents: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def upload(self, documents: List[dict]) -> List[FakeIndexingResult]:
+        with self._lock:
+            for document in documents:
+                if document.get("@search.action", "upload") == "delete":
+                    self.documents.pop(document["id"], None)
+                else:
+                    self.documents[document["id"]] = {k: v for k, v in document.items() if k != "@search.action"}
+        return [FakeIndexingResult(document["id"]) for document in documents]
+
+    def delete(self, documents: List[dict]) -> List[FakeIndexingResult]:
+        with self._lock:
+            found = [self.documents.pop(document["id"], None) is not None for document in documents]
+        return [FakeIndexingResult(document["id"], ok, None if ok else "Not found", 200 if ok else 404) for document, ok in zip(documents, found)]
+
+    def search(self, search_text: Optional[str] = None, *, vector_queries=None, top: Optional[int] = None, select=None, **kwargs) -> List[dict]:
+        with self._lock:
+            documents = list(self.documents.values())
+        if vector_queries:
+            query = np.asarray(vector_queries[0].vector, dtype=np.float32)
+            vectors = np.asarray([document["content_vector"] for document in documents], dtype=np.float32).reshape(len(documents), -1)
+            norms = np.linalg.norm(vectors, axis=1) * (np.linalg.norm(query) or 1.0)
+            scores = (vectors @ query) / np.where(norms == 0, 1.0, norms) if documents else np.zeros(0)
+            order = np.argsort(-scores)[: top or vector_queries[0].k_nearest_neighbors]
+            ranked = [(documents[i], float(scores[i])) for i in order]
+        else:
+            ranked = [(document, 1.0) for document in sorted(documents, key=lambda d: d["id"])[:top]]
+        return [
+            {**({k: v for k, v in document.items() if k in select} if select else document), "@search.score": score}
+            for document, score in ranked
+        ]
+
+class FakeSearchClient:
+    """azure.search.documents.SearchClient stand-in: the methods AzureSearch calls."""
+    def __init__(self, index: FakeSearchIndex):
+        self.index = index
+
+    def upload_documents(self, documents: List[dict], **kwargs) -> List[FakeIndexingResult]:
+        time.sleep(self.index.latency)
+        return self.index.upload(documents)
+
+    def merge_or_upload_documents(self, documents: List[dict], **kwargs) -> List[FakeIndexingResult]:
+        return self.upload_documents(documents)
+
+    def delete_documents(self, documents: List[dict], **kwargs) -> List[FakeIndexingResult]:
+        time.sleep(self.index.latency)
+        return self.index.delete(documents)
+
+    def search(self, search_text: Optional[str] = None, **kwargs) -> Iterator[dict]:
+        time.sleep(self.index.latency)
+        return iter(self.index.search(search_text, **kwargs))
+
+    def close(self):
+        pass
+
+class FakeAsyncSearchResults:
+    def __init__(self, results: List[dict]):
+        self._results = iter(results)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> dict:
+        try:
+            return next(self._results)
+        except StopIteration:
+            raise StopAsyncIteration
+
+class FakeAsyncSearchClient:
+    """azure.search.documents.aio.SearchClient stand-in."""
+    def __init__(self, index: FakeSearchIndex):
+        self.index = index
+
+    async def upload_documents(self, documents: List[dict], **kwargs) -> List[FakeIndexingResult]:
+        await asyncio.sleep(self.index.latency)
+        return self.index.upload(documents)
+
+    async def merge_or_upload_documents(self, documents: List[dict], **kwargs) -> List[FakeIndexingResult]:
+        return await self.upload_documents(documents)
+
+    async def delete_documents(self, documents: List[dict], **kwargs) -> List[FakeIndexingResult]:
+        await asyncio.sleep(self.index.latency)
+        return self.index.delete(documents)
+
+    async def search(self, search_text: Optional[str] = None, **kwargs) -> FakeAsyncSearchResults:
+        await asyncio.sleep(self.index.latency)
+        return FakeAsyncSearchResults(self.index.search(search_text, **kwargs))
+
+    async def close(self):
+        pass
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        pass
+
+class FakeMongoCursor:
+    def __init__(self, docs, latency):
+        self.docs = docs
+        self.latency = latency
+
+    async def to_list(self, length=None):
+        await asyncio.sleep(self.latency)
+        return list(self.docs[:length])
+
+class FakeMongoCollection:
+    def __init__(self, latency: float, faq_count: int = 30):
+        self.latency = latency
+        self.docs = [{"faqs": [{"heading": f"Wichita FAQ {i}?"} for i in range(faq_count)]}]
+
+    def find(self, *args, **kwargs):
+        return FakeMongoCursor(self.docs, self.latency)
+
+class FakeMongoClient:
+    """Motor client stand-in: client[db][collection].find(...).to_list(...)."""
+    def __init__(self, latency: float):
+        self.collection = FakeMongoCollection(latency)
+
+    def __getitem__(self, name):
+        return {"faq": self.collection}
+
+    def close(self):
+        pass
+
+FAKE_SITE_HOST = "site.fake.invalid"
+
+class FakeSite:
+    """
+    A website for crawls on FAKE_SITE_HOST. Any first path segment is a section of its own,
+    so concurrent crawls can each take one:
+      - /<section>/page-<n> for n below `pages` links to its `fanout` children (a tree rooted
+        at page-0), to its first child again with a #fragment, to /private/ (disallowed by
+        robots.txt), to another host and, with `broken_link`, to a page that fails
+      - with `redirects`, the pages also link to /<section>/moved, which redirects to the
+        unlinked /<section>/new-home, and to /<section>/away and /<section>/to-private, which
+        redirect to an internal address and to /private/
+      - /<section>/sitemap.xml lists page-0 and /<section>/orphan, which nothing links to
+    Every request is recorded in `requested` as a URL.
+    """
+    def __init__(self, pages: int = 1000, fanout: int = 8, latency: float = 0.0, broken_link: bool = False, redirects: bool = False):
+        self.pages = pages
+        self.fanout = fanout
+        self.latency = latency
+        self.broken_link = broken_link
+        self.redirects = redirects
+        self.requested: List[str] = []
+
+    def depth(self, n: int) -> int:
+        depth = 0
+        while n:
+            n = (n - 1) // self.fanout
+            depth += 1
+        return depth
+
+    def _page(self, section: str, n: int) -> httpx.Response:
+        children = [c for c in range(n * self.fanout + 1, (n + 1) * self.fanout + 1) if c < self.pages]
+        links = [f"page-{c}" for c in children]
+        if children:
+            links.append(f"page-{children[0]}#details")
+        links += ["/private/staff", "https://example.com/"]
+        if self.broken_link:
+            links.append("broken")
+        if self.redirects:
+            links += ["moved", "away", "to-private"]
+        body = "".join(f"<p>Section {section}, page {n}: hours, fees and contacts, paragraph {i}.</p>" for i in range(20))
+        anchors = "".join(f'<a href="{link}">{link}</a>' for link in links)
+        return httpx.Response(200, html=f"<html><head><title>{section} {n}</title></head><body>{body}{anchors}</body></html>")
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(self.latency)
+        self.requested.append(str(request.url))
+        if request.url.host != FAKE_SITE_HOST:
+            return httpx.Response(404)
+        path = request.url.path
+        if path == "/robots.txt":
+            return httpx.Response(200, text="User-agent: *\nDisallow: /private/\n")
+        section, _, name = path.strip("/").partition("/")
+        if name == "sitemap.xml":
+            urls = "".join(f"<url><loc>https://{FAKE_SITE_HOST}/{section}/{page}</loc></url>" for page in ("page-0", "orphan"))
+            return httpx.Response(200, text=f'<?xml version="1.0"?><urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{urls}</urlset>', headers={"content-type": "application/xml"})
+        if name == "orphan":
+            return httpx.Response(200, html=f"<html><body><p>Section {section}: a page only the sitemap lists.</p></body></html>")
+        if name == "new-home":
+            return httpx.Response(200, html=f"<html><body><p>Section {section}: a page reached by a redirect.</p></body></html>")
+        redirects = {"moved": "new-home", "away": "http://169.254.169.254/latest/meta-data/", "to-private": "/private/staff"}
+        if name in redirects:
+            return httpx.Response(301, headers={"location": redirects[name]})
+        if name.startswith("page-") and name[5:].isdigit() and int(name[5:]) < self.pages:
+            return self._page(section, int(name[5:]))
+        if name == "broken":
+            return httpx.Response(500)
+        return httpx.Response(404)
+
+    def transport(self) -> httpx.MockTransport:
+        return httpx.MockTransport(self.handle)
+
+def fake_cloud_transport(latencies: Latencies, faq_count: int = 30) -> httpx.MockTransport:
+    """Serves the Zilliz REST API, the OpenAI embeddings endpoint and FakeSite."""
+    site = FakeSite(latency=latencies.website)
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.host == FAKE_SITE_HOST:
+            return await site.handle(request)
+        path = request.url.path
+        if path.endswith("/v2/vectordb/entities/query"):
+            await asyncio.sleep(latencies.zilliz)
+            return httpx.Response(200, json={"data": [{"faq": f"WSU FAQ {i}?"} for i in range(faq_count)]})
+        if path.endswith("/v2/vectordb/entities/search"):
+            await asyncio.sleep(latencies.zilliz)
+            now = int(time.time())
+            rows = [{"pk": i, "timestamp": now - random.randint(0, 7 * 24 * 3600)} for i in range(100)]
+            return httpx.Response(200, json={"data": rows})
+        if path.endswith("/embeddings"):
+            await asyncio.sleep(latencies.embeddings)
+            vector = [random.random() for _ in range(FAKE_DIMENSIONS)]
+            return httpx.Response(200, json={
+                "object": "list",
+                "data": [{"object": "embedding", "index": 0, "embedding": vector}],
+                "model": "fake",
+                "usage": {"prompt_tokens": 1, "total_tokens": 1},
+            })
+        return httpx.Response(404, json={"error": f"no fake for {path}"})
+    return httpx.MockTransport(handler)
+
+def patch_cloud_services(latencies: Latencies) -> contextlib.ExitStack:
+    stack = contextlib.ExitStack()
+    transport = fake_cloud_transport(latencies)
+
+    def llm(**kwargs):
+        return StubChatModel(latency=latencies.llm)
+
+    def embeddings(**kwargs):
+        return FakeEmbeddings(latencies.embeddings)
+
+    # One in-memory index per index name, seeded once and shared by every client
+    search_indexes: Dict[str, FakeSearchIndex] = {}
+
+    def search_index(index_name: str) -> FakeSearchIndex:
+        if index_name not in search_indexes:
+            search_indexes[index_name] = FakeSearchIndex(latencies.azure_search)
+            texts, vectors = seed_texts_and_vectors()
+            search_indexes[index_name].upload([
+                {"id": f"seed-{i}", "content": text, "content_vector": vector, "metadata": "{}"}
+                for i, (text, vector) in enumerate(zip(texts, vectors))
+            ])
+        return search_indexes[index_name]
+
+    def search_client(endpoint, index_name, *args, async_=False, **kwargs):
+        # Replaces the function AzureSearch builds its clients with (which would also create
+        # the index), so the real AzureSearch class runs against the in-memory index
+        index = search_index(index_name)
+        return FakeAsyncSearchClient(index) if async_ else FakeSearchClient(index)
+
+    def zilliz(**kwargs):
+        store = FakeVectorStore(FakeEmbeddings(latencies.embeddings), latencies.zilliz, kwargs.get("collection_name", "fake"))
+        if kwargs.get("collection_name") == settings.ZILLIZ_USER_QUERIES_COLLECTION_NAME:
+            # The query log starts empty; the knowledge collection gets seeded
+            return store
+        return seed(store)
+
+    def http_client():
+        # Real pool limits, timeouts and trace hooks; only the network is replaced
+        return create_http_client(transport=transport)
+
+    # The chains import these SDK classes inside the functions that use them,
+    # so they are patched where they are defined
+    targets = {
+        "langchain_openai.AzureChatOpenAI": llm,
+        "langchain_openai.ChatOpenAI": llm,
+        "langchain_openai.AzureOpenAIEmbeddings": embeddings,
+        "langchain_openai.OpenAIEmbeddings": embeddings,
+        "langchain_community.vectorstores.azuresearch._get_search_client": search_client,
+        "app.chains.delete_documents_azure._create_search_client": lambda: FakeAsyncSearchClient(search_index(settings.AZURE_INDEX_NAME)),
+        "langchain.vectorstores.Zilliz": zilliz,
+        "langchain_milvus.Zilliz": zilliz,
+        "motor.motor_asyncio.AsyncIOMotorClient": lambda *args, **kwargs: FakeMongoClient(latencies.mongo),
+        "app.providers.azure_provider.create_http_client": http_client,
+        "app.providers.zilliz_provider.create_http_client": http_client,
+    }
+    for target, replacement in targets.items():
+        stack.enter_context(mock.patch(target, replacement))
+    return stack
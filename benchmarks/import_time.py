@@ -0,0 +1,147 @@
+"""
+Import-time benchmark for app startup.
+
+Imports the app in fresh interpreters with `python -X importtime`, reports the
+median import time and the slowest third-party packages on the import path, and
+checks that the heavy dependencies only needed by some code paths (pandas, the
+Speech SDK, document parsers, Mongo, the OpenAI and vector store SDKs) are not
+imported eagerly. Exits with status 1 when one of them is, or when the median
+exceeds --budget, so a regression in worker spawn time shows up in CI.
+
+    python -m benchmarks.import_time --runs 5 --budget 1.5 --output import_time.json
+"""
+import argparse
+import datetime
+import json
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, List
+
+# Loaded on first use by the code paths that need them; importing the app must not pull them in
+DEFERRED_MODULES = (
+    "pandas",
+    "azure.cognitiveservices.speech",
+    "azure.search.documents",
+    "PyPDF2",
+    "docx",
+    "bs4",
+    "aiofiles",
+    "motor",
+    "openai",
+    "langchain_openai",
+    "langchain_milvus",
+    "pymilvus",
+    "langchain_community",
+    "langchain_text_splitters",
+    "langchain.embeddings",
+)
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {target}
+seconds = time.perf_counter() - start
+print(json.dumps({{"seconds": seconds, "eager": [m for m in {deferred!r} if m in sys.modules]}}))
+"""
+
+def child_env() -> Dict[str, str]:
+    # Settings are validated at import time; the values are never used
+    env = dict(os.environ)
+    for name in (
+        "OPENAI_API_KEY", "ZILLIZ_AUTH_TOKEN", "AZURE_OPENAI_API_KEY", "AZURE_AI_SEARCH_API_KEY",
+        "AZURE_SPEECH_API_KEY",
+    ):
+        env.setdefault(name, "benchmark")
+    for name in ("ZILLIZ_URL", "AZURE_OPENAI_ENDPOINT", "AZURE_AI_SEARCH_ENDPOINT", "AZURE_SPEECH_ENDPOINT"):
+        env.setdefault(name, "http://fake.invalid")
+    env.setdefault("AZURE_MONGO_CONNECTION_STRING", "mongodb://fake.invalid")
+    return env
+
+def parse_importtime(stderr: str) -> Dict[str, float]:
+    """
+    Returns seconds per top-level package: the cumulative time of its first import,
+    which is what it adds to startup.
+    """
+    packages: Dict[str, float] = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        _, cumulative, name = (part.strip() for part in line[len("import time:"):].split("|"))
+        package = name.split(".")[0]
+        packages[package] = max(packages.get(package, 0.0), int(cumulative) / 1e6)
+    return packages
+
+def run_once(target: str) -> dict:
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", PROBE.format(target=target, deferred=DEFERRED_MODULES)],
+        capture_output=True,
+        text=True,
+        env=child_env(),
+    )
+    if process.returncode != 0:
+        raise SystemExit(f"Importing {target} failed:\n{process.stderr[-4000:]}")
+    result = json.loads(process.stdout.strip().splitlines()[-1])
+    result["packages"] = parse_importtime(process.stderr)
+    return result
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--target", default="app.main", help="module to import")
+    parser.add_argument("--runs", type=int, default=5, help="measured imports, each in a fresh interpreter")
+    parser.add_argument("--top", type=int, default=15, help="slowest packages to list")
+    parser.add_argument("--budget", type=float, help="fail when the median import time exceeds this many seconds")
+    parser.add_argument("--output", help="write machine-readable JSON results to this path")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    # The first import compiles bytecode, which a deployed image already has
+    run_once(args.target)
+    runs: List[dict] = [run_once(args.target) for _ in range(args.runs)]
+
+    seconds = [run["seconds"] for run in runs]
+    median = statistics.median(seconds)
+    packages = {
+        package: statistics.median(run["packages"].get(package, 0.0) for run in runs)
+        for package in runs[-1]["packages"]
+        if package != args.target.split(".")[0]
+    }
+    slowest = sorted(packages.items(), key=lambda item: item[1], reverse=True)[:args.top]
+    eager = sorted({module for run in runs for module in run["eager"]})
+
+    print(f"import {args.target}: median {median * 1000:.0f} ms, min {min(seconds) * 1000:.0f} ms, max {max(seconds) * 1000:.0f} ms over {len(runs)} runs")
+    print("Slowest packages (cumulative first import):")
+    for package, package_seconds in slowest:
+        print(f"  {package:<32} {package_seconds * 1000:>8.1f} ms")
+
+    failures = []
+    if eager:
+        failures.append(f"deferred modules imported eagerly: {', '.join(eager)}")
+    if args.budget is not None and median > args.budget:
+        failures.append(f"median {median:.3f}s exceeds the {args.budget:.3f}s budget")
+
+    report = {
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "python": sys.version.split()[0],
+        "target": args.target,
+        "runs_s": seconds,
+        "median_s": median,
+        "packages_s": dict(slowest),
+        "eager_deferred_modules": eager,
+        "failures": failures,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.output}")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if failures:
+        sys.exit(1)
+    return report
+
+if __name__ == "__main__":
+    main()
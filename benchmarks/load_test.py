@@ -0,0 +1,299 @@
+"""
+End-to-end load test for the API with local stand-ins for every cloud service.
+
+Serves the real app (providers, chains, routers, middleware) with uvicorn on a
+background thread, swaps the LLM, embeddings, Azure AI Search, Zilliz and Mongo
+clients for configurable-latency fakes and serves crawls a fake website (see
+benchmarks/fakes.py), drives the endpoints over HTTP at a fixed concurrency and
+reports throughput, latency percentiles and event-loop lag of the server loop per
+scenario. Exits with status 1
+when any request fails, so a broken code path fails CI instead of only showing up
+as an error count.
+
+    python -m benchmarks.load_test --concurrency 32 --requests 500 --output bench.json
+"""
+import os
+
+# Settings are read at import time; the fakes never use these values
+for _name in (
+    "OPENAI_API_KEY", "ZILLIZ_AUTH_TOKEN", "AZURE_OPENAI_API_KEY", "AZURE_AI_SEARCH_API_KEY",
+    "AZURE_SPEECH_API_KEY",
+):
+    os.environ.setdefault(_name, "benchmark")
+for _name in ("ZILLIZ_URL", "AZURE_OPENAI_ENDPOINT", "AZURE_AI_SEARCH_ENDPOINT", "AZURE_SPEECH_ENDPOINT"):
+    os.environ.setdefault(_name, "http://fake.invalid")
+os.environ.setdefault("AZURE_MONGO_CONNECTION_STRING", "mongodb://fake.invalid")
+os.environ.setdefault("EMBEDDING_CACHE_BACKEND", "memory")
+os.environ.setdefault("TRANSLATION_CACHE_BACKEND", "memory")
+# Admin endpoints (crawls) are disabled without a token
+os.environ.setdefault("ADMIN_TOKEN", "benchmark")
+
+import argparse
+import asyncio
+import datetime
+import json
+import logging
+import socket
+import sys
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+import httpx
+import numpy as np
+import uvicorn
+from benchmarks.fakes import FAKE_SITE_HOST, Latencies, patch_cloud_services
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+TOPICS = ["library hours", "parking permits", "tuition deadlines", "housing", "trash pickup", "park reservations", "bus routes", "transcripts"]
+
+def qa_request(tenant: str, distinct: int) -> Callable[[int], dict]:
+    def build(i: int) -> dict:
+        n = i % distinct
+        return {"method": "POST", "url": f"/{tenant}/api/qa", "json": {"userMessage": f"What about {TOPICS[n % len(TOPICS)]}? ({n})"}}
+    return build
+
+def faq_translate_request(tenant: str) -> Callable[[int], dict]:
+    return lambda i: {"method": "GET", "url": f"/{tenant}/api/faqs/translate", "params": {"lang": "es"}}
+
+def ingest_request(tenant: str, document_bytes: int) -> Callable[[int], dict]:
+    def build(i: int) -> dict:
+        line = f"Document {i} covers {TOPICS[i % len(TOPICS)]} with hours, fees and contacts.\n"
+        body = (line * (document_bytes // len(line) + 1))[:document_bytes]
+        return {"method": "POST", "url": f"/{tenant}/api/ingest_document", "files": {"file": (f"doc_{i}.txt", body.encode(), "text/plain")}}
+    return build
+
+def crawl_request(tenant: str, pages: int) -> Callable[[int], dict]:
+    def build(i: int) -> dict:
+        # Each crawl takes a section of the fake site of its own, so none of its pages are already stored
+        section = f"https://{FAKE_SITE_HOST}/crawl-{i}/"
+        return {"method": "POST", "url": f"/{tenant}/api/ingest_crawl", "json": {
+            "seeds": [f"{section}page-0"], "sitemaps": [f"{section}sitemap.xml"], "max_pages": pages,
+        }}
+    return build
+
+def data_search_request(tenant: str) -> Callable[[int], dict]:
+    return lambda i: {"method": "GET", "url": f"/{tenant}/api/data_search", "params": {"query": TOPICS[i % len(TOPICS)]}}
+
+def build_scenarios(args) -> Dict[str, Callable[[int], dict]]:
+    return {
+        "wichita_qa": qa_request("wichita", args.distinct_queries),
+        "wsu_qa": qa_request("wsu", args.distinct_queries),
+        "wichita_faqs_translate": faq_translate_request("wichita"),
+        "wsu_faqs_translate": faq_translate_request("wsu"),
+        "wichita_ingest_document": ingest_request("wichita", args.document_bytes),
+        "wsu_ingest_document": ingest_request("wsu", args.document_bytes),
+        "wsu_ingest_crawl": crawl_request("wsu", args.crawl_pages),
+        "wsu_data_search": data_search_request("wsu"),
+    }
+
+class BackgroundServer:
+    """
+    Runs uvicorn on its own event loop in a daemon thread and samples how late
+    that loop wakes up from short sleeps (event-loop lag).
+    """
+    def __init__(self, app, port: int, lag_interval: float):
+        self.server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning", lifespan="on"))
+        self.loop = asyncio.new_event_loop()
+        self.lag_interval = lag_interval
+        self._lag_samples: List[float] = []
+        self._thread = threading.Thread(target=self._run, name="benchmark-server", daemon=True)
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.create_task(self._monitor_lag())
+        self.loop.run_until_complete(self.server.serve())
+
+    async def _monitor_lag(self):
+        while not self.server.should_exit:
+            start = self.loop.time()
+            await asyncio.sleep(self.lag_interval)
+            self._lag_samples.append(max(0.0, self.loop.time() - start - self.lag_interval))
+
+    def start(self, timeout: float = 60.0):
+        self._thread.start()
+        deadline = time.monotonic() + timeout
+        while not self.server.started:
+            if not self._thread.is_alive() or time.monotonic() > deadline:
+                raise RuntimeError("Benchmark server failed to start")
+            time.sleep(0.05)
+
+    def take_lag_samples(self) -> List[float]:
+        samples, self._lag_samples = self._lag_samples, []
+        return samples
+
+    def stop(self):
+        self.server.should_exit = True
+        self._thread.join(timeout=30)
+
+def summarize(values: List[float]) -> dict:
+    if not values:
+        return {"p50": None, "p95": None, "p99": None, "mean": None, "max": None}
+    ms = np.asarray(values) * 1000
+    p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+    return {"p50": round(p50, 2), "p95": round(p95, 2), "p99": round(p99, 2), "mean": round(float(ms.mean()), 2), "max": round(float(ms.max()), 2)}
+
+async def wait_for_job(client: httpx.AsyncClient, response: httpx.Response, poll_interval: float = 0.02) -> Optional[str]:
+    """
+    Polls a queued job (202 with a status_url, as returned by the ingest endpoints) until it
+    finishes, so the measured latency covers the whole job. Returns a failure label or None.
+    """
+    status_url = response.json()["status_url"]
+    while True:
+        await asyncio.sleep(poll_interval)
+        job = await client.get(status_url)
+        if job.status_code >= 400:
+            return f"job_{job.status_code}"
+        status = job.json()["status"]
+        if status == "succeeded":
+            return None
+        if status == "failed":
+            return "job_failed"
+
+async def run_scenario(client: httpx.AsyncClient, build: Callable[[int], dict], requests: int, concurrency: int) -> dict:
+    latencies: List[float] = []
+    errors: Dict[str, int] = {}
+    counter = iter(range(requests))
+
+    async def worker():
+        for i in counter:
+            start = time.perf_counter()
+            try:
+                response = await client.request(**build(i))
+                status = response.status_code
+                failure = None if status < 400 else str(status)
+                if status == 202:
+                    failure = await wait_for_job(client, response)
+            except httpx.HTTPError as e:
+                failure = type(e).__name__
+            latencies.append(time.perf_counter() - start)
+            if failure:
+                errors[failure] = errors.get(failure, 0) + 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "duration_s": round(elapsed, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else None,
+        "latency_ms": summarize(latencies),
+    }
+
+async def drive(base_url: str, server: BackgroundServer, scenarios: Dict[str, Callable[[int], dict]], args) -> dict:
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    results = {}
+    headers = {"Authorization": f"Bearer {settings.ADMIN_TOKEN}"}
+    async with httpx.AsyncClient(base_url=base_url, headers=headers, limits=limits, timeout=args.timeout) as client:
+        for name, build in scenarios.items():
+            if args.warmup:
+                await run_scenario(client, build, args.warmup, min(args.concurrency, args.warmup))
+            server.take_lag_samples()
+            result = await run_scenario(client, build, args.requests, args.concurrency)
+            result["event_loop_lag_ms"] = summarize(server.take_lag_samples())
+            results[name] = result
+            print(format_row(name, result), flush=True)
+    return results
+
+def format_row(name: str, result: dict) -> str:
+    latency, lag = result["latency_ms"], result["event_loop_lag_ms"]
+    errors = sum(result["errors"].values())
+    return (
+        f"{name:<26} {result['throughput_rps']:>9} rps  p50 {latency['p50']:>9} ms  p95 {latency['p95']:>9} ms  "
+        f"p99 {latency['p99']:>9} ms  lag p99 {lag['p99']:>7} ms  errors {errors}"
+    )
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def parse_args(argv=None):
+    defaults = Latencies()
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--concurrency", type=int, default=16, help="concurrent in-flight requests per scenario")
+    parser.add_argument("--requests", type=int, default=200, help="measured requests per scenario")
+    parser.add_argument("--warmup", type=int, default=5, help="unmeasured requests per scenario before measuring")
+    parser.add_argument("--scenarios", default="all", help="comma-separated subset of scenarios, or 'all'")
+    parser.add_argument("--distinct-queries", type=int, default=1_000_000, help="distinct QA questions to cycle through (lower = more cache hits)")
+    parser.add_argument("--document-bytes", type=int, default=20_000, help="size of each ingested text document")
+    parser.add_argument("--crawl-pages", type=int, default=20, help="pages fetched by each crawl")
+    parser.add_argument("--no-answer-cache", action="store_true", help="disable the semantic answer cache")
+    parser.add_argument("--no-translation-cache", action="store_true", help="disable the FAQ translation cache (every translate request calls the LLM)")
+    parser.add_argument("--llm-latency", type=float, default=defaults.llm)
+    parser.add_argument("--embedding-latency", type=float, default=defaults.embeddings)
+    parser.add_argument("--zilliz-latency", type=float, default=defaults.zilliz)
+    parser.add_argument("--azure-search-latency", type=float, default=defaults.azure_search)
+    parser.add_argument("--mongo-latency", type=float, default=defaults.mongo)
+    parser.add_argument("--website-latency", type=float, default=defaults.website, help="latency of each page fetched by a crawl")
+    parser.add_argument("--lag-interval", type=float, default=0.01, help="event-loop lag probe interval in seconds")
+    parser.add_argument("--timeout", type=float, default=120.0, help="client request timeout in seconds")
+    parser.add_argument("--log-level", default="WARNING", help="server log level while measuring (per-request INFO logs skew results)")
+    parser.add_argument("--output", help="write machine-readable JSON results to this path")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    latencies = Latencies(
+        llm=args.llm_latency,
+        embeddings=args.embedding_latency,
+        zilliz=args.zilliz_latency,
+        azure_search=args.azure_search_latency,
+        mongo=args.mongo_latency,
+        website=args.website_latency,
+    )
+    if args.no_answer_cache:
+        settings.ANSWER_CACHE_ENABLED = False
+    if args.no_translation_cache:
+        settings.TRANSLATION_CACHE_ENABLED = False
+
+    scenarios = build_scenarios(args)
+    if args.scenarios != "all":
+        selected = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+        unknown = set(selected) - set(scenarios)
+        if unknown:
+            raise SystemExit(f"Unknown scenarios: {', '.join(sorted(unknown))}. Available: {', '.join(scenarios)}")
+        scenarios = {name: scenarios[name] for name in selected}
+
+    with patch_cloud_services(latencies):
+        from app.main import app
+        logging.getLogger().setLevel(args.log_level.upper())
+        port = free_port()
+        server = BackgroundServer(app, port, args.lag_interval)
+        server.start()
+        try:
+            results = asyncio.run(drive(f"http://127.0.0.1:{port}", server, scenarios, args))
+        finally:
+            server.stop()
+
+    report = {
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "config": {
+            "concurrency": args.concurrency,
+            "requests": args.requests,
+            "warmup": args.warmup,
+            "distinct_queries": args.distinct_queries,
+            "document_bytes": args.document_bytes,
+            "crawl_pages": args.crawl_pages,
+            "answer_cache": settings.ANSWER_CACHE_ENABLED,
+            "translation_cache": settings.TRANSLATION_CACHE_ENABLED,
+            "latencies_s": vars(latencies),
+        },
+        "scenarios": results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.output}")
+
+    failed = {name: result["errors"] for name, result in results.items() if result["errors"]}
+    for name, errors in failed.items():
+        print(f"FAIL: {name}: {', '.join(f'{count} x {label}' for label, count in sorted(errors.items()))}")
+    if failed:
+        sys.exit(1)
+    return report
+
+if __name__ == "__main__":
+    main()
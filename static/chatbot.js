@@ -282,7 +282,7 @@ async function switchFaqLanguage() {
     if (event.key === 'Enter') sendMessage();
   }
 
-  // Send chat message to server
+  // Send chat message to server, streaming the answer as it is generated
   async function sendMessage() {
     const message = chatInput.value.trim();
     if (!message) return;
@@ -290,29 +290,79 @@ async function switchFaqLanguage() {
     chatInput.value = '';
     thinkingDiv.classList.remove('hidden');
     try {
-      const response = await fetch(`${apiBaseUrl}/qa`, {
+      const response = await fetch(`${apiBaseUrl}/qa/stream?format=sse`, {
         method: 'POST',
         headers: { 'Content-Type': 'application/json' },
         body: JSON.stringify({ userMessage: message }),
       });
-      const data = await response.json();
+      if (!response.ok || !response.body) throw new Error(`HTTP error! status: ${response.status}`);
+      await readAnswerStream(response.body);
+    } catch (err) {
       thinkingDiv.classList.add('hidden');
-      if (data.response) {
-        if (data.response.error) {
-          const errorMsg = data.response.error === 'API request timed out'
-            ? 'The API request timed out. Please try again.'
-            : 'Error: ' + data.response.error;
-          addMessage(errorMsg, 'bot');
-        } else {
-          typeWriterEffect(data.response);
+      addMessage('Error: ' + err.message, 'bot');
+    }
+  }
+
+  // Read server-sent events from the /qa/stream endpoint and render tokens as they arrive
+  async function readAnswerStream(body) {
+    const reader = body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    let answer = '';
+    let bot = null;
+    // Set by a done or error event; a stream that ends without one was cut off
+    let finished = false;
+
+    while (true) {
+      const { value, done } = await reader.read();
+      if (done) break;
+      buffer += decoder.decode(value, { stream: true });
+      // Events are separated by a blank line
+      let boundary;
+      while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+        const rawEvent = buffer.slice(0, boundary);
+        buffer = buffer.slice(boundary + 2);
+        let eventName = 'message';
+        let data = '';
+        rawEvent.split('\n').forEach(line => {
+          if (line.startsWith('event: ')) eventName = line.slice(7);
+          else if (line.startsWith('data: ')) data += line.slice(6);
+        });
+        const payload = data ? JSON.parse(data) : null;
+
+        if (eventName === 'retrieval') {
+          // Context is ready; show the answer bubble while the LLM generates
+          thinkingDiv.classList.add('hidden');
+          bot = createBotMessage();
+        } else if (eventName === 'token') {
+          if (!bot) {
+            thinkingDiv.classList.add('hidden');
+            bot = createBotMessage();
+          }
+          answer += payload;
+          bot.textDiv.textContent = answer;
+          scrollToBottom();
+        } else if (eventName === 'done') {
+          finished = true;
+          thinkingDiv.classList.add('hidden');
+          if (!bot) bot = createBotMessage();
+          answer = payload && payload.result ? payload.result : answer;
+          bot.textDiv.innerHTML = replaceLinks(marked.parse(answer));
+          addMessageButtons(bot.messageDiv, answer);
+          scrollToBottom();
+        } else if (eventName === 'error') {
+          finished = true;
+          thinkingDiv.classList.add('hidden');
+          if (bot) bot.messageDiv.remove();
+          addMessage('Error: ' + (payload && payload.error ? payload.error : 'Sorry, something went wrong.'), 'bot');
         }
-      } else {
-        const errMsg = 'Sorry, something went wrong.';
-        addMessage(errMsg, 'bot');
       }
-    } catch (err) {
+    }
+
+    if (!finished) {
       thinkingDiv.classList.add('hidden');
-      addMessage('Error: ' + err.message, 'bot');
+      if (bot) bot.messageDiv.remove();
+      addMessage('Error: The answer was interrupted. Please try again.', 'bot');
     }
   }
 
@@ -431,10 +481,8 @@ async function switchFaqLanguage() {
     }
   };
 
-  // Typewriter effect for bot response
-  function typeWriterEffect(text) {
-    const formattedText = replaceLinks(marked.parse(text));
-    const plainText = text.replace(/https?:\/\/[^\s]+/g, "");
+  // Create an empty bot message bubble
+  function createBotMessage() {
     const messageDiv = document.createElement('div');
     messageDiv.className = 'chatbot__message chatbot__message--bot';
     const labelDiv = document.createElement('div');
@@ -446,56 +494,49 @@ async function switchFaqLanguage() {
     messageDiv.appendChild(labelDiv);
     messageDiv.appendChild(textDiv);
     chatBody.appendChild(messageDiv);
-    let i = 0;
-    function type() {
-      if (i < plainText.length) {
-        textDiv.textContent += plainText.charAt(i);
-        i++;
-        scrollToBottom();
-        setTimeout(type, 5);
-      } else {
-        textDiv.innerHTML = formattedText;
-        const buttonsContainer = document.createElement('div');
-        buttonsContainer.className = 'chatbot__buttons';
-        const copyButton = document.createElement('button');
-        copyButton.className = 'btn-copy';
-        copyButton.innerHTML = '<i class="fas fa-copy"></i>';
-        copyButton.addEventListener('click', () => {
-          navigator.clipboard.writeText(text);
-          copyButton.classList.add('btn-clicked');
-          setTimeout(() => {
-            copyButton.classList.remove('btn-clicked');
-          }, 1000); // Change back to original color after 1 second
-        });
-        buttonsContainer.appendChild(copyButton);
-
-        const likeButton = document.createElement('button');
-        likeButton.className = 'btn-like';
-        likeButton.innerHTML = '<i class="fas fa-thumbs-up"></i>';
-        likeButton.addEventListener('click', () => {
-          // TODO: Implement like functionality
-          likeButton.classList.add('btn-clicked');
-          setTimeout(() => {
-            likeButton.classList.remove('btn-clicked');
-          }, 1000); // Change back to original color after 1 second
-        });
-        buttonsContainer.appendChild(likeButton);
-
-        const dislikeButton = document.createElement('button');
-        dislikeButton.className = 'btn-dislike';
-        dislikeButton.innerHTML = '<i class="fas fa-thumbs-down"></i>';
-        dislikeButton.addEventListener('click', () => {
-          // TODO: Implement like functionality;
-          dislikeButton.classList.add('btn-clicked');
-          setTimeout(() => {
-            dislikeButton.classList.remove('btn-clicked');
-          }, 1000); // Change back to original color after 1 second
-        });
-        buttonsContainer.appendChild(dislikeButton);
-        messageDiv.appendChild(buttonsContainer);
-      }
-    }
-    type();
+    return { messageDiv, textDiv };
+  }
+
+  // Add copy/like/dislike buttons under a bot message
+  function addMessageButtons(messageDiv, text) {
+    const buttonsContainer = document.createElement('div');
+    buttonsContainer.className = 'chatbot__buttons';
+    const copyButton = document.createElement('button');
+    copyButton.className = 'btn-copy';
+    copyButton.innerHTML = '<i class="fas fa-copy"></i>';
+    copyButton.addEventListener('click', () => {
+      navigator.clipboard.writeText(text);
+      copyButton.classList.add('btn-clicked');
+      setTimeout(() => {
+        copyButton.classList.remove('btn-clicked');
+      }, 1000); // Change back to original color after 1 second
+    });
+    buttonsContainer.appendChild(copyButton);
+
+    const likeButton = document.createElement('button');
+    likeButton.className = 'btn-like';
+    likeButton.innerHTML = '<i class="fas fa-thumbs-up"></i>';
+    likeButton.addEventListener('click', () => {
+      // TODO: Implement like functionality
+      likeButton.classList.add('btn-clicked');
+      setTimeout(() => {
+        likeButton.classList.remove('btn-clicked');
+      }, 1000); // Change back to original color after 1 second
+    });
+    buttonsContainer.appendChild(likeButton);
+
+    const dislikeButton = document.createElement('button');
+    dislikeButton.className = 'btn-dislike';
+    dislikeButton.innerHTML = '<i class="fas fa-thumbs-down"></i>';
+    dislikeButton.addEventListener('click', () => {
+      // TODO: Implement like functionality;
+      dislikeButton.classList.add('btn-clicked');
+      setTimeout(() => {
+        dislikeButton.classList.remove('btn-clicked');
+      }, 1000); // Change back to original color after 1 second
+    });
+    buttonsContainer.appendChild(dislikeButton);
+    messageDiv.appendChild(buttonsContainer);
   }
 
   // Global click listener to fade out chat popup when clicking outside
@@ -508,6 +549,19 @@ async function switchFaqLanguage() {
     }
   });
 
+  // Ingestion runs as a background job; poll its status URL until it finishes and
+  // return the job's result, or {detail} describing why it failed
+  async function waitForIngestJob(data) {
+    if (!data.status_url) return data;
+    while (true) {
+      await new Promise(resolve => setTimeout(resolve, 1000));
+      const job = await (await fetch(data.status_url)).json();
+      if (job.status === "succeeded") return job.result;
+      if (job.status === "failed") return { detail: job.error };
+      if (!job.status) return job;
+    }
+  }
+
   uploadBtn.addEventListener("click", () => {
     uploadInput.click();
   });
@@ -522,7 +576,7 @@ async function switchFaqLanguage() {
           method: "POST",
           body: formData
         });
-        const data = await response.json();
+        const data = await waitForIngestJob(await response.json());
         if (data.status === "success") {
           alert("Document ingested successfully!");
         } else {
@@ -566,7 +620,7 @@ async function switchFaqLanguage() {
           },
           body: JSON.stringify({ url: url })
         });
-        const data = await response.json();
+        const data = await waitForIngestJob(await response.json());
         if (data.status === "success") {
           alert("URL ingested successfully!");
         } else {